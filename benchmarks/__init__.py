@@ -0,0 +1 @@
+from .fake_api import FakeHTBApi
\ No newline at end of file
@@ -0,0 +1,107 @@
+import random
+
+import httpx
+
+
+class FakeHTBApi:
+    """
+    Local stand-in for the HTB API with a synthetic machine catalogue.
+
+    Plug it into the shared client before the app starts:
+
+        htb_api.transport = FakeHTBApi(1000).transport()
+
+    Responses follow the shapes the widgets read; the catalogue is deterministic
+    for a given size and seed so runs are comparable between commits.
+    """
+
+    difficulties = ["Easy", "Medium", "Hard", "Insane"]
+    feedback_keys = ["counterCake", "counterVeryEasy", "counterEasy", "counterTooEasy", "counterMedium",
+                     "counterBitHard", "counterHard", "counterTooHard", "counterExHard", "counterBrainFuck"]
+
+    def __init__(self, machine_count: int, seed: int = 1337) -> None:
+        self.machine_count = machine_count
+        self.random = random.Random(seed)
+        self.current = [self.make_machine(i) for i in range(1, machine_count + 1)]
+        self.retired = [self.make_machine(i) for i in range(machine_count + 1, 2 * machine_count + 1)]
+        self.machines = {machine["id"]: machine for machine in self.current + self.retired}
+        self.requests = 0
+
+    def make_machine(self, machine_id: int) -> dict:
+        return {
+            "id": machine_id,
+            "avatar": "",
+            "name": f"Machine{machine_id}",
+            "static_points": 20,
+            "os": self.random.choice(["Linux", "Windows", "FreeBSD", "OpenBSD"]),
+            "points": self.random.choice([20, 30, 40, 50]),
+            "star": round(self.random.uniform(2.5, 5.0), 1),
+            "release": f"20{self.random.randint(17, 24)}-0{self.random.randint(1, 9)}-1{self.random.randint(0, 9)}T17:00:00.000000Z",
+            "free": machine_id % 7 == 0,
+            "difficultyText": self.random.choice(self.difficulties),
+            "user_owns_count": self.random.randint(0, 50000),
+            "root_owns_count": self.random.randint(0, 40000),
+            "authUserInUserOwns": self.random.random() < 0.3,
+            "authUserInRootOwns": self.random.random() < 0.2,
+            "is_competitive": False,
+            "active": None,
+            "feedbackForChart": {key: self.random.randint(0, 500) for key in self.feedback_keys},
+            "ip": None,
+            "playInfo": {"isActive": None, "expires_at": None},
+            "labels": [],
+        }
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        path = request.url.path
+
+        if path == "/api/v4/user/info":
+            return httpx.Response(200, json={"info": {"id": 1}})
+        if path.startswith("/api/v4/profile/activity/"):
+            return httpx.Response(200, json={"profile": {"activity": [
+                {"date": f"2024-01-{day:02d}T00:00:00.000000Z", "date_diff": f"{day} days ago", "object_type": "machine",
+                 "type": "user", "id": day, "name": f"Machine{day}", "points": 20}
+                for day in range(1, 21)
+            ]}})
+        if path.startswith("/api/v4/profile/"):
+            return httpx.Response(200, json={"profile": {
+                "id": 1, "name": "benchmark", "rank_id": 3, "ranking": 1234, "points": 50, "user_owns": 10,
+                "system_owns": 8, "current_rank_progress": 40, "user_bloods": 0, "system_bloods": 0, "respects": 3
+            }})
+        if path == "/api/v4/season/list":
+            return httpx.Response(200, json={"data": [{"id": 1, "name": "Season 1", "active": False}, {"id": 2, "name": "Season 2", "active": True}]})
+        if path.startswith("/api/v4/season/user/rank/"):
+            return httpx.Response(200, json={"data": {
+                "league": "Gold", "rank": 100, "total_ranks": 5000, "rank_suffix": "th",
+                "total_season_points": 40, "flags_to_next_rank": {"obtained": 3, "total": 5}
+            }})
+        if path == "/api/v4/season/machines":
+            return httpx.Response(200, json={"data": [
+                {"id": machine["id"], "name": machine["name"], "os": machine["os"], "difficulty_text": machine["difficultyText"],
+                 "is_owned_user": False, "is_owned_root": False, "active": i == 0, "is_released": True, "unknown": False}
+                for i, machine in enumerate(self.current[:13])
+            ]})
+        if path == "/api/v4/season/machine/active":
+            return httpx.Response(200, json={"data": {"id": self.current[0]["id"]}})
+        if path == "/api/v4/machine/active":
+            return httpx.Response(200, json={"info": None})
+        if path.startswith("/api/v4/machine/profile/"):
+            machine = dict(self.machines.get(int(path.rsplit("/", 1)[1]), self.current[0]))
+            machine["stars"] = machine["star"]
+            machine["playInfo"] = {"isSpawned": False, "isSpawning": False, "isActive": False, "active_player_count": 3, "expires_at": None}
+            return httpx.Response(200, json={"info": machine})
+        if path == "/api/v4/machine/paginated":
+            return httpx.Response(200, json={"data": self.current})
+        if path == "/api/v4/machine/list/retired/paginated":
+            return httpx.Response(200, json={"data": self.retired})
+        if path == "/api/v4/connection/status":
+            return httpx.Response(200, json=[{
+                "location_type_friendly": "EU - Free",
+                "server": {"id": 1, "hostname": "edge-eu-free-1.hackthebox.eu", "port": 1337, "friendly_name": "EU Free 1"},
+                "connection": {"through_pwnbox": False, "ip4": "10.10.14.2", "ip6": "", "down": 1, "up": 2}
+            }])
+
+        return httpx.Response(404, json={"message": "not found"})
@@ -0,0 +1,213 @@
+"""
+Headless benchmarks for HTBtui against a local fake API.
+
+Every catalogue size runs in a fresh interpreter so memory and startup numbers
+are not skewed by the previous run:
+
+    python -m benchmarks.run                      # 100, 1000 and 10000 machines
+    python -m benchmarks.run --sizes 100 1000 --output before.json
+    python -m benchmarks.run --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# lower is better for everything but throughput
+HIGHER_IS_BETTER = {"retired_rows_per_s"}
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def wait_for(pilot, condition, timeout: float = 120) -> float:
+    """
+    Polls `condition` on the app's loop until it is true.
+
+    Returns:
+        float: The perf_counter time at which it became true.
+    """
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("condition not met in time")
+        await asyncio.sleep(0.001)
+    return time.perf_counter()
+
+
+async def bench(size: int, idle_seconds: float, selections: int) -> dict:
+    from benchmarks.fake_api import FakeHTBApi
+    from utilities import htb_api, metrics
+
+    fake = FakeHTBApi(size)
+    htb_api.transport = fake.transport()
+
+    from textual import events
+    from htbtui import HTBtui
+    from widgets import PlayerStats, PlayerActivity, CurrentMachines, RetiredMachines, VPNConnection, ActiveMachine, MachineDetails, OutputLog
+
+    class BenchmarkApp(HTBtui):
+        ready_at = None
+
+        def on_ready(self) -> None:
+            super().on_ready()
+            self.ready_at = time.perf_counter()
+
+    start = time.perf_counter()
+    app = BenchmarkApp()
+    results = {"machines": size}
+
+    async with app.run_test(size=(200, 60)) as pilot:
+        await wait_for(pilot, lambda: app.ready_at is not None)
+        results["first_paint_s"] = app.ready_at - start
+
+        screen = app.get_screen("htb_screen")
+        current = screen.query_one(CurrentMachines)
+        dashboard = [screen.query_one(widget) for widget in (PlayerStats, PlayerActivity, VPNConnection, ActiveMachine)]
+        done = await wait_for(pilot, lambda: current.row_count == size and not any(widget.loading for widget in dashboard + [current]))
+        results["full_dashboard_s"] = done - start
+
+        # rows into the retired DataTable, from starting the fetch to the last row
+        retired = screen.query_one(RetiredMachines)
+        load_start = time.perf_counter()
+        retired.load()
+        load_done = await wait_for(pilot, lambda: retired.row_count == size)
+        results["retired_load_s"] = load_done - load_start
+        render = metrics.histograms.get(metrics.key("htbtui_render_duration_ms", {"handler": "RetiredMachines.make_machine_list"}))
+        results["retired_render_ms"] = render.max
+        results["retired_rows_per_s"] = size / (render.max / 1000) if render.max else None
+
+        # cursor movement in the current machines table to the details panel showing that machine
+        details = screen.query_one(MachineDetails)
+        current.focus()
+        await pilot.pause()
+        latencies = []
+        for _ in range(min(selections, size - 1)):
+            target = current.ordered_rows[current.cursor_row + 1].key.value
+            pressed = time.perf_counter()
+            app.post_message(events.Key("down", None))
+            shown = await wait_for(pilot, lambda: str(details.selected_machine_id) == str(target))
+            latencies.append((shown - pressed) * 1000)
+        results["selection_to_details_ms_p50"] = statistics.median(latencies)
+        results["selection_to_details_ms_max"] = max(latencies)
+
+        # idle: no input, just the app's own timers, once queued work such as log writes has drained
+        log = screen.query_one(OutputLog)
+        settle_start = time.perf_counter()
+        settled = await wait_for(pilot, lambda: not log.draining and not any(worker.is_running for worker in app.workers))
+        results["settle_s"] = settled - settle_start
+        await pilot.pause(1)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        await asyncio.sleep(idle_seconds)
+        results["idle_cpu_percent"] = 100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        results["steady_rss_mb"] = rss_mb()
+
+        # the same, in the low-CPU mode the app switches to after a while without input
+        app.enter_idle()
+        await pilot.pause(1)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        await asyncio.sleep(idle_seconds)
+        results["idle_mode_cpu_percent"] = 100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results["api_requests"] = fake.requests
+    return results
+
+
+def run_size(size: int, idle_seconds: float, selections: int) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.NamedTemporaryFile(suffix=".json") as result_file:
+        env = dict(os.environ, HTBTUI_DATA_DIR=data_dir)
+        env.setdefault("HTB_TOKEN", "benchmark.fake.token")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--single", str(size), "--idle-seconds", str(idle_seconds),
+             "--selections", str(selections), "--result-file", result_file.name],
+            cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL
+        )
+        with open(result_file.name) as f:
+            return json.load(f)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{before['commit']} -> {after['commit']}")
+    for size, after_results in after["results"].items():
+        before_results = before["results"].get(size)
+        if before_results is None:
+            continue
+        print(f"\n{size} machines")
+        for name, new in after_results.items():
+            old = before_results.get(name)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or name == "machines":
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = change < 0 if name in HIGHER_IS_BETTER else change > 0
+            flag = "  !" if worse and abs(change) > 10 else ""
+            print(f"  {name:32} {old:12.2f} {new:12.2f} {change:+8.1f}%{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the HTBtui benchmarks against a local fake API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="machine catalogue sizes")
+    parser.add_argument("--idle-seconds", type=float, default=5, help="how long to sample idle CPU for")
+    parser.add_argument("--selections", type=int, default=20, help="cursor moves to time for selection latency")
+    parser.add_argument("--output", help="result file, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.single:
+        results = asyncio.run(bench(args.single, args.idle_seconds, args.selections))
+        with open(args.result_file, "w") as f:
+            json.dump(results, f)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {}
+    }
+    for size in args.sizes:
+        print(f"[+] {size} machines", file=sys.stderr)
+        report["results"][str(size)] = run_size(size, args.idle_seconds, args.selections)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"[*] Results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 from .debug_level import DebugLevel
 from .htb_ranks import Ranks
+from .machine_state import MachineState
 from .search_filter import SearchFilter
\ No newline at end of file
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class MachineState(Enum):
+    IDLE = "idle"
+    SPAWNING = "spawning"
+    RUNNING = "running"
+    STOPPING = "stopping"
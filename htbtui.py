@@ -1,49 +1,193 @@
-from textual import on
+import os
+import sqlite3
+import time
+
+from textual import events, on
 from textual.app import App
+from textual.widgets import LoadingIndicator
+
+from rich.text import Text
 
-from screens import HTBScreen, ConsoleModal
+from screens import HTBScreen, ConsoleModal, MetricsScreen, AnalyticsScreen, SeasonHistoryScreen
 from messages import DebugMessage, LogMessage
 from enums import DebugLevel
+from utilities import LoopWatchdog, PollScheduler, Snapshot, TimeSeriesStore, metrics, htb_api, profiler, tracer
 
 
 class HTBtui(App):
 
-    BINDINGS = [("`", "expand_log", "Show Log"), ("~", "request_console", "Show Console")]
+    BINDINGS = [("`", "expand_log", "Show Log"), ("~", "request_console", "Show Console"), ("!", "request_metrics", "Show Metrics"), ("%", "request_analytics", "Show Analytics"), ("@", "request_season_history", "Show Season History")]
         
     SCREENS = {
         "htb_screen": HTBScreen(),
-        "console_modal": ConsoleModal()
+        "console_modal": ConsoleModal(),
+        "metrics_screen": MetricsScreen(),
+        "analytics_screen": AnalyticsScreen(),
+        "season_history_screen": SeasonHistoryScreen()
     }
 
 
+    snapshot_interval = 60
+    metrics_textfile_interval = 15
+    trace_flush_interval = 30
+    history_downsample_interval = 3600
+    idle_check_interval = 5
+    loading_refresh = 1 / 16
+
     def __init__(self) -> None:
+        if profiler.enabled:
+            profiler.start("startup")
         super().__init__()
         self.debug_level = DebugLevel.HIGH
+        self.snapshot = Snapshot()
+        self.snapshot.load()
+        self.history = TimeSeriesStore()
+        self.scheduler = PollScheduler(self)
+        self.idle = False
+        self.idle_after = float(os.environ.get("HTBTUI_IDLE_AFTER", 120))
+        self.last_input = time.monotonic()
     
     def on_ready(self) -> None:
         """
         Event handler for when the application is ready.
         """
+        path = profiler.stop("startup")
+        if path:
+            self.post_message(DebugMessage({"[*] Startup profile": path}, DebugLevel.LOW))
 
     async def on_mount(self) -> None:
         """
         Event handler for when the application is mounted.
         """
         self.push_screen("htb_screen")
+        self.scheduler.add(self, self.snapshot.save, self.snapshot_interval, idle_interval=5 * self.snapshot_interval)
+        self.metrics_textfile = os.environ.get("HTBTUI_METRICS_TEXTFILE")
+        if self.metrics_textfile:
+            self.scheduler.add(self, self.export_metrics, self.metrics_textfile_interval, idle_interval=4 * self.metrics_textfile_interval)
+        if tracer.enabled:
+            self.scheduler.add(self, tracer.flush, self.trace_flush_interval, idle_interval=10 * self.trace_flush_interval)
+        self.scheduler.add(self, self.downsample_history, self.history_downsample_interval)
+        # only runs while active, any input ends idle mode
+        self.scheduler.add(self, self.detect_idle, self.idle_check_interval)
+        self.scheduler.start()
+        self.watchdog = LoopWatchdog(self.report_stall)
+        self.watchdog.start()
+
+    async def on_event(self, event: events.Event) -> None:
+        """
+        Notes user input before the event is dispatched, to leave idle mode.
+        """
+        if isinstance(event, (events.Key, events.MouseEvent)):
+            self.last_input = time.monotonic()
+            if self.idle:
+                self.exit_idle()
+        await super().on_event(event)
+
+    def detect_idle(self) -> None:
+        """
+        Enters idle mode after $HTBTUI_IDLE_AFTER seconds (120 by default) without input.
+        """
+        if self.idle_after > 0 and time.monotonic() - self.last_input >= self.idle_after:
+            self.enter_idle()
+
+    def loading_indicators(self) -> list:
+        return [indicator for screen in self.screen_stack for indicator in screen.query(LoadingIndicator)]
+
+    def enter_idle(self) -> None:
+        """
+        Low-CPU mode for unattended sessions: pollers slow down or sleep, the
+        header clock and loading animations stop and the watchdog ticks less often.
+        """
+        if self.idle:
+            return
+        self.idle = True
+        self.scheduler.set_idle(True)
+        self.watchdog.set_idle(True)
+        for indicator in self.loading_indicators():
+            indicator.auto_refresh = None
+        metrics.set("htbtui_idle", 1)
+
+    def exit_idle(self) -> None:
+        """
+        Restores the normal refresh rates, anything overdue is refreshed right away.
+        """
+        if not self.idle:
+            return
+        self.idle = False
+        self.scheduler.set_idle(False)
+        self.watchdog.set_idle(False)
+        for indicator in self.loading_indicators():
+            indicator.auto_refresh = self.loading_refresh
+        metrics.set("htbtui_idle", 0)
+
+    def report_stall(self, blocked_ms: float, stack: str) -> None:
+        """
+        Logs the stack of a handler that blocked the event loop.
+
+        Args:
+            blocked_ms (float): How long the loop was blocked.
+            stack (str): The loop thread's stack while it was blocked.
+        """
+        self.post_message(DebugMessage(Text(f"[!] Event loop blocked for {blocked_ms:.0f} ms, innermost frames:\n{stack}"), DebugLevel.LOW))
+
+    def export_metrics(self) -> None:
+        """
+        Writes the Prometheus textfile set in $HTBTUI_METRICS_TEXTFILE.
+        """
+        try:
+            metrics.write_textfile(self.metrics_textfile)
+        except OSError as e:
+            self.post_message(DebugMessage({"[!] Metrics export failed": str(e)}, DebugLevel.LOW))
+
+    def downsample_history(self) -> None:
+        """
+        Rolls aged samples of the local history up to hourly and daily values.
+        """
+        try:
+            self.history.downsample()
+        except sqlite3.Error as e:
+            self.post_message(DebugMessage({"[!] History downsampling failed": str(e)}, DebugLevel.LOW))
+
+    async def on_unmount(self) -> None:
+        """
+        Event handler for when the application is unmounted.
+        """
+        self.watchdog.stop()
+        self.scheduler.stop()
+        self.history.close()
+        await htb_api.aclose()
 
     def action_request_console(self) -> None:
         """
         Opens the console modal.
         """
-        log = self.query_one("#log")
-        log.write("Console requested")
+        log = self.get_screen("htb_screen").query_one("#log")
+        log.append("Console requested")
         self.push_screen("console_modal")
 
+    def action_request_metrics(self) -> None:
+        """
+        Opens the metrics screen.
+        """
+        self.push_screen("metrics_screen")
+
+    def action_request_analytics(self) -> None:
+        """
+        Opens the catalogue analytics screen.
+        """
+        self.push_screen("analytics_screen")
+
+    def action_request_season_history(self) -> None:
+        """
+        Opens the season history screen.
+        """
+        self.push_screen("season_history_screen")
+
     def action_expand_log(self) -> None:
         """
         Expands the log.
         """
-        self.query_one("#log").toggle_class("expanded")
+        self.get_screen("htb_screen").query_one("#log").toggle_class("expanded")
 
     @on(DebugMessage)
     def log_debug_messages(self, message: DebugMessage) -> None:
@@ -53,9 +197,10 @@ class HTBtui(App):
         Args:
             message (DebugMessage): The debug message to log.
         """
+        metrics.inc("htbtui_messages_total", message="DebugMessage")
         if message.debug_level.value <= self.debug_level.value:
-            log = self.query_one("#log")
-            log.write(message.debug_data)
+            log = self.get_screen("htb_screen").query_one("#log")
+            log.append(message.debug_data)
 
     @on(LogMessage)
     def log_messages(self, message: LogMessage) -> None:
@@ -65,12 +210,17 @@ class HTBtui(App):
         Args:
             message (LogMessage): The message to log.
         """
-        log = self.query_one("#log")
-        log.write(message.message)
+        metrics.inc("htbtui_messages_total", message="LogMessage")
+        log = self.get_screen("htb_screen").query_one("#log")
+        log.append(message.message)
 
 
 if __name__ == "__main__":
     app = HTBtui()
     app.run()
+    app.snapshot.save()
+    if profiler.enabled:
+        profiler.dump()
+    tracer.flush()
     
     
\ No newline at end of file
@@ -1,3 +1,8 @@
 from .data_received import DataReceived
 from .debug_message import DebugMessage
-from .log_message import LogMessage
\ No newline at end of file
+from .flag_submitted import FlagSubmitted
+from .log_message import LogMessage
+from .machine_action_requested import MachineActionRequested
+from .machine_ip_assigned import MachineIPAssigned
+from .machine_list_updated import MachineListUpdated
+from .machine_state_changed import MachineStateChanged
\ No newline at end of file
@@ -4,4 +4,5 @@ from textual.message import Message
 @dataclass
 class DataReceived(Message):
     data: dict
-    key: str
\ No newline at end of file
+    key: str
+    trace_id: str = None
\ No newline at end of file
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+from textual.message import Message
+
+@dataclass
+class FlagSubmitted(Message):
+    machine_id: int
+    data: dict
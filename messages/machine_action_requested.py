@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+from textual.message import Message
+
+@dataclass
+class MachineActionRequested(Message):
+    action: str
+    machine_id: int
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+from textual.message import Message
+
+@dataclass
+class MachineIPAssigned(Message):
+    ip: str
+    machine_data: dict
+    trace_id: str = None
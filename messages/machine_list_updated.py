@@ -0,0 +1,6 @@
+from dataclasses import dataclass
+from textual.message import Message
+
+@dataclass
+class MachineListUpdated(Message):
+    table_id: str
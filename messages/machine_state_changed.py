@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+from textual.message import Message
+from enums import MachineState
+
+@dataclass
+class MachineStateChanged(Message):
+    state: MachineState
+    machine_data: dict
+    trace_id: str = None
@@ -1,2 +1,5 @@
+from .analytics_screen import AnalyticsScreen
 from .console_modal import ConsoleModal
-from .htb_screen import HTBScreen
\ No newline at end of file
+from .htb_screen import HTBScreen
+from .metrics_screen import MetricsScreen
+from .season_history_screen import SeasonHistoryScreen
\ No newline at end of file
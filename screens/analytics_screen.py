@@ -0,0 +1,198 @@
+from textual.screen import ModalScreen
+from textual.widgets import Static
+from textual.containers import Container, VerticalScroll
+from textual.app import ComposeResult
+
+from rich import box
+from rich.table import Table
+
+from utilities import MachineCatalogue, metrics
+from widgets import CurrentMachines, RetiredMachines
+
+
+class AnalyticsScreen(ModalScreen):
+    """
+    Modal screen with statistics over the whole loaded machine catalogue.
+    """
+
+    CSS_PATH = "analytics_screen.tcss"
+    BINDINGS = [("%", "close_analytics", "Dismiss Analytics")]
+
+    refresh_interval = 2
+    idle_refresh_interval = 30
+    bar_width = 30
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.catalogue = MachineCatalogue()
+        self.signature = None
+
+    def compose(self) -> ComposeResult:
+        yield Container(
+            VerticalScroll(
+                Static(id="analytics_summary"),
+                Static(id="analytics_difficulty"),
+                Static(id="analytics_completion"),
+                Static(id="analytics_owns"),
+                Static(id="analytics_ratings"),
+                id="analytics"
+            ),
+            Static("[b]%[/b] close", id="analytics_footer"),
+            id="analytics_container"
+        )
+
+    def on_mount(self) -> None:
+        """
+        Event handler for when the screen is mounted.
+        """
+        self.refresh_analytics_timer = self.app.scheduler.add(self, self.refresh_analytics, self.refresh_interval, idle_interval=self.idle_refresh_interval)
+        self.refresh_analytics_timer.pause()
+
+    def on_screen_resume(self) -> None:
+        """
+        Event handler for when the screen is shown.
+        """
+        # the retired list is only fetched on demand, the analytics need it
+        self.machine_tables()[1].load()
+        self.refresh_analytics(force=True)
+        self.refresh_analytics_timer.resume()
+
+    def on_screen_suspend(self) -> None:
+        """
+        Event handler for when the screen is hidden.
+        """
+        self.refresh_analytics_timer.pause()
+
+    def action_close_analytics(self) -> None:
+        """
+        Closes the analytics screen.
+        """
+        self.app.pop_screen()
+
+    def machine_tables(self) -> tuple:
+        screen = self.app.get_screen("htb_screen")
+        return screen.query_one(CurrentMachines), screen.query_one(RetiredMachines)
+
+    def refresh_analytics(self, force: bool = False) -> None:
+        """
+        Rebuilds the catalogue if the machine lists changed and re-renders the tables.
+
+        Args:
+            force (bool): Rebuild even if the lists look unchanged, e.g. to pick up own changes.
+        """
+        tables = self.machine_tables()
+        signature = tuple((id(table.machine_data), len(table.machine_data)) for table in tables)
+        if signature == self.signature and not force:
+            return
+        self.signature = signature
+        self.build_catalogue({id: data for table in tables for id, data in table.machine_data.items()})
+
+        self.query_one("#analytics_summary", Static).update(self.make_summary())
+        self.query_one("#analytics_difficulty", Static).update(self.make_difficulty_table())
+        self.query_one("#analytics_completion", Static).update(self.make_completion_table())
+        self.query_one("#analytics_owns", Static).update(self.make_owns_table())
+        self.query_one("#analytics_ratings", Static).update(self.make_rating_table())
+
+    @metrics.timed("htbtui_render_duration_ms", handler="AnalyticsScreen.build_catalogue")
+    def build_catalogue(self, machines: dict) -> None:
+        self.catalogue.build(machines)
+
+    def make_summary(self) -> str:
+        catalogue = self.catalogue
+        if not len(catalogue):
+            return "[b]Catalogue[/b]  no machines loaded yet"
+        return (
+            f"[b]Catalogue[/b]  {len(catalogue)} machines  "
+            f"{int(catalogue.user_owned.sum())} user owns  {int(catalogue.root_owned.sum())} root owns  "
+            f"{int(catalogue.feedback.sum())} difficulty votes"
+        )
+
+    @metrics.timed("htbtui_render_duration_ms", handler="AnalyticsScreen.make_difficulty_table")
+    def make_difficulty_table(self) -> Table:
+        """
+        Makes the official vs. community difficulty table.
+
+        Returns:
+            Table: Community difficulty (1 to 10) per official difficulty.
+        """
+        table = Table(title="Official vs. community difficulty", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Official", ratio=2)
+        table.add_column("Machines", justify="right")
+        table.add_column("Community mean", justify="right")
+        table.add_column("p25 - p75", justify="right")
+        table.add_column("Votes", justify="right")
+
+        for name, machines, mean, p25, p75, votes in self.catalogue.difficulty_comparison():
+            table.add_row(
+                name,
+                str(machines),
+                "-" if mean is None else f"{mean:.1f}",
+                "-" if mean is None else f"{p25:.1f} - {p75:.1f}",
+                str(votes)
+            )
+
+        return table
+
+    @metrics.timed("htbtui_render_duration_ms", handler="AnalyticsScreen.make_completion_table")
+    def make_completion_table(self) -> Table:
+        """
+        Makes the completion table.
+
+        Returns:
+            Table: My user and root completion per OS and per official difficulty.
+        """
+        table = Table(title="Completion", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Group", ratio=2)
+        table.add_column("Machines", justify="right")
+        table.add_column("User", justify="right")
+        table.add_column("Root", justify="right")
+        table.add_column("Root %", ratio=2)
+
+        for by in ("difficulty", "os"):
+            for name, machines, user, root in self.catalogue.completion(by):
+                table.add_row(name, str(machines), f"{user / machines:.0%}", f"{root / machines:.0%}", self.make_bar(root, machines))
+            table.add_section()
+
+        return table
+
+    @metrics.timed("htbtui_render_duration_ms", handler="AnalyticsScreen.make_owns_table")
+    def make_owns_table(self) -> Table:
+        """
+        Makes the owns per day table.
+
+        Returns:
+            Table: The machines with the most user owns per day since release.
+        """
+        table = Table(title="Most owned per day", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Machine", ratio=2)
+        table.add_column("Difficulty", ratio=1)
+        table.add_column("Owns / day", justify="right")
+
+        for name, difficulty, rate in self.catalogue.most_owned_per_day():
+            table.add_row(name, difficulty, f"{rate:.1f}")
+
+        return table
+
+    @metrics.timed("htbtui_render_duration_ms", handler="AnalyticsScreen.make_rating_table")
+    def make_rating_table(self) -> Table:
+        """
+        Makes the rating distribution table.
+
+        Returns:
+            Table: Machines per half star.
+        """
+        table = Table(title="Ratings", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Stars", ratio=1)
+        table.add_column("Machines", justify="right")
+        table.add_column("", ratio=4)
+
+        distribution = self.catalogue.rating_distribution()
+        largest = max((count for _, _, count in distribution), default=0)
+        for low, high, count in distribution:
+            table.add_row(f"{low:.1f} - {high:.1f}", str(count), self.make_bar(count, largest))
+
+        return table
+
+    def make_bar(self, value: int, total: int) -> str:
+        filled = round(self.bar_width * value / total) if total else 0
+        return f"[#9fef00]{'█' * filled}[/#9fef00][#333]{'█' * (self.bar_width - filled)}[/#333]"
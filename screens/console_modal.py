@@ -1,4 +1,7 @@
-import httpx
+import asyncio
+import gc
+import os
+import time
 
 from textual import on
 from textual.screen import ModalScreen
@@ -8,11 +11,13 @@ from textual.suggester import SuggestFromList
 from textual.app import ComposeResult
 
 from rich import box
+from rich.markup import escape
 from rich.table import Table
 
 from messages import DebugMessage
-from enums import DebugLevel
-from utilities import APIToken
+from enums import DebugLevel, Ranks
+from utilities import APIToken, ConsoleHistory, LatencyProbe, LRUCache, OrderedOutputs, console_output, parse_script, htb_api, memory_budget, memory_diagnostics, metrics, profiler
+from widgets import ActiveMachine, VPNConnection
 
 class ConsoleModal(ModalScreen):
     """
@@ -20,12 +25,17 @@ class ConsoleModal(ModalScreen):
     """
 
     CSS_PATH = "console_modal.tcss"
-    BINDINGS = [("~", "close_console", "Dismiss Console")]
+    BINDINGS = [("~", "close_console", "Dismiss Console"), ("up", "history_previous", "Previous Command"), ("down", "history_next", "Next Command")]
 
     token_name = "HTB_TOKEN"
     base_url = "https://labs.hackthebox.com"
     endpoint = "/api/v4/search/fetch?query=" # + keyword + "&tags=" + filter
     endpoints = {
+        "GET": {
+            "vpn_servers": "/api/v4/connections/servers?product=labs",
+            "profile": "/api/v4/profile/", # + user_id
+            "profile_activity": "/api/v4/profile/activity/", # + user_id
+        },
         "POST": {
             "spawn_machine": "/api/v4/vm/spawn", # POST DATA {"machine_id": id}
             "terminate_machine": "/api/v4/vm/terminate", # POST DATA {"machine_id": id}
@@ -46,9 +56,34 @@ class ConsoleModal(ModalScreen):
                         "stop",
                         "reset",
                         "refresh",
+                        "wait active",
+                        "source",
+                        "refresh all",
+                        "refresh machines",
+                        "refresh profile",
+                        "refresh activity",
+                        "refresh active",
+                        "refresh vpn",
                         "find",
                         "find users",
-                        "find machines"
+                        "find machines",
+                        "profile",
+                        "compare",
+                        "probe",
+                        "probe tcp",
+                        "probe udp",
+                        "perf",
+                        "perf start",
+                        "perf stop",
+                        "perf dump",
+                        "mem",
+                        "mem start",
+                        "mem snap",
+                        "mem diff",
+                        "mem top",
+                        "mem widgets",
+                        "mem trim",
+                        "mem stop"
                         ]
     command_tree = {
         "find" : [
@@ -59,17 +94,71 @@ class ConsoleModal(ModalScreen):
         "start" : [],
         "stop" : [],
         "reset" : [],
+        "wait" : [
+            "active"
+        ],
+        "source" : [],
+        "profile" : [],
+        "compare" : [],
+        "refresh" : [
+            "all",
+            "machines",
+            "current",
+            "seasonal",
+            "retired",
+            "profile",
+            "activity",
+            "active",
+            "vpn"
+        ],
+        "probe" : [
+            "tcp",
+            "udp"
+        ],
+        "perf" : [
+            "start",
+            "stop",
+            "dump"
+        ],
+        "mem" : [
+            "start",
+            "snap",
+            "diff",
+            "top",
+            "widgets",
+            "trim",
+            "stop"
+        ],
         # "exit" : [],
     }
         
+    max_concurrent_commands = 4
+    # commands that only wait on other work and do not take a command slot
+    unlimited_commands = ("source", "wait")
+    max_source_depth = 8
+    wait_timeout = 300
+    # profiles and activity of looked up users, and user name to id
+    profile_cache_size = 64
+    profile_ttl = 300
+    user_id_ttl = 3600
+    max_concurrent_lookups = 6
+
     def __init__(self) -> None:
         super().__init__()
         self.search_results = None
         self.active_machine_id = None
+        self.latency_probe = LatencyProbe()
+        self.history = None
+        self.command_semaphore = asyncio.Semaphore(self.max_concurrent_commands)
+        self.lookup_semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
+        self.profile_cache = LRUCache(memory_budget.cache_size(self.profile_cache_size), ttl=self.profile_ttl)
+        self.user_id_cache = LRUCache(memory_budget.cache_size(self.profile_cache_size), ttl=self.user_id_ttl)
+        metrics.register_cache("console_profiles", self.profile_cache)
+        metrics.register_cache("console_user_ids", self.user_id_cache)
 
     def compose(self) -> ComposeResult:
         yield Container(
-            RichLog(highlight=True, markup=True, auto_scroll=True, wrap=True, min_width=90, id="console"),
+            RichLog(highlight=True, markup=True, auto_scroll=True, wrap=True, min_width=90, max_lines=memory_budget.console_max_lines, id="console"),
             Input(
                 placeholder="Enter a command",
                 suggester=SuggestFromList(self.valid_base_commands, case_sensitive=True),
@@ -79,12 +168,30 @@ class ConsoleModal(ModalScreen):
             id="console_container"
         )
 
+    def on_mount(self) -> None:
+        """
+        Event handler for when the screen is mounted.
+        """
+        self.history = ConsoleHistory()
+        self.history.load()
+
     def action_close_console(self) -> None:
         """
         Closes the console modal.
         """
         self.app.pop_screen()
 
+    def action_history_previous(self) -> None:
+        command = self.history.previous()
+        if command is not None:
+            self.query_one(Input).value = command
+            self.query_one(Input).cursor_position = len(command)
+
+    def action_history_next(self) -> None:
+        command = self.history.next()
+        self.query_one(Input).value = command
+        self.query_one(Input).cursor_position = len(command)
+
 
     def on_input_submitted(self, message: Input.Submitted) -> None:
         """
@@ -105,7 +212,7 @@ class ConsoleModal(ModalScreen):
             search_type (SearchFilter): The type of search filter.
             search_term (str): The search term.
         """
-        log = self.query_one(RichLog)
+        log = self.output()
         log.write(f"[+] Finding {search_type} with name: {search_term} \n") 
         data = await self.get_search_results(search_type, search_term)
         
@@ -134,7 +241,7 @@ class ConsoleModal(ModalScreen):
 
     async def get_search_results(self, filter: str, keyword: str):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint + '"' + keyword + '"' + '&tags=[\"' + filter + '\"]', headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -156,7 +263,7 @@ class ConsoleModal(ModalScreen):
         Returns:
             None
         """
-        log = self.query_one(RichLog)
+        log = self.output()
         log.write(f"[+] Starting machine with id: {machine_id}")
         data = await self.spawn_machine(machine_id)
         if "message" in data:
@@ -165,6 +272,7 @@ class ConsoleModal(ModalScreen):
             if "deployed" in data["message"]:
                 self.active_machine_id = machine_id
                 log.write("[+] Active machine updated")
+                self.app.get_screen("htb_screen").begin_machine_action("spawn", machine_id)
 
 
     async def stop_machine(self, machine_id: int) -> None:
@@ -178,11 +286,15 @@ class ConsoleModal(ModalScreen):
         Returns:
             None
         """
-        log = self.query_one(RichLog)
+        log = self.output()
         log.write(f"[-] Stopping machine with id: {machine_id}")
         data = await self.terminate_machine(machine_id)
+        if not isinstance(data, dict):
+            log.write(f"[!] {escape(data)}")
+            return
         if "message" in data:
             log.write("[!] " + data["message"])
+        self.app.get_screen("htb_screen").begin_machine_action("stop", machine_id)
 
 
     async def reset_machine(self, machine_id: int) -> None:
@@ -195,15 +307,21 @@ class ConsoleModal(ModalScreen):
         Returns:
             None
         """
-        log = self.query_one(RichLog)
+        log = self.output()
         log.write(f"[+] Resetting machine with id: {machine_id}")
         data = await self.respawn_machine(machine_id)
-        log.write("[!] " + data["message"])
+        if not isinstance(data, dict):
+            log.write(f"[!] {escape(data)}")
+            return
+        if "message" in data:
+            log.write("[!] " + data["message"])
+        # started before returning, so a chained `wait active` waits for the reset machine
+        self.app.get_screen("htb_screen").begin_machine_action("reset", machine_id)
 
 
     async def spawn_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["spawn_machine"], headers=self.headers, data={"machine_id": machine_id})
                 data = response.json()
                 
@@ -214,8 +332,10 @@ class ConsoleModal(ModalScreen):
     
     async def terminate_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["terminate_machine"], headers=self.headers, data={"machine_id": machine_id})
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
@@ -225,27 +345,466 @@ class ConsoleModal(ModalScreen):
 
     async def respawn_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["reset_machine"], headers=self.headers, data={"machine_id": machine_id})
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
         except Exception as e:
             return f"Error: {e}"
 
+    async def get_vpn_servers(self) -> list:
+        """
+        Retrieves the lab VPN servers that expose a hostname.
+
+        Returns:
+            list: (hostname, port) tuples, or an empty list on error.
+        """
+        try:
+            async with htb_api.session() as client:
+                response = await client.get(self.base_url + self.endpoints["GET"]["vpn_servers"], headers=self.headers)
+                if response.status_code != 200:
+                    return []
+                data = response.json()
+        except Exception as e:
+            self.post_message(DebugMessage({"VPN Servers Error": f"Error: {e}"}, DebugLevel.LOW))
+            return []
+
+        # servers are nested by region and tier, pick up anything that has a hostname
+        servers = []
+        pending = [data]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, dict):
+                if node.get("hostname"):
+                    servers.append((node["hostname"], int(node.get("port") or 1337)))
+                pending.extend(node.values())
+            elif isinstance(node, list):
+                pending.extend(node)
+        return servers
+
+    async def probe_vpn_servers(self, protocol: str, hosts: list) -> None:
+        """
+        Probes the VPN servers and writes a ranking to the console.
+
+        Args:
+            protocol (str): "tcp" or "udp".
+            hosts (list): Explicit "host[:port]" targets, the known lab servers when empty.
+        """
+        log = self.output()
+        default_port = 443 if protocol == "tcp" else 1337
+
+        targets = []
+        for host in hosts:
+            name, _, port = host.partition(":")
+            targets.append((name, int(port) if port else default_port))
+
+        if not targets:
+            server = self.app.get_screen("htb_screen").query_one(VPNConnection).connection_data["server"]
+            if server["hostname"]:
+                targets.append((server["hostname"], default_port))
+            for hostname, _ in await self.get_vpn_servers():
+                targets.append((hostname, default_port))
+            targets = list(dict.fromkeys(targets))
+
+        if not targets:
+            log.write("[!] No VPN servers to probe, use: probe <tcp|udp> <host[:port]> ...")
+            return
+
+        log.write(f"[+] Probing {len(targets)} server(s) over {protocol}")
+        ranking = await self.latency_probe.run(targets, protocol)
+
+        table = Table(expand=True, box=box.ASCII)
+        table.add_column("#")
+        table.add_column("server")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p90 ms", justify="right")
+        table.add_column("loss", justify="right")
+        table.add_column("samples", justify="right")
+        for i, result in enumerate(ranking):
+            table.add_row(
+                str(i),
+                f"{result['host']}:{result['port']}",
+                f"{result['p50']:.1f}" if result["p50"] is not None else "-",
+                f"{result['p90']:.1f}" if result["p90"] is not None else "-",
+                f"{result['loss']:.0%}",
+                str(result["samples"])
+            )
+        log.write(table)
+
+    async def resolve_user(self, user: str):
+        """
+        Returns the id of a user given as an id or a name, using the search for names.
+
+        Returns:
+            int: The user id, or an error string.
+        """
+        if user.isdigit():
+            return int(user)
+        user_id = self.user_id_cache.get(user.lower())
+        if user_id is not None:
+            return user_id
+        async with self.lookup_semaphore:
+            data = await self.get_search_results("users", user)
+        if isinstance(data, str):
+            return data
+        results = data.get("users") or []
+        if isinstance(results, dict):
+            results = list(results.values())
+        if not results:
+            return f"Error: no user named {user}"
+        # prefer an exact match over the first partial one
+        match = next((result for result in results if result["value"].lower() == user.lower()), results[0])
+        user_id = int(match["id"])
+        self.user_id_cache.put(user.lower(), user_id)
+        return user_id
+
+    async def get_cached(self, kind: str, user_id: int):
+        """
+        Returns a user's profile or activity, from the cache if it is fresh.
+
+        Args:
+            kind (str): "profile" or "profile_activity".
+            user_id (int): The user id.
+
+        Returns:
+            The profile dict or the activity list, or an error string.
+        """
+        cached = self.profile_cache.get((kind, user_id))
+        if cached is not None:
+            return cached
+        try:
+            async with self.lookup_semaphore:
+                response = await htb_api.get(self.base_url + self.endpoints["GET"][kind] + str(user_id), headers=self.headers)
+            if response.status_code != 200:
+                return f"Error: {response.status_code} - {response.text}"
+            data = (await htb_api.json(response))["profile"]
+            value = data["activity"] if kind == "profile_activity" else data
+        except Exception as e:
+            return f"Error: {e}"
+        self.profile_cache.put((kind, user_id), value)
+        return value
+
+    async def get_user(self, user: str):
+        """
+        Resolves a user and fetches their profile and activity concurrently.
+
+        Returns:
+            tuple: The profile and the activity list, or an error string.
+        """
+        user_id = await self.resolve_user(user)
+        if isinstance(user_id, str):
+            return user_id
+        profile, activity = await asyncio.gather(self.get_cached("profile", user_id), self.get_cached("profile_activity", user_id))
+        for result in (profile, activity):
+            if isinstance(result, str):
+                return result
+        return profile, activity
+
+    @staticmethod
+    def profile_rows(profile: dict) -> list:
+        """
+        Returns the rows PlayerStats shows for a profile, as (label, value) pairs.
+        """
+        return [
+            ("Rank", str(profile.get("rank") or (list(Ranks)[profile["rank_id"] - 1].value if profile.get("rank_id") else "-"))),
+            ("Ranking", f"#{profile.get('ranking')}"),
+            ("Points", str(profile.get("points"))),
+            ("Rank progress", f"{profile.get('current_rank_progress')}%"),
+            ("User Flag", str(profile.get("user_owns"))),
+            ("System Flag", str(profile.get("system_owns"))),
+            ("User Blood", str(profile.get("user_bloods"))),
+            ("System Blood", str(profile.get("system_bloods"))),
+            ("Respects", str(profile.get("respects"))),
+        ]
+
+    @staticmethod
+    def owned_machines(activity: list) -> set:
+        """
+        Returns the names of the machines with a root own in an activity list.
+        """
+        return {entry["name"] for entry in activity if entry.get("object_type") == "machine" and entry.get("type") == "root"}
+
+    async def show_profiles(self, users: list) -> None:
+        """
+        Fetches several users concurrently and writes their profiles side by side,
+        followed by the machines they have all rooted and those only one has.
+
+        Args:
+            users (list): User ids or names.
+        """
+        log = self.output()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.get_user(user) for user in users))
+        found = []
+        for user, result in zip(users, results):
+            if isinstance(result, str):
+                log.write(f"[!] {escape(user)}: {escape(result)}")
+            else:
+                found.append(result)
+        if not found:
+            return
+
+        table = Table(expand=True, box=box.ASCII)
+        table.add_column("")
+        for profile, _ in found:
+            table.add_column(f"{escape(str(profile.get('name')))}::{profile.get('id')}", justify="right")
+        rows = [self.profile_rows(profile) for profile, _ in found]
+        for index, (label, _) in enumerate(rows[0]):
+            table.add_row(label, *(escape(user_rows[index][1]) for user_rows in rows))
+
+        owned = [self.owned_machines(activity) for _, activity in found]
+        table.add_section()
+        table.add_row("Recently rooted", *(str(len(machines)) for machines in owned))
+        if len(found) > 1:
+            only = [machines - set().union(*owned[:index], *owned[index + 1:]) for index, machines in enumerate(owned)]
+            table.add_row("Only them", *(str(len(machines)) for machines in only))
+        log.write(table)
+
+        if len(found) > 1:
+            common = set.intersection(*owned)
+            names = ", ".join(sorted(common)[:20])
+            log.write(f"[*] Rooted by all {len(found)} in recent activity: {len(common)}{' - ' + escape(names) if common else ''}")
+        log.write(f"[*] Done in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    async def refresh_targets(self, targets: list) -> None:
+        """
+        Reloads parts of the dashboard and writes the time each one took to the console.
+
+        Args:
+            targets (list): Targets or groups, e.g. ["machines", "vpn"].
+        """
+        log = self.output()
+        log.write(f"[+] Refreshing {', '.join(targets)}")
+        start = time.perf_counter()
+        results = await self.app.get_screen("htb_screen").reload(targets)
+
+        table = Table(expand=True, box=box.ASCII)
+        table.add_column("target")
+        table.add_column("ms", justify="right")
+        table.add_column("status")
+        for target, (elapsed, error, joined) in results.items():
+            if isinstance(elapsed, BaseException):
+                table.add_row(target, "-", f"[red]{escape(repr(elapsed))}")
+                continue
+            status = f"[red]{escape(error)}" if error else "ok"
+            table.add_row(target, f"{elapsed:.0f}", f"{status} (joined)" if joined else status)
+        log.write(table)
+        log.write(f"[*] Refreshed in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def run_perf_command(self, subcommand: str) -> None:
+        """
+        Starts or stops a cProfile session of the event loop, or writes the
+        profiles collected with $HTBTUI_PROFILE.
+
+        Args:
+            subcommand (str): One of "start", "stop" or "dump".
+
+        Returns:
+            None
+        """
+        log = self.output()
+
+        match subcommand:
+            case "start":
+                if profiler.start("session"):
+                    log.write("[+] Profiling started, stop with: perf stop")
+                else:
+                    log.write("[!] A profile is already running")
+            case "stop":
+                path = profiler.stop("session")
+                if path:
+                    log.write(f"[*] Profile written to {path}")
+                else:
+                    log.write("[!] No profile running, start one with: perf start")
+            case "dump":
+                if not profiler.enabled:
+                    log.write(f"[!] Set {profiler.env_var}=1 to profile workers and render methods")
+                for path in profiler.dump():
+                    log.write(f"[*] Profile written to {path}")
+            case _:
+                log.write("Usage: perf <start|stop|dump>")
+
+    def run_mem_command(self, subcommand: str, args: list) -> None:
+        """
+        Runs the memory diagnostics commands.
+
+        Args:
+            subcommand (str): One of "start", "snap", "diff", "top", "widgets", "trim" or "stop".
+            args (list): Snapshot labels for "diff" and "top", the frame count for "start".
+
+        Returns:
+            None
+        """
+        log = self.output()
+
+        def size(value: int) -> str:
+            return f"{value / 1024:+,.1f} KiB" if subcommand == "diff" else f"{value / 1024:,.1f} KiB"
+
+        def write_table(title: str, columns: list, rows: list) -> None:
+            table = Table(title=title, expand=True, box=box.ASCII, title_justify="left")
+            for column in columns:
+                table.add_column(column, justify="left" if column in ("module", "widget", "attribute") else "right")
+            for row in rows:
+                table.add_row(*row)
+            log.write(table)
+
+        match subcommand:
+            case "start":
+                memory_diagnostics.start(int(args[0]) if args else 1)
+                log.write("[+] Tracing allocations, take snapshots with: mem snap")
+            case "stop":
+                memory_diagnostics.stop()
+                log.write("[-] Stopped tracing allocations")
+            case "snap" | "diff" | "top" if not memory_diagnostics.is_tracing():
+                log.write("[!] Not tracing allocations, start with: mem start")
+            case "snap":
+                label = memory_diagnostics.snapshot()
+                log.write(f"[*] Snapshot {label} taken, RSS {memory_diagnostics.rss() / 2**20:.1f} MiB")
+            case "top":
+                if not memory_diagnostics.snapshots:
+                    memory_diagnostics.snapshot()
+                rows = memory_diagnostics.top(args[0] if args else None)
+                write_table("Traced memory by module", ["module", "size", "allocations"], [(module, size(bytes_), str(count)) for module, bytes_, count in rows])
+            case "diff":
+                if len(memory_diagnostics.snapshots) < 2 and not args:
+                    memory_diagnostics.snapshot()
+                if len(memory_diagnostics.snapshots) < 2:
+                    log.write("[!] Need two snapshots, take another with: mem snap")
+                    return
+                try:
+                    rows = memory_diagnostics.diff(*args[:2])
+                except KeyError as e:
+                    log.write(f"[!] Unknown snapshot {e}, known: {', '.join(memory_diagnostics.snapshots)}")
+                    return
+                write_table("Growth by module", ["module", "size", "allocations"], [(module, size(bytes_), f"{count:+}") for module, bytes_, count in rows])
+            case "widgets":
+                widgets = [*self.app.get_screen("htb_screen").walk_children(), self, *self.walk_children()]
+                rows = memory_diagnostics.widget_sizes(widgets)
+                write_table("Retained data by widget", ["widget", "attribute", "size"], [(widget, attribute, size(bytes_)) for widget, attribute, bytes_ in rows])
+                log.write(f"[*] RSS {memory_diagnostics.rss() / 2**20:.1f} MiB")
+            case "trim":
+                before = memory_diagnostics.rss()
+                evicted = sum(len(cache) for cache in metrics.caches.values())
+                for cache in metrics.caches.values():
+                    cache.clear()
+                self.search_results = None
+                gc.collect()
+                log.write(f"[*] Dropped {evicted} cached entries, RSS {before / 2**20:.1f} -> {memory_diagnostics.rss() / 2**20:.1f} MiB")
+            case _:
+                log.write("Usage: mem <start \\[frames]|snap|diff \\[a b]|top \\[snapshot]|widgets|trim|stop>")
+
+    def output(self):
+        """
+        Returns where the running command writes: its place in a chain, or the console log.
+        """
+        return console_output.get() or self.query_one(RichLog)
+
     def run_command(self, command: str) -> None:
         """
-        Executes the specified command.
+        Runs a console line in the background.
 
         Args:
-            command (str): The command to be executed.
+            command (str): The command, or a chain of commands separated by ";" and "&".
 
         Returns:
             None
         """
-        log = self.query_one(RichLog)
-        
-        cmds = command.split()
+        self.history.add(command)
+        self.run_worker(self.run_script(command), group="console")
+
+    async def run_script(self, line: str, depth: int = 0) -> None:
+        """
+        Runs the steps of a chain one after the other, and the commands of a step
+        concurrently, at most max_concurrent_commands at a time. `source` and `wait`
+        only wait on other work, so they do not count towards the limit.
+
+        Args:
+            line (str): The command chain.
+            depth (int): How many `source` commands deep this chain is.
+        """
+        steps = parse_script(line)
+        chained = depth > 0 or len(steps) > 1 or any(len(step) > 1 for step in steps)
+        for step in steps:
+            outputs = OrderedOutputs(self.output(), len(step))
+
+            async def run_step_command(index: int, cmds: list) -> None:
+                console_output.set(outputs[index])
+                try:
+                    if chained:
+                        outputs[index].write(f"[dim]> {escape(' '.join(cmds))}")
+                    if cmds[0] in self.unlimited_commands:
+                        # holding a permit here would starve the commands a nested
+                        # script runs, or block the console for a whole wait
+                        await self.execute(cmds, depth)
+                    else:
+                        async with self.command_semaphore:
+                            await self.execute(cmds, depth)
+                except Exception as e:
+                    outputs[index].write(f"[!] Error: {escape(str(e))}")
+                finally:
+                    outputs.finish(index)
+
+            await asyncio.gather(*(asyncio.create_task(run_step_command(index, cmds)) for index, cmds in enumerate(step)))
+
+    async def wait_active(self, args: list) -> None:
+        """
+        Waits until the active machine is up, e.g. after: start <id> ; wait active
+
+        Args:
+            args (list): An optional timeout in seconds.
+        """
+        log = self.output()
+        try:
+            timeout = float(args[0]) if args else self.wait_timeout
+        except ValueError:
+            log.write("Usage: wait active \\[seconds]")
+            return
+        active_machine = self.app.get_screen("htb_screen").query_one(ActiveMachine)
+        log.write(f"[+] Waiting up to {timeout:g}s for the active machine")
+        try:
+            machine = await active_machine.wait_until_running(timeout)
+        except asyncio.TimeoutError:
+            log.write(f"[!] The active machine is not up after {timeout:g}s")
+            return
+        log.write(f"[*] {machine['name']} is up at {machine['ip']}")
+
+    async def source(self, path: str, depth: int) -> None:
+        """
+        Runs a script file, one chain per line. Blank lines and lines starting with # are skipped.
+
+        Args:
+            path (str): The script file.
+            depth (int): How many `source` commands deep the caller is.
+        """
+        log = self.output()
+        if depth >= self.max_source_depth:
+            log.write(f"[!] Scripts nested more than {self.max_source_depth} deep")
+            return
+        try:
+            with open(os.path.expanduser(path)) as f:
+                lines = [line.strip() for line in f]
+        except OSError as e:
+            log.write(f"[!] Cannot read {escape(path)}: {escape(e.strerror or str(e))}")
+            return
+        for line in lines:
+            if line and not line.startswith("#"):
+                await self.run_script(line, depth + 1)
+
+    async def execute(self, cmds: list, depth: int = 0) -> None:
+        """
+        Executes a single command and waits for it to finish.
+
+        Args:
+            cmds (list): The command and its arguments.
+            depth (int): How many `source` commands deep the command is.
+
+        Returns:
+            None
+        """
+        log = self.output()
 
         match cmds[0]:
             case "help":
@@ -258,23 +817,56 @@ class ConsoleModal(ModalScreen):
                 if len(cmds) != 2:
                     log.write("Usage: reset <machine_id>")
                 else:
-                    self.run_worker(self.reset_machine(int(cmds[1])))
+                    await self.reset_machine(int(cmds[1]))
             case "start":
                 if len(cmds) != 2:
                     log.write("Usage: start <machine_id>")
                 else:
-                    self.run_worker(self.start_machine(int(cmds[1])))
+                    await self.start_machine(int(cmds[1]))
             case "stop":
                 if len(cmds) != 2:
                     log.write("Usage: stop <machine_id>")
                 else:
-                    self.run_worker(self.stop_machine(int(cmds[1])))
+                    await self.stop_machine(int(cmds[1]))
             case "refresh":
-                log.write("refresh")
+                targets = cmds[1:] or ["all"]
+                unknown = [target for target in targets if target not in self.command_tree["refresh"]]
+                if unknown:
+                    log.write(f"Usage: refresh \\[{'|'.join(self.command_tree['refresh'])}] ...")
+                else:
+                    await self.refresh_targets(targets)
+            case "wait":
+                if len(cmds) < 2 or cmds[1] != "active":
+                    log.write("Usage: wait active \\[seconds]")
+                else:
+                    await self.wait_active(cmds[2:])
+            case "source":
+                if len(cmds) != 2:
+                    log.write("Usage: source <file>")
+                else:
+                    await self.source(cmds[1], depth)
+            case "probe":
+                protocol = cmds[1] if len(cmds) > 1 and cmds[1] in ("tcp", "udp") else "tcp"
+                hosts = cmds[2:] if len(cmds) > 1 and cmds[1] in ("tcp", "udp") else cmds[1:]
+                await self.probe_vpn_servers(protocol, hosts)
+            case "perf":
+                self.run_perf_command(cmds[1] if len(cmds) > 1 else None)
+            case "mem":
+                self.run_mem_command(cmds[1] if len(cmds) > 1 else None, cmds[2:])
+            case "profile":
+                if len(cmds) != 2:
+                    log.write("Usage: profile <id|name>")
+                else:
+                    await self.show_profiles(cmds[1:])
+            case "compare":
+                if len(cmds) < 2:
+                    log.write("Usage: compare <id|name> [<id|name> ...]")
+                else:
+                    await self.show_profiles(cmds[1:])
             case "find":
                 if len(cmds) < 3 or len(cmds) > 3:
                     log.write("Usage: find <machines|users> <name>")
                 else:                     
-                    self.run_worker(self.fetch_search_results(cmds[1], cmds[2]))                  
+                    await self.fetch_search_results(cmds[1], cmds[2])
             case _:
                 log.write("[red]Invalid command")
\ No newline at end of file
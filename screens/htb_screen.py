@@ -1,12 +1,16 @@
+import asyncio
+import time
+
 from textual import on
 from textual.screen import Screen
-from textual.widgets import Header, TabbedContent, TabPane, Rule
+from textual.widgets import TabbedContent, TabPane, Rule
 from textual.containers import Container
 from textual.app import ComposeResult
 
-from widgets import PlayerStats, CurrentMachines, RetiredMachines, SeasonalMachines, VPNConnection, PlayerActivity, ActiveMachine, MachineDetails, OutputLog
-from messages import DebugMessage, DataReceived
+from widgets import DashboardHeader, PlayerStats, CurrentMachines, RecommendedMachines, RetiredMachines, SeasonalMachines, SeasonLeaderboard, VPNConnection, PlayerActivity, ActiveMachine, MachineDetails, OutputLog
+from messages import DebugMessage, LogMessage, DataReceived, MachineActionRequested, MachineStateChanged, MachineIPAssigned, MachineListUpdated, FlagSubmitted
 from enums import DebugLevel 
+from utilities import InvalidationGraph, htb_api, metrics, tracer
 
 
 class HTBScreen(Screen):    
@@ -39,6 +43,30 @@ class HTBScreen(Screen):
 
     CSS_PATH = "htb_screen.tcss"    
 
+    idle_prefetch_delay = 10
+    profile_prefetch_radius = 2
+    machine_tabs = {
+        "current_machines_tab": CurrentMachines,
+        "seasonal_machines_tab": SeasonalMachines,
+        "retired_machines_tab": RetiredMachines,
+        "recommended_machines_tab": RecommendedMachines,
+        "season_leaderboard_tab": SeasonLeaderboard,
+    }
+    # what each mutating action makes stale, refetched together after a short batching window
+    invalidation_edges = {
+        "own": ["profile", "season_rank", "activity", "active_machine", "machine:{machine_id}"],
+        "spawn": ["active_machine"],
+        "stop": ["active_machine"],
+        "reset": ["active_machine"],
+    }
+    invalidation_covers = {"profile": ["season_rank"]}
+    invalidation_window = 0.5
+    release_check_interval = 15 * 60
+    idle_release_check_interval = 60 * 60
+    reload_groups = {
+        "all": ["current", "seasonal", "retired", "profile", "activity", "active", "vpn"],
+        "machines": ["current", "seasonal", "retired"],
+    }
     
     def __init__(self) -> None:
         super().__init__()
@@ -46,6 +74,8 @@ class HTBScreen(Screen):
         self.has_active_machine = False
         self.active_machine_data = {}
         self.title = "::HTBtui::"
+        self.invalidations = InvalidationGraph(self.invalidation_edges, self.invalidation_covers)
+        self.reloads_in_flight = {}
 
 
     def compose(self) -> ComposeResult:
@@ -56,7 +86,7 @@ class HTBScreen(Screen):
             ComposeResult: The composed layout of the application.
         """
 
-        yield Header(show_clock=True)
+        yield DashboardHeader()
 
         with Container(id="player_information_container"):
             yield PlayerStats(id="player_stats")
@@ -75,11 +105,174 @@ class HTBScreen(Screen):
                     with TabPane("Retired Machines", id="retired_machines_tab"):
                         with Container(id="retired_machines_container"):
                             yield RetiredMachines()
+                    with TabPane("Recommended", id="recommended_machines_tab"):
+                        with Container(id="recommended_machines_container"):
+                            yield RecommendedMachines()
+                    with TabPane("Leaderboard", id="season_leaderboard_tab"):
+                        with Container(id="season_leaderboard_container"):
+                            yield SeasonLeaderboard()
             yield MachineDetails(id="machine_control")
         yield OutputLog(id="log")
         with Container(id="bottom_container"):
             yield VPNConnection()
             yield ActiveMachine(id="active_machine")
+
+    def on_mount(self) -> None:
+        """
+        Loads the visible machine tab and schedules the others for when the app is idle.
+        """
+        self.load_machine_tab(self.query_one(TabbedContent).active)
+        self.set_timer(self.idle_prefetch_delay, self.prefetch_machine_tabs)
+
+        self.invalidations.register("profile", self.query_one(PlayerStats).update_profile)
+        self.invalidations.register("season_rank", self.query_one(PlayerStats).refresh_season_rank)
+        self.invalidations.register("activity", self.query_one(PlayerActivity).update_activity)
+        self.invalidations.register("active_machine", self.query_one(ActiveMachine).revalidate)
+        self.invalidations.register("machine", self.refresh_machine)
+
+        self.app.scheduler.add(self, self.check_releases, self.release_check_interval, idle_interval=self.idle_release_check_interval)
+
+    async def check_releases(self) -> None:
+        """
+        Looks for new or newly released machines in the current and seasonal lists.
+        """
+        for table in (self.query_one(CurrentMachines), self.query_one(SeasonalMachines)):
+            try:
+                releases = await table.check_releases()
+            except Exception as e:
+                self.post_message(DebugMessage({"Release Check Error": f"Error: {e}"}, DebugLevel.LOW))
+                continue
+            for machine, reason in releases:
+                difficulty = machine.get("difficulty") or machine.get("difficulty_text")
+                text = f"{machine['name']} ({difficulty}, {machine['os']}) {'is out' if reason == 'new' else 'has been released'}"
+                self.post_message(LogMessage(f"[+] {text}"))
+                self.notify(text, title="New machine")
+
+    def invalidate(self, action: str, **params) -> None:
+        """
+        Marks what an action made stale and schedules the batch that refetches it.
+
+        Args:
+            action (str): The mutating action, a key of invalidation_edges.
+            **params: Values for the resource templates, e.g. machine_id.
+        """
+        if self.invalidations.invalidate(action, **params):
+            self.set_timer(self.invalidation_window, self.flush_invalidations)
+
+    def flush_invalidations(self) -> None:
+        self.run_worker(self.run_invalidations(), group="invalidation")
+
+    async def run_invalidations(self) -> None:
+        """
+        Refetches the pending resources concurrently and logs any that failed.
+        """
+        results = await self.invalidations.flush()
+        self.post_message(DebugMessage({"[+] Refreshed": {resource: f"{result:.0f} ms" if isinstance(result, float) else repr(result) for resource, result in results.items()}}, DebugLevel.MEDIUM))
+
+    def reload_targets(self) -> dict:
+        """
+        Returns the reload coroutine function of every target of the console `refresh` command.
+        """
+        return {
+            "current": lambda: self.reload_machine_table(self.query_one(CurrentMachines)),
+            "seasonal": lambda: self.reload_machine_table(self.query_one(SeasonalMachines)),
+            "retired": lambda: self.reload_machine_table(self.query_one(RetiredMachines)),
+            "profile": self.query_one(PlayerStats).update_profile,
+            "activity": self.query_one(PlayerActivity).update_activity,
+            "active": self.query_one(ActiveMachine).update_active_machine,
+            "vpn": self.query_one(VPNConnection).update_connection,
+        }
+
+    async def reload_machine_table(self, table):
+        """
+        Fetches a machine list again, loading it if its tab has not been opened yet.
+        """
+        table.loaded = True
+        if isinstance(table, SeasonalMachines):
+            await table.get_seasons_list()
+        return await table.update_machine_list()
+
+    async def reload(self, targets: list) -> dict:
+        """
+        Reloads the given targets concurrently, bypassing caches.
+
+        A target that is already being reloaded is joined instead of fetched again.
+
+        Args:
+            targets (list): Target or group names, see reload_targets and reload_groups.
+
+        Returns:
+            dict: Target name to (elapsed ms or exception, error string or None, joined).
+        """
+        names = list(dict.fromkeys(name for target in targets for name in self.reload_groups.get(target, [target])))
+        reloaders = self.reload_targets()
+        if any(name in self.reload_groups["machines"] for name in names):
+            machine_details = self.query_one(MachineDetails)
+            machine_details.profile_cache.clear()
+            machine_details.panel_cache.clear()
+
+        tasks = {}
+        for name in names:
+            task = self.reloads_in_flight.get(name)
+            joined = task is not None
+            if task is None:
+                task = asyncio.ensure_future(self.run_reload(reloaders[name]))
+                self.reloads_in_flight[name] = task
+                task.add_done_callback(lambda _, name=name: self.reloads_in_flight.pop(name, None))
+            tasks[name] = (task, joined)
+
+        results = await asyncio.gather(*(asyncio.shield(task) for task, _ in tasks.values()), return_exceptions=True)
+        return {
+            name: (result, None, joined) if isinstance(result, BaseException) else (*result, joined)
+            for (name, (_, joined)), result in zip(tasks.items(), results)
+        }
+
+    async def run_reload(self, reloader) -> tuple:
+        """
+        Returns:
+            tuple: The elapsed ms and the error string the reloader returned, if any.
+        """
+        start = time.perf_counter()
+        with htb_api.revalidate():
+            result = await reloader()
+        error = result if isinstance(result, str) and result.startswith("Error") else None
+        return (time.perf_counter() - start) * 1000, error
+
+    def load_machine_tab(self, tab_id: str) -> None:
+        """
+        Starts loading the machine list behind a tab, if it has not been loaded yet.
+
+        Args:
+            tab_id (str): The id of the TabPane.
+        """
+        if tab_id in self.machine_tabs:
+            self.query_one(self.machine_tabs[tab_id]).load()
+
+    def on_tabbed_content_tab_activated(self, event: TabbedContent.TabActivated) -> None:
+        """
+        Handles the event when a machine tab is activated.
+
+        Args:
+            event (TabbedContent.TabActivated): The tab activated event.
+
+        Returns:
+            None
+        """
+        self.load_machine_tab(event.tabbed_content.active)
+
+    def prefetch_machine_tabs(self) -> None:
+        """
+        Loads the remaining machine tabs once the visible widgets have finished loading.
+        """
+        active_tab = self.query_one(TabbedContent).active
+        self.load_machine_tab(active_tab)
+        visible = [self.query_one(PlayerStats), self.query_one(PlayerActivity), self.query_one(self.machine_tabs[active_tab])]
+        if any(widget.loading for widget in visible):
+            self.set_timer(self.idle_prefetch_delay, self.prefetch_machine_tabs)
+            return
+
+        for tab_id in self.machine_tabs:
+            self.load_machine_tab(tab_id)
     
     def on_data_table_row_selected(self, event) -> None:
         """
@@ -91,17 +284,59 @@ class HTBScreen(Screen):
         Returns:
             None
         """
-        if event.control.id == "current_machines" or event.control.id == "retired_machines":
+        self.show_machine_details(event.control, event.row_key.value)
+
+    def on_data_table_row_highlighted(self, event) -> None:
+        """
+        Handles the event when the cursor moves to a row in the data table. Shows the
+        machine details straight away and prefetches the profiles around the cursor.
+
+        Args:
+            event: The event object containing information about the highlighted row.
+
+        Returns:
+            None
+        """
+        if event.control.id not in ("current_machines", "retired_machines", "seasonal_machines", "recommended_machines"):
+            return
+
+        self.show_machine_details(event.control, event.row_key.value)
+
+        machine_ids = []
+        for distance in range(self.profile_prefetch_radius + 1):
+            for row in {event.cursor_row - distance, event.cursor_row + distance}:
+                if 0 <= row < event.control.row_count:
+                    key = event.control.ordered_rows[row].key.value
+                    if key is not None:
+                        machine_ids.append(int(key))
+        self.query_one(MachineDetails).prefetch_profiles(machine_ids)
+
+    def show_machine_details(self, table, row_key) -> None:
+        """
+        Shows the details of a machine row unless there is an active machine.
+
+        Args:
+            table: The machine DataTable the row belongs to.
+            row_key: The value of the row key.
+
+        Returns:
+            None
+        """
+        if row_key is None:
+            return
+
+        if table.id in ("current_machines", "retired_machines", "recommended_machines"):
             machine_details = self.query_one(MachineDetails)
             if not machine_details.has_active_machine():
-                machine_details.set_context(event.row_key.value, event.control.machine_data[int(event.row_key.value)])
+                machine_details.set_context(row_key, table.machine_data[int(row_key)])
 
-        if event.control.id == "seasonal_machines":
-            self.post_message(DebugMessage({"Seasonal Machines": event}, DebugLevel.LOW))
+        if table.id == "seasonal_machines":
+            self.post_message(DebugMessage({"Seasonal Machines": row_key}, DebugLevel.LOW))
             machine_details = self.query_one(MachineDetails)
             if not machine_details.has_active_machine():
-                if event.row_key.value in event.control.active_ids:
-                    machine_details.set_context(event.row_key.value, self.query_one("#current_machines").machine_data[int(event.row_key.value)])
+                current_machines = self.query_one("#current_machines").machine_data
+                if row_key in table.active_ids and int(row_key) in current_machines:
+                    machine_details.set_context(row_key, current_machines[int(row_key)])
                 else:
                     machine_details.clear_context()
     
@@ -116,12 +351,109 @@ class HTBScreen(Screen):
         Returns:
             None
         """
-        try:
-            machine_details = self.query_one(MachineDetails)
-            if message.key == "active_machine":
-                if isinstance(message.data, dict) and "id" in message.data:
-                    machine_details.active_machine_data = message.data if message.data["id"] else {}
-
+        metrics.inc("htbtui_messages_total", message="DataReceived")
+        tracer.complete("DataReceived queued", message.time, message.trace_id)
+        with tracer.span("HTBScreen.handle_data_received", message.trace_id):
             self.post_message(DebugMessage({"[!] Active Machine Data": message.data}, DebugLevel.HIGH))
+
+    @on(MachineActionRequested)
+    def handle_machine_action_requested(self, message: MachineActionRequested) -> None:
+        """
+        Hands an accepted spawn, stop or reset over to the active machine lifecycle.
+
+        Args:
+            message (MachineActionRequested): The machine action message.
+
+        Returns:
+            None
+        """
+        self.begin_machine_action(message.action, message.machine_id)
+
+    def begin_machine_action(self, action: str, machine_id: int) -> None:
+        """
+        Starts the lifecycle transition of an accepted spawn, stop or reset and
+        invalidates what it made stale.
+
+        Args:
+            action (str): One of "spawn", "stop" or "reset".
+            machine_id (int): The ID of the machine the action targets.
+        """
+        self.query_one(ActiveMachine).begin_transition(action, machine_id)
+        self.invalidate(action, machine_id=machine_id)
+
+    @on(MachineStateChanged)
+    def handle_machine_state_changed(self, message: MachineStateChanged) -> None:
+        """
+        Updates the machine controls from the active machine lifecycle.
+
+        Args:
+            message (MachineStateChanged): The machine state message.
+
+        Returns:
+            None
+        """
+        tracer.complete("MachineStateChanged queued", message.time, message.trace_id)
+        try:
+            with tracer.span("HTBScreen.handle_machine_state_changed", message.trace_id, state=message.state.value):
+                self.query_one(MachineDetails).apply_machine_state(message.state, message.machine_data, message.trace_id)
         except Exception as e:
-            self.post_message(DebugMessage({"Error": e}, DebugLevel.MEDIUM))
\ No newline at end of file
+            self.post_message(DebugMessage({"Error": e}, DebugLevel.MEDIUM))
+
+    @on(FlagSubmitted)
+    def handle_flag_submitted(self, message: FlagSubmitted) -> None:
+        """
+        Refreshes what the new own made stale.
+
+        Args:
+            message (FlagSubmitted): The flag submitted message.
+
+        Returns:
+            None
+        """
+        self.invalidate("own", machine_id=message.machine_id)
+
+    @on(MachineListUpdated)
+    def handle_machine_list_updated(self, message: MachineListUpdated) -> None:
+        """
+        Rescores the recommendations when a machine list they are made from is rebuilt.
+
+        Args:
+            message (MachineListUpdated): The machine list updated message.
+
+        Returns:
+            None
+        """
+        recommended_machines = self.query_one(RecommendedMachines)
+        if recommended_machines.loaded and message.table_id in ("current_machines", "retired_machines"):
+            recommended_machines.update_recommendations()
+
+    async def refresh_machine(self, machine_id: str) -> None:
+        """
+        Fetches a machine profile again and applies its owns to the machine tables and details.
+
+        Args:
+            machine_id (str): The ID of the machine.
+        """
+        machine_id = int(machine_id)
+        machine_details = self.query_one(MachineDetails)
+        profile = await machine_details.refresh_profile(machine_id)
+        if profile is None:
+            return
+
+        user_owned, root_owned = profile.get("authUserInUserOwns"), profile.get("authUserInRootOwns")
+        for table in (self.query_one(CurrentMachines), self.query_one(SeasonalMachines), self.query_one(RetiredMachines), self.query_one(RecommendedMachines)):
+            table.apply_owns(machine_id, user_owned, root_owned)
+        machine_details.apply_owns(machine_id, user_owned, root_owned)
+
+    @on(MachineIPAssigned)
+    def handle_machine_ip_assigned(self, message: MachineIPAssigned) -> None:
+        """
+        Notifies the user as soon as the active machine has an IP.
+
+        Args:
+            message (MachineIPAssigned): The IP assigned message.
+
+        Returns:
+            None
+        """
+        self.notify(f"{message.machine_data['name']} is up at {message.ip}")
\ No newline at end of file
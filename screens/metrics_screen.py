@@ -0,0 +1,255 @@
+import os
+import time
+
+from textual.screen import ModalScreen
+from textual.widgets import Static
+from textual.containers import Container, VerticalScroll
+from textual.worker import WorkerState
+from textual.app import ComposeResult
+
+from rich import box
+from rich.table import Table
+
+from utilities import data_dir, metrics
+
+
+class MetricsScreen(ModalScreen):
+    """
+    Modal screen that displays the runtime metrics collected in the metrics registry.
+    """
+
+    CSS_PATH = "metrics_screen.tcss"
+    BINDINGS = [("!", "close_metrics", "Dismiss Metrics"), ("e", "export_metrics", "Export Prometheus Textfile")]
+
+    refresh_interval = 1
+    idle_refresh_interval = 10
+    textfile_name = "htbtui.prom"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.message_counts = {}
+        self.message_rates = {}
+        self.last_sample = None
+
+    def compose(self) -> ComposeResult:
+        yield Container(
+            VerticalScroll(
+                Static(id="metrics_api"),
+                Static(id="metrics_caches"),
+                Static(id="metrics_renders"),
+                Static(id="metrics_runtime"),
+                id="metrics"
+            ),
+            Static("[b]e[/b] export Prometheus textfile  [b]![/b] close", id="metrics_footer"),
+            id="metrics_container"
+        )
+
+    def on_mount(self) -> None:
+        """
+        Event handler for when the screen is mounted.
+        """
+        self.refresh_metrics_timer = self.app.scheduler.add(self, self.refresh_metrics, self.refresh_interval, idle_interval=self.idle_refresh_interval)
+        self.refresh_metrics_timer.pause()
+
+    def on_screen_resume(self) -> None:
+        """
+        Event handler for when the screen is shown.
+        """
+        self.refresh_metrics()
+        self.refresh_metrics_timer.resume()
+
+    def on_screen_suspend(self) -> None:
+        """
+        Event handler for when the screen is hidden.
+        """
+        self.refresh_metrics_timer.pause()
+
+    def action_close_metrics(self) -> None:
+        """
+        Closes the metrics screen.
+        """
+        self.app.pop_screen()
+
+    def action_export_metrics(self) -> None:
+        """
+        Writes a Prometheus textfile snapshot to the data directory.
+        """
+        path = metrics.write_textfile(os.path.join(data_dir(), self.textfile_name))
+        self.notify(f"Metrics written to {path}", title="Metrics")
+
+    def refresh_metrics(self) -> None:
+        """
+        Re-renders all metric tables.
+        """
+        self.sample_message_rates()
+        self.query_one("#metrics_api", Static).update(self.make_api_table())
+        self.query_one("#metrics_caches", Static).update(self.make_cache_table())
+        self.query_one("#metrics_renders", Static).update(self.make_render_table())
+        self.query_one("#metrics_runtime", Static).update(self.make_runtime_table())
+
+    def sample_message_rates(self) -> None:
+        """
+        Computes messages per second for each message type since the previous sample.
+        """
+        now = time.monotonic()
+        counts = {
+            dict(labels)["message"]: value
+            for (name, labels), value in metrics.counters.items()
+            if name == "htbtui_messages_total"
+        }
+        if self.last_sample is not None and now > self.last_sample:
+            elapsed = now - self.last_sample
+            self.message_rates = {
+                message: (count - self.message_counts.get(message, 0)) / elapsed
+                for message, count in counts.items()
+            }
+        self.message_counts = counts
+        self.last_sample = now
+
+    def make_api_table(self) -> Table:
+        """
+        Makes the per-endpoint API table.
+
+        Returns:
+            Table: Requests, statuses, bytes, latency and coalesced requests per endpoint.
+        """
+        table = Table(title="API", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Endpoint", ratio=3)
+        table.add_column("Requests", justify="right")
+        table.add_column("Status", ratio=1)
+        table.add_column("Bytes", justify="right")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        table.add_column("Max ms", justify="right")
+        table.add_column("Coalesced", justify="right")
+        table.add_column("Errors", justify="right")
+
+        endpoints = {}
+        for (name, labels), value in metrics.counters.items():
+            labels = dict(labels)
+            if "endpoint" not in labels:
+                continue
+            row = endpoints.setdefault(labels["endpoint"], {"requests": 0, "status": {}, "bytes": 0, "coalesced": 0, "errors": 0})
+            match name:
+                case "htbtui_api_requests_total":
+                    row["requests"] += value
+                    row["status"][labels["status"]] = row["status"].get(labels["status"], 0) + value
+                case "htbtui_api_response_bytes_total":
+                    row["bytes"] += value
+                case "htbtui_api_coalesced_total":
+                    row["coalesced"] += value
+                case "htbtui_api_errors_total":
+                    row["errors"] += value
+
+        for endpoint, row in sorted(endpoints.items()):
+            histograms = [
+                histogram for (name, labels), histogram in metrics.histograms.items()
+                if name == "htbtui_api_request_duration_ms" and dict(labels).get("endpoint") == endpoint
+            ]
+            histogram = histograms[0] if len(histograms) == 1 else None
+            table.add_row(
+                endpoint,
+                str(row["requests"]),
+                " ".join(f"{status}×{count}" for status, count in sorted(row["status"].items())),
+                self.format_bytes(row["bytes"]),
+                self.format_ms(histogram.quantile(0.5) if histogram else None),
+                self.format_ms(histogram.quantile(0.95) if histogram else None),
+                self.format_ms(max((h.max for h in histograms), default=None)),
+                str(row["coalesced"]),
+                str(row["errors"])
+            )
+
+        return table
+
+    def make_cache_table(self) -> Table:
+        """
+        Makes the cache hit rate table.
+
+        Returns:
+            Table: Hits, misses, hit rate and size per registered cache.
+        """
+        table = Table(title="Caches", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Cache", ratio=3)
+        table.add_column("Hits", justify="right")
+        table.add_column("Misses", justify="right")
+        table.add_column("Hit rate", justify="right")
+        table.add_column("Size", justify="right")
+
+        for name, cache in sorted(metrics.caches.items()):
+            lookups = cache.hits + cache.misses
+            table.add_row(
+                name,
+                str(cache.hits),
+                str(cache.misses),
+                f"{cache.hits / lookups:.0%}" if lookups else "-",
+                str(len(cache))
+            )
+
+        return table
+
+    def make_render_table(self) -> Table:
+        """
+        Makes the per-widget render time table.
+
+        Returns:
+            Table: Render count and timings per handler.
+        """
+        table = Table(title="Renders", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Handler", ratio=3)
+        table.add_column("Count", justify="right")
+        table.add_column("Mean ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        table.add_column("Max ms", justify="right")
+
+        for (name, labels), histogram in sorted(metrics.histograms.items()):
+            if name != "htbtui_render_duration_ms":
+                continue
+            table.add_row(
+                dict(labels)["handler"],
+                str(histogram.count),
+                self.format_ms(histogram.mean),
+                self.format_ms(histogram.quantile(0.95)),
+                self.format_ms(histogram.max)
+            )
+
+        return table
+
+    def make_runtime_table(self) -> Table:
+        """
+        Makes the message bus and worker table.
+
+        Returns:
+            Table: Message totals and rates, and worker counts by state.
+        """
+        table = Table(title="Runtime", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Metric", ratio=3)
+        table.add_column("Total", justify="right")
+        table.add_column("Per second", justify="right")
+
+        for message, count in sorted(self.message_counts.items()):
+            table.add_row(message, str(count), f"{self.message_rates.get(message, 0):.1f}")
+
+        workers = list(self.app.workers)
+        for state in (WorkerState.RUNNING, WorkerState.PENDING):
+            count = sum(1 for worker in workers if worker.state is state)
+            metrics.set("htbtui_workers", count, state=state.name.lower())
+            table.add_row(f"Workers {state.name.lower()}", str(count), "")
+        lag = metrics.histograms.get(metrics.key("htbtui_loop_lag_ms", {}))
+        if lag is not None:
+            table.add_row("Loop lag p95 / max ms", f"{self.format_ms(lag.quantile(0.95))} / {self.format_ms(lag.max)}", "")
+        table.add_row("Loop stalls", str(metrics.counters.get(metrics.key("htbtui_loop_stalls_total", {}), 0)), "")
+        table.add_row("Uptime", f"{time.time() - metrics.started:.0f}s", "")
+
+        return table
+
+    @staticmethod
+    def format_ms(value: float) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    @staticmethod
+    def format_bytes(value: int) -> str:
+        for unit in ("B", "KiB", "MiB"):
+            if value < 1024:
+                return f"{value:.0f} {unit}"
+            value /= 1024
+        return f"{value:.1f} GiB"
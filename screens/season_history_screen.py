@@ -0,0 +1,182 @@
+import asyncio
+
+from textual.screen import ModalScreen
+from textual.widgets import Static
+from textual.containers import Container, VerticalScroll
+from textual.app import ComposeResult
+
+from rich import box
+from rich.table import Table
+
+from utilities import APIToken, SeasonHistory, htb_api, metrics
+from widgets import PlayerStats
+
+
+class SeasonHistoryScreen(ModalScreen):
+    """
+    Modal screen that shows my rank, league and points in every season.
+    """
+
+    CSS_PATH = "season_history_screen.tcss"
+    BINDINGS = [("@", "close_season_history", "Dismiss Season History")]
+
+    token_name = "HTB_TOKEN"
+    base_url = "https://labs.hackthebox.com"
+    endpoints = {
+        "info": "/api/v4/user/info",
+        "seasons_list": "/api/v4/season/list",
+        "season_rank": "/api/v4/season/user/rank/",
+    }
+    headers = {
+            "Authorization": f"Bearer {APIToken(token_name).get_token()}",
+            "Accept": "application/json, text/plain, */*",
+            "User-Agent": "HTBClient/1.0.0"
+        }
+    max_concurrent_requests = 4
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.history = SeasonHistory()
+        self.history.load()
+        self.errors = {}
+
+    def compose(self) -> ComposeResult:
+        yield Container(
+            VerticalScroll(
+                Static(id="season_history_table"),
+                id="season_history"
+            ),
+            Static("[b]@[/b] close", id="season_history_footer"),
+            id="season_history_container"
+        )
+
+    def on_screen_resume(self) -> None:
+        """
+        Event handler for when the screen is shown. Shows the cached seasons and fetches what is missing.
+        """
+        self.render_history()
+        self.run_worker(self.update_history(), exclusive=True)
+
+    def action_close_season_history(self) -> None:
+        """
+        Closes the season history screen.
+        """
+        self.app.pop_screen()
+
+    async def update_history(self) -> None:
+        """
+        Fetches the rank of the active season and of completed seasons not cached yet.
+
+        The season list is only fetched again when the active season known to
+        PlayerStats differs from the cached one, i.e. a season has ended.
+        """
+        player_stats = self.app.get_screen("htb_screen").query_one(PlayerStats)
+        user_id = player_stats.user_data["id"] or await player_stats.get_user_id()
+        if not isinstance(user_id, int):
+            self.errors = {"user": user_id}
+            self.render_history()
+            return
+        self.history.set_user(user_id)
+
+        active = self.history.active_season()
+        if active is None or active["id"] != player_stats.current_season["id"]:
+            seasons = await self.get_seasons_list()
+            if isinstance(seasons, str):
+                self.errors = {"seasons": seasons}
+                self.render_history()
+                return
+            self.history.set_seasons(seasons)
+
+        self.errors = {}
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        season_ids = self.history.missing()
+        results = await asyncio.gather(*(self.get_season_rank(season_id, semaphore) for season_id in season_ids))
+        for season_id, result in zip(season_ids, results):
+            if isinstance(result, str):
+                self.errors[season_id] = result
+            else:
+                self.history.put(season_id, result)
+        self.history.save()
+        self.render_history()
+
+    async def get_seasons_list(self):
+        """
+        Retrieves every season, past and active.
+
+        Returns:
+            list: The seasons, or an error string.
+        """
+        try:
+            response = await htb_api.get(self.base_url + self.endpoints["seasons_list"], headers=self.headers)
+            if response.status_code == 200:
+                return (await htb_api.json(response))["data"]
+            return f"Error: {response.status_code} - {response.text}"
+        except Exception as e:
+            return f"Error: {e}"
+
+    async def get_season_rank(self, season_id: int, semaphore: asyncio.Semaphore):
+        """
+        Retrieves my rank in one season, at most max_concurrent_requests at a time.
+
+        Returns:
+            dict: The rank data, None if I have no rank in the season, or an error string.
+        """
+        async with semaphore:
+            try:
+                response = await htb_api.get(self.base_url + self.endpoints["season_rank"] + str(season_id), headers=self.headers)
+                if response.status_code == 200:
+                    data = (await htb_api.json(response))["data"]
+                    metrics.inc("htbtui_season_rank_fetches_total")
+                    return {
+                        "league": data["league"],
+                        "rank": data["rank"],
+                        "total_ranks": data["total_ranks"],
+                        "total_season_points": data["total_season_points"],
+                        "flags": data["flags_to_next_rank"]["obtained"],
+                    }
+                if response.status_code in (400, 404):
+                    # not played, which will not change for a completed season
+                    return None
+                return f"Error: {response.status_code} - {response.text}"
+            except Exception as e:
+                return f"Error: {e}"
+
+    def render_history(self) -> None:
+        self.query_one("#season_history_table", Static).update(self.make_history_table())
+
+    def make_history_table(self) -> Table:
+        """
+        Makes the season history table.
+
+        Returns:
+            Table: League, rank, points and flags per season, newest first.
+        """
+        table = Table(title="Season History", expand=True, box=box.SIMPLE, title_justify="left")
+        table.add_column("Season", ratio=2)
+        table.add_column("League", ratio=1)
+        table.add_column("Rank", justify="right")
+        table.add_column("Points", justify="right")
+        table.add_column("Flags", justify="right")
+
+        for season in sorted(self.history.seasons, key=lambda season: season["id"], reverse=True):
+            name = f"[#9fef00]{season['name']}[/#9fef00]" if season["active"] else season["name"]
+            if season["id"] in self.errors:
+                table.add_row(name, f"[red]{self.errors[season['id']]}[/red]", "", "", "")
+                continue
+            rank = self.history.ranks.get(season["id"])
+            if rank is None:
+                table.add_row(name, "-" if season["id"] in self.history.ranks else "...", "", "", "")
+                continue
+            table.add_row(
+                name,
+                str(rank["league"]),
+                f"{rank['rank']}/{rank['total_ranks']}",
+                str(rank["total_season_points"]),
+                str(rank["flags"])
+            )
+
+        for key in ("user", "seasons"):
+            if key in self.errors:
+                table.caption = f"[red]{self.errors[key]}[/red]"
+
+        return table
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+from utilities import LatencyProbe, LatencyStats
+
+HOST = "127.0.0.1"
+
+
+def free_port(kind: int) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class OpenVPNServer(asyncio.DatagramProtocol):
+    """
+    Stand-in for an OpenVPN server: answers a client hard reset with a server
+    hard reset, or with `reply` if it is set. `replies=False` drops everything,
+    like a server with tls-auth.
+    """
+
+    def __init__(self, replies: bool = True, reply: bytes = None) -> None:
+        self.replies = replies
+        self.reply = reply
+        self.received = []
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data, addr) -> None:
+        self.received.append(data)
+        if not self.replies:
+            return
+        reply = self.reply
+        if reply is None:
+            # server hard reset / key id 0, own session id, ack of the client packet id 0
+            reply = bytes([LatencyProbe.P_CONTROL_HARD_RESET_SERVER_V2 << 3]) + os.urandom(8) + b"\x01\x00\x00\x00\x00" + data[1:9] + b"\x00\x00\x00\x00"
+        self.transport.sendto(reply, addr)
+
+
+async def start_udp(**kwargs) -> tuple:
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(lambda: OpenVPNServer(**kwargs), local_addr=(HOST, 0))
+    return transport, server, transport.get_extra_info("sockname")[1]
+
+
+def test_tcp_reachable_host():
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            probe = LatencyProbe(timeout=1)
+            latency = await probe.probe(HOST, port, "tcp")
+            ranking = await probe.run([(HOST, port)], rounds=3)
+        return latency, ranking
+
+    latency, ranking = asyncio.run(run())
+    assert latency is not None and latency >= 0
+    assert ranking[0]["samples"] == 4
+    assert ranking[0]["loss"] == 0
+
+
+def test_tcp_refused_port():
+    probe = LatencyProbe(timeout=1)
+    port = free_port(socket.SOCK_STREAM)
+    assert asyncio.run(probe.probe(HOST, port, "tcp")) is None
+    assert probe.stats[(HOST, port, "tcp")].loss == 1
+
+
+def test_udp_hard_reset_reply():
+    async def run():
+        transport, server, port = await start_udp()
+        try:
+            latency = await LatencyProbe(timeout=1).probe(HOST, port, "udp")
+        finally:
+            transport.close()
+        return latency, server.received
+
+    latency, received = asyncio.run(run())
+    assert latency is not None and latency >= 0
+    # the client sent a hard reset: opcode 7, key id 0, 8 byte session id, no acks, packet id 0
+    assert len(received) == 1
+    assert received[0][0] == LatencyProbe.P_CONTROL_HARD_RESET_CLIENT_V2 << 3
+    assert len(received[0]) == 14 and received[0][9:] == b"\x00" * 5
+
+
+def test_udp_ignores_replies_that_are_not_a_hard_reset():
+    async def run():
+        # P_ACK_V1 instead of the server hard reset
+        transport, _, port = await start_udp(reply=bytes([5 << 3]) + os.urandom(8))
+        try:
+            return await LatencyProbe(timeout=0.3).probe(HOST, port, "udp")
+        finally:
+            transport.close()
+
+    assert asyncio.run(run()) is None
+
+
+def test_udp_timeout():
+    async def run():
+        transport, server, port = await start_udp(replies=False)
+        probe = LatencyProbe(timeout=0.2)
+        try:
+            latency = await probe.probe(HOST, port, "udp")
+        finally:
+            transport.close()
+        return latency, server.received, probe.stats[(HOST, port, "udp")]
+
+    latency, received, stats = asyncio.run(run())
+    assert latency is None
+    assert len(received) == 1
+    assert stats.loss == 1 and not stats.samples
+
+
+def test_udp_refused_port():
+    probe = LatencyProbe(timeout=1)
+    port = free_port(socket.SOCK_DGRAM)
+    # the ICMP port unreachable comes back as an error on the socket
+    assert asyncio.run(probe.probe(HOST, port, "udp")) is None
+    assert probe.stats[(HOST, port, "udp")].loss == 1
+
+
+@pytest.mark.parametrize("data, expected", [
+    (bytes([8 << 3]) + bytes(8), True),
+    (bytes([8 << 3 | 2]) + bytes(12), True),
+    (bytes([7 << 3]) + bytes(12), False),
+    (bytes([8 << 3]) + bytes(4), False),
+    (b"", False),
+])
+def test_is_hard_reset_reply(data, expected):
+    assert LatencyProbe.is_hard_reset_reply(data) is expected
+
+
+def test_stats_rolling_window():
+    stats = LatencyStats(window=4)
+    assert stats.percentile(50) is None and stats.loss == 0.0
+    for latency in (10, 20, 30, 40, 50):
+        stats.add(latency)
+    # the oldest sample fell out of the window
+    assert list(stats.samples) == [20, 30, 40, 50]
+    assert stats.percentile(50) == 30
+    assert stats.percentile(90) == 50
+    assert stats.percentile(0) == 20
+
+    stats.add_failure()
+    stats.add_failure()
+    assert stats.loss == 0.5
+    stats.add(60)
+    assert stats.loss == 0.5
+    assert list(stats.samples) == [30, 40, 50, 60]
@@ -0,0 +1,66 @@
+import copy
+
+import numpy as np
+import pytest
+
+from utilities import MachineCatalogue, Recommender
+
+NOW = 1_700_000_000
+
+
+def make_machines(count: int = 40) -> dict:
+    rng = np.random.default_rng(7)
+    machines = {}
+    for i in range(count):
+        machines[100 + i] = {
+            "name": f"Box{i}",
+            "os": ["Linux", "Windows", "FreeBSD"][i % 3],
+            "difficulty": MachineCatalogue.difficulties[i % 4],
+            "points": 20,
+            "rating": float(rng.uniform(2, 5)),
+            "user_owns_count": int(rng.integers(0, 5000)),
+            "root_owns_count": int(rng.integers(0, 3000)),
+            "user_owned": False,
+            "root_owned": i % 7 == 0,
+            "release": f"20{18 + i % 6}-0{1 + i % 9}-15T17:00:00.000000Z",
+            # votes piled on one bucket, so the community difficulty spreads from 1 to 10
+            "feedbackForChart": {key: 50 if bucket == i % 10 else int(rng.integers(0, 3)) for bucket, key in enumerate(MachineCatalogue.feedback_keys)},
+        }
+    return machines
+
+
+def build(machines: dict) -> Recommender:
+    recommender = Recommender()
+    recommender.build(MachineCatalogue(machines), now=NOW)
+    return recommender
+
+
+@pytest.fixture(autouse=True)
+def default_weights(monkeypatch):
+    monkeypatch.delenv(Recommender.weights_env_var, raising=False)
+    monkeypatch.delenv(Recommender.difficulty_env_var, raising=False)
+
+
+def test_set_owned_matches_a_fresh_build():
+    machines = make_machines()
+    recommender = build(copy.deepcopy(machines))
+    # root owns of hard machines move the target difficulty up, then one is taken back
+    owns = [(108, True, True), (109, True, True), (119, True, True), (111, True, False), (109, False, False)]
+    for machine_id, user_owned, root_owned in owns:
+        assert recommender.set_owned(machine_id, user_owned, root_owned)
+        machines[machine_id]["user_owned"] = user_owned
+        machines[machine_id]["root_owned"] = root_owned
+
+    fresh = build(machines)
+    assert fresh.target != build(make_machines()).target
+    assert recommender.target == pytest.approx(fresh.target)
+    np.testing.assert_allclose(recommender.matrix, fresh.matrix)
+    np.testing.assert_allclose(recommender.scores, fresh.scores)
+    top, fresh_top = recommender.top(10), fresh.top(10)
+    assert [(machine_id, reason) for machine_id, _, reason in top] == [(machine_id, reason) for machine_id, _, reason in fresh_top]
+    assert [score for _, score, _ in top] == pytest.approx([score for _, score, _ in fresh_top])
+
+
+def test_set_owned_ignores_unknown_machines():
+    recommender = build(make_machines(5))
+    assert not recommender.set_owned(999, True, True)
@@ -1 +1,24 @@
-from .api_token import APIToken
\ No newline at end of file
+from .api_token import APIToken
+from .app_dirs import data_dir
+from .catalogue import MachineCatalogue
+from .console_history import ConsoleHistory
+from .console_script import CommandOutput, OrderedOutputs, console_output, parse_script
+from .flag_queue import FlagQueue
+from .htb_api import HTBApi, htb_api
+from .invalidation import InvalidationGraph
+from .latency_probe import LatencyProbe, LatencyStats
+from .loop_watchdog import LoopWatchdog
+from .lru_cache import LRUCache
+from .machine_lifecycle import MachineLifecycle
+from .memory_budget import MemoryBudget, memory_budget
+from .memory_diagnostics import MemoryDiagnostics, memory_diagnostics
+from .metrics import MetricsRegistry, metrics
+from .poll_scheduler import PollJob, PollScheduler
+from .profiling import Profiler, profiler
+from .recommender import Recommender
+from .release_diff import diff_releases
+from .season_history import SeasonHistory
+from .snapshot import Snapshot
+from .timeseries import TimeSeriesStore
+from .tracing import Tracer, tracer
+from .tun_monitor import TunMonitor
\ No newline at end of file
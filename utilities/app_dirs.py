@@ -0,0 +1,15 @@
+import os
+
+
+def data_dir() -> str:
+    """
+    Returns the directory HTBtui keeps its local state in, creating it if needed.
+
+    Uses $HTBTUI_DATA_DIR if set, otherwise $XDG_STATE_HOME/htbtui (~/.local/state/htbtui).
+    """
+    path = os.environ.get("HTBTUI_DATA_DIR")
+    if not path:
+        state_home = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+        path = os.path.join(state_home, "htbtui")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,151 @@
+import time
+
+import numpy as np
+
+
+class MachineCatalogue:
+    """
+    Columnar copy of the machine catalogue, one NumPy array per field.
+
+    Built from the machine_data dicts of the machine tables, so the analytics
+    only walk the Python records once and every statistic after that is a few
+    array operations, whatever the size of the catalogue.
+    """
+
+    difficulties = ["Easy", "Medium", "Hard", "Insane"]
+    # the 10 difficulty vote buckets of feedbackForChart, easiest first
+    feedback_keys = [
+        "counterCake", "counterVeryEasy", "counterEasy", "counterTooEasy", "counterMedium",
+        "counterBitHard", "counterHard", "counterTooHard", "counterExHard", "counterBrainFuck"
+    ]
+
+    def __init__(self, machines: dict = None) -> None:
+        """
+        Args:
+            machines (dict): Machine id to machine data, as kept by CurrentMachines and RetiredMachines.
+        """
+        self.build(machines or {})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, machines: dict) -> None:
+        """
+        Rebuilds the columns from machine data.
+        """
+        records = list(machines.values())
+        self.ids = np.fromiter((int(id) for id in machines), dtype=np.int64, count=len(records))
+        self.names = [machine["name"] for machine in records]
+        self.os_names = sorted({machine["os"] or "Unknown" for machine in records})
+        os_index = {name: index for index, name in enumerate(self.os_names)}
+        self.os = np.fromiter((os_index[machine["os"] or "Unknown"] for machine in records), dtype=np.int8, count=len(records))
+        difficulty_index = {name: index for index, name in enumerate(self.difficulties)}
+        # -1 for difficulties outside the four official ones
+        self.difficulty = np.fromiter((difficulty_index.get(machine["difficulty"], -1) for machine in records), dtype=np.int8, count=len(records))
+        self.points = np.fromiter((machine["points"] or 0 for machine in records), dtype=np.float64, count=len(records))
+        self.rating = np.fromiter((float(machine["rating"] or 0) for machine in records), dtype=np.float64, count=len(records))
+        self.user_owns = np.fromiter((machine["user_owns_count"] or 0 for machine in records), dtype=np.float64, count=len(records))
+        self.root_owns = np.fromiter((machine["root_owns_count"] or 0 for machine in records), dtype=np.float64, count=len(records))
+        self.user_owned = np.fromiter((bool(machine["user_owned"]) for machine in records), dtype=bool, count=len(records))
+        self.root_owned = np.fromiter((bool(machine["root_owned"]) for machine in records), dtype=bool, count=len(records))
+        self.release = self.parse_releases([machine["release"] for machine in records])
+        self.feedback = np.array(
+            [[(machine["feedbackForChart"] or {}).get(key, 0) for key in self.feedback_keys] for machine in records],
+            dtype=np.float64
+        ).reshape(len(records), len(self.feedback_keys))
+
+    @staticmethod
+    def parse_releases(releases: list) -> np.ndarray:
+        """
+        Returns release dates ("2024-01-20T17:00:00.000000Z") as POSIX timestamps, NaN where missing.
+        """
+        # the seconds resolution prefix parses in one vectorized call
+        dates = np.array([release[:19] if release else "NaT" for release in releases], dtype="datetime64[s]")
+        timestamps = dates.astype(np.int64).astype(np.float64)
+        timestamps[np.isnat(dates)] = np.nan
+        return timestamps
+
+    def community_difficulty(self) -> np.ndarray:
+        """
+        Returns the mean community vote of each machine on a 1 to 10 scale, NaN without votes.
+        """
+        votes = self.feedback.sum(axis=1)
+        weighted = self.feedback @ np.arange(1, len(self.feedback_keys) + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(votes > 0, weighted / votes, np.nan)
+
+    def difficulty_comparison(self) -> list:
+        """
+        Compares community rated difficulty with the official difficulty.
+
+        Returns:
+            list: (difficulty, machines, mean, p25, p75, votes) per official
+                difficulty, the statistics being over the community difficulty.
+        """
+        community = self.community_difficulty()
+        votes = self.feedback.sum(axis=1)
+        rows = []
+        for index, name in enumerate(self.difficulties):
+            mask = (self.difficulty == index) & ~np.isnan(community)
+            if not mask.any():
+                rows.append((name, int((self.difficulty == index).sum()), None, None, None, 0))
+                continue
+            p25, p75 = np.percentile(community[mask], [25, 75])
+            rows.append((name, int((self.difficulty == index).sum()), float(community[mask].mean()), float(p25), float(p75), int(votes[mask].sum())))
+        return rows
+
+    def owns_per_day(self, now: float = None) -> np.ndarray:
+        """
+        Returns the user owns per day since release of each machine, NaN without a release date.
+        """
+        now = now or time.time()
+        days = np.maximum((now - self.release) / 86400, 1)
+        return self.user_owns / days
+
+    def most_owned_per_day(self, count: int = 10, now: float = None) -> list:
+        """
+        Returns the machines owned the fastest.
+
+        Returns:
+            list: (name, difficulty, owns per day) tuples, fastest first.
+        """
+        rates = self.owns_per_day(now)
+        order = np.argsort(np.nan_to_num(rates, nan=-1))[::-1][:count]
+        return [(self.names[i], self.difficulty_name(self.difficulty[i]), float(rates[i])) for i in order if not np.isnan(rates[i])]
+
+    def completion(self, by: str) -> list:
+        """
+        Returns my completion grouped by OS or official difficulty.
+
+        Args:
+            by (str): "os" or "difficulty".
+
+        Returns:
+            list: (group, machines, user owned, root owned) tuples.
+        """
+        if by == "os":
+            codes, names = self.os, self.os_names
+        else:
+            codes, names = self.difficulty, self.difficulties
+        known = codes >= 0
+        return self.group_counts(codes[known].astype(np.int64), names, self.user_owned[known], self.root_owned[known])
+
+    @staticmethod
+    def group_counts(codes: np.ndarray, names: list, user_owned: np.ndarray, root_owned: np.ndarray) -> list:
+        totals = np.bincount(codes, minlength=len(names))
+        users = np.bincount(codes, weights=user_owned, minlength=len(names))
+        roots = np.bincount(codes, weights=root_owned, minlength=len(names))
+        return [(name, int(total), int(user), int(root)) for name, total, user, root in zip(names, totals, users, roots) if total]
+
+    def rating_distribution(self, bins: int = 10) -> list:
+        """
+        Returns the histogram of machine ratings over 0 to 5 stars.
+
+        Returns:
+            list: (low, high, machines) per bin.
+        """
+        counts, edges = np.histogram(self.rating, bins=bins, range=(0, 5))
+        return [(float(low), float(high), int(count)) for low, high, count in zip(edges[:-1], edges[1:], counts)]
+
+    def difficulty_name(self, code: int) -> str:
+        return self.difficulties[code] if code >= 0 else "Unknown"
@@ -0,0 +1,87 @@
+import os
+
+from .app_dirs import data_dir
+
+
+class ConsoleHistory:
+    """
+    Console command history, kept in a plain text file with one command per line.
+
+    Commands are appended as they are entered, and the file is compacted to the
+    most recent `max_entries` when it is loaded.
+    """
+
+    file_name = "console_history"
+    max_entries = 500
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.path.join(data_dir(), self.file_name)
+        self.entries = []
+        self.position = 0
+
+    def load(self) -> list:
+        """
+        Loads the history from disk, ignoring a missing or unreadable file.
+
+        Returns:
+            list: The commands, oldest first.
+        """
+        try:
+            with open(self.path) as f:
+                lines = [line.rstrip("\n") for line in f if line.strip()]
+        except OSError:
+            lines = []
+        self.entries = lines[-self.max_entries:]
+        self.position = len(self.entries)
+        if len(lines) > self.max_entries:
+            self.rewrite()
+        return self.entries
+
+    def rewrite(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.writelines(entry + "\n" for entry in self.entries)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def add(self, command: str) -> None:
+        """
+        Appends a command, unless it repeats the previous one.
+        """
+        command = command.strip()
+        self.position = len(self.entries)
+        if not command or (self.entries and self.entries[-1] == command):
+            return
+        self.entries.append(command)
+        self.position = len(self.entries)
+        try:
+            with open(self.path, "a") as f:
+                f.write(command + "\n")
+        except OSError:
+            pass
+
+    def previous(self) -> str:
+        """
+        Moves back through the history.
+
+        Returns:
+            str: The command, or None at the start of the history.
+        """
+        if self.position == 0:
+            return None
+        self.position -= 1
+        return self.entries[self.position]
+
+    def next(self) -> str:
+        """
+        Moves forward through the history.
+
+        Returns:
+            str: The command, or "" past the most recent one.
+        """
+        if self.position >= len(self.entries):
+            return ""
+        self.position += 1
+        return self.entries[self.position] if self.position < len(self.entries) else ""
@@ -0,0 +1,83 @@
+from contextvars import ContextVar
+
+
+# where console commands write, set per command while a chain runs
+console_output = ContextVar("htbtui_console_output", default=None)
+
+
+def parse_script(line: str) -> list:
+    """
+    Parses a console line into steps of concurrent commands.
+
+    `;` separates steps that run one after the other, `&` separates commands of
+    a step that run at the same time:
+
+        find machines lame & find users ippsec ; start 1 ; wait active
+
+    Returns:
+        list: Steps, each a list of commands, each a list of arguments.
+    """
+    steps = []
+    for step in line.split(";"):
+        commands = [command.split() for command in step.split("&")]
+        commands = [command for command in commands if command]
+        if commands:
+            steps.append(commands)
+    return steps
+
+
+class CommandOutput:
+    """
+    Console output of one command in a step.
+
+    Commands of a step run concurrently but their output is kept in command
+    order: only one output is live at a time and writes to the others are held
+    back until it is their turn.
+    """
+
+    def __init__(self, target) -> None:
+        """
+        Args:
+            target: The RichLog, or the output of the command that started this one.
+        """
+        self.target = target
+        self.buffer = []
+        self.live = False
+        self.done = False
+
+    def write(self, content, *args, **kwargs) -> None:
+        if self.live:
+            self.target.write(content, *args, **kwargs)
+        else:
+            self.buffer.append((content, args, kwargs))
+
+    def clear(self) -> None:
+        self.target.clear()
+
+    def go_live(self) -> None:
+        self.live = True
+        for content, args, kwargs in self.buffer:
+            self.target.write(content, *args, **kwargs)
+        self.buffer.clear()
+
+
+class OrderedOutputs:
+    """
+    The outputs of a step, handing over to the next command as each one finishes.
+    """
+
+    def __init__(self, target, count: int) -> None:
+        self.outputs = [CommandOutput(target) for _ in range(count)]
+        self.position = 0
+        if self.outputs:
+            self.outputs[0].go_live()
+
+    def __getitem__(self, index: int) -> CommandOutput:
+        return self.outputs[index]
+
+    def finish(self, index: int) -> None:
+        self.outputs[index].done = True
+        while self.position < len(self.outputs) and self.outputs[self.position].done:
+            self.position += 1
+            if self.position < len(self.outputs):
+                self.outputs[self.position].go_live()
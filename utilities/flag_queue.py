@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+
+from .app_dirs import data_dir
+
+
+class FlagQueue:
+    """
+    Durable queue of flag submissions.
+
+    Flags are checked locally before anything is sent, duplicates of a pending
+    or already accepted flag are refused, and submissions that fail for a
+    transient reason (network errors, rate limits, server errors) are retried
+    with exponential backoff. The queue is written to disk after every change
+    so pending flags survive a restart. Accepted flags are only remembered as
+    hashes.
+    """
+
+    file_name = "flag_queue.json"
+    version = 1
+    flag_pattern = re.compile(r"[0-9a-f]{32}")
+    retry_statuses = {408, 425, 429}
+    backoff_base = 2
+    backoff_max = 300
+    accepted_history = 500
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.path.join(data_dir(), self.file_name)
+        self.pending = []
+        self.accepted = deque(maxlen=self.accepted_history)
+
+    @classmethod
+    def normalize(cls, flag: str) -> str:
+        """
+        Returns the flag in canonical form, or None if it is not a valid flag.
+        """
+        flag = flag.strip().lower()
+        return flag if cls.flag_pattern.fullmatch(flag) else None
+
+    @staticmethod
+    def flag_hash(machine_id, flag: str) -> str:
+        return hashlib.sha256(f"{machine_id}:{flag}".encode()).hexdigest()
+
+    def load(self) -> list:
+        """
+        Loads pending submissions from disk, ignoring missing or unreadable files.
+
+        Returns:
+            list: The pending submissions.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.pending = data.get("pending", [])
+                self.accepted.extend(data.get("accepted", []))
+        except (OSError, ValueError, AttributeError):
+            self.pending = []
+        return self.pending
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.version, "pending": self.pending, "accepted": list(self.accepted)}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def add(self, machine_id: int, flag: str, arena: bool = False) -> tuple:
+        """
+        Validates a flag and queues it for submission.
+
+        Args:
+            machine_id (int): The ID of the machine the flag is for.
+            flag (str): The flag as entered.
+            arena (bool): Whether the flag is for the seasonal arena machine.
+
+        Returns:
+            tuple: The queued entry and None, or None and the reason it was refused.
+        """
+        normalized = self.normalize(flag)
+        if normalized is None:
+            return None, "Invalid flag format, expected 32 hexadecimal characters"
+        key = self.flag_hash(machine_id, normalized)
+        if key in self.accepted:
+            return None, "Flag already accepted for this machine"
+        if any(entry["key"] == key for entry in self.pending):
+            return None, "Flag already queued for this machine"
+
+        entry = {
+            "key": key,
+            "machine_id": machine_id,
+            "flag": normalized,
+            "arena": arena,
+            "attempts": 0,
+            "next_attempt": time.time(),
+            "last_error": None,
+        }
+        self.pending.append(entry)
+        self.save()
+        return entry, None
+
+    def due(self) -> list:
+        now = time.time()
+        return [entry for entry in self.pending if entry["next_attempt"] <= now]
+
+    def next_due_in(self) -> float:
+        """
+        Returns the seconds until the next retry, or None if nothing is pending.
+        """
+        if not self.pending:
+            return None
+        return max(0.0, min(entry["next_attempt"] for entry in self.pending) - time.time())
+
+    def retry_delay(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def complete(self, entry: dict, status_code: int, data) -> str:
+        """
+        Records the result of a submission attempt.
+
+        Args:
+            entry (dict): The queued entry.
+            status_code (int): The response status, None if the request failed.
+            data: The response data or error.
+
+        Returns:
+            str: "accepted", "rejected" or "retry".
+        """
+        if status_code is None or status_code in self.retry_statuses or status_code >= 500:
+            entry["attempts"] += 1
+            entry["next_attempt"] = time.time() + self.retry_delay(entry["attempts"])
+            entry["last_error"] = str(data)
+            self.save()
+            return "retry"
+
+        if entry in self.pending:
+            self.pending.remove(entry)
+        outcome = "accepted" if status_code == 200 else "rejected"
+        if outcome == "accepted":
+            self.accepted.append(entry["key"])
+        self.save()
+        return outcome
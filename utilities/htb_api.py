@@ -0,0 +1,175 @@
+import asyncio
+import contextvars
+import hashlib
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from .metrics import metrics
+from .tracing import tracer
+
+
+# set while a forced reload runs, see HTBApi.revalidate
+revalidating = contextvars.ContextVar("htbtui_revalidating", default=False)
+
+
+class HTBApi:
+    """
+    Shared HTTP client for the HTB API.
+
+    Every widget goes through the same connection pool, so requests reuse
+    keep-alive connections, are recorded in the metrics registry, and identical
+    GETs that are already in flight are coalesced into a single request.
+
+    `session()` stands in for `httpx.AsyncClient()` at the call sites:
+
+        async with htb_api.session() as client:
+            response = await client.get(self.base_url + self.endpoint, headers=self.headers)
+    """
+
+    timeout = 15.0
+    # bodies above this size are decoded in a worker thread to keep the UI responsive
+    json_thread_threshold = 64 * 1024
+
+    def __init__(self) -> None:
+        self.client: httpx.AsyncClient = None
+        self.transport = None
+        self.in_flight = {}
+        # url -> (ETag, Last-Modified, body digest) of the last full response, see get_if_changed
+        self.validators = {}
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        return self.client
+
+    def session(self) -> "HTBApiSession":
+        return HTBApiSession(self)
+
+    @contextmanager
+    def revalidate(self):
+        """
+        Makes the GETs sent from this context skip caches.
+
+        They carry Cache-Control: no-cache and do not join requests that were
+        already in flight before, only each other.
+        """
+        token = revalidating.set(True)
+        try:
+            yield
+        finally:
+            revalidating.reset(token)
+
+    @staticmethod
+    def endpoint_name(url: str) -> str:
+        """
+        Returns the URL path with numeric ids replaced, e.g. /api/v4/profile/{id}.
+        """
+        return re.sub(r"/\d+(?=/|$)", "/{id}", urlsplit(url).path)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        endpoint = self.endpoint_name(url)
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"{method} {endpoint}"):
+                response = await self.get_client().request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            metrics.inc("htbtui_api_errors_total", endpoint=endpoint, method=method, error=type(e).__name__)
+            raise
+
+        metrics.inc("htbtui_api_requests_total", endpoint=endpoint, method=method, status=response.status_code)
+        metrics.inc("htbtui_api_response_bytes_total", len(response.content), endpoint=endpoint, method=method)
+        metrics.observe("htbtui_api_request_duration_ms", (time.perf_counter() - start) * 1000, endpoint=endpoint, method=method)
+        return response
+
+    async def get(self, url: str, headers: dict = None, **kwargs) -> httpx.Response:
+        """
+        Sends a GET request, joining an identical request that is already in flight.
+        """
+        if revalidating.get():
+            headers = {**(headers or {}), "Cache-Control": "no-cache"}
+        key = (url, tuple(sorted((headers or {}).items())))
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            metrics.inc("htbtui_api_coalesced_total", endpoint=self.endpoint_name(url))
+            return await asyncio.shield(pending)
+
+        pending = asyncio.ensure_future(self.request("GET", url, headers=headers, **kwargs))
+        self.in_flight[key] = pending
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            if self.in_flight.get(key) is pending:
+                del self.in_flight[key]
+
+    async def get_if_changed(self, url: str, headers: dict = None, **kwargs) -> httpx.Response:
+        """
+        Sends a conditional GET that only returns a response when the resource changed.
+
+        The ETag and Last-Modified of the previous response are sent back as
+        If-None-Match and If-Modified-Since, so an unchanged resource costs a
+        bodyless 304. Servers that send neither still have the body compared
+        with the previous one, so callers never parse an unchanged payload.
+
+        Returns:
+            httpx.Response: The response, or None if the resource has not changed.
+        """
+        etag, last_modified, digest = self.validators.get(url, (None, None, None))
+        headers = dict(headers or {})
+        if not revalidating.get():
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = await self.get(url, headers=headers, **kwargs)
+        endpoint = self.endpoint_name(url)
+        if response.status_code == 304:
+            metrics.inc("htbtui_api_not_modified_total", endpoint=endpoint)
+            return None
+        if response.status_code != 200:
+            return response
+
+        new_digest = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        self.validators[url] = (response.headers.get("ETag"), response.headers.get("Last-Modified"), new_digest)
+        if new_digest == digest:
+            metrics.inc("htbtui_api_not_modified_total", endpoint=endpoint)
+            return None
+        return response
+
+    async def json(self, response: httpx.Response):
+        """
+        Decodes a JSON response body, in a worker thread if it is large.
+        """
+        if len(response.content) < self.json_thread_threshold:
+            return response.json()
+        return await asyncio.to_thread(response.json)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class HTBApiSession:
+    """
+    Async context manager handing out the shared client without closing its pool.
+    """
+
+    def __init__(self, api: HTBApi) -> None:
+        self.api = api
+
+    async def __aenter__(self) -> HTBApi:
+        return self.api
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+
+htb_api = HTBApi()
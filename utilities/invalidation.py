@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from .metrics import metrics
+
+
+class InvalidationGraph:
+    """
+    Maps mutating actions to the cached resources they make stale.
+
+    Resources are names such as "activity" or, for one item, "machine:580".
+    Each resource kind has a refresher, a coroutine function that is passed
+    the item id if the resource has one. Invalidating an action only marks its
+    resources pending; `flush` then refetches exactly those, once each and
+    concurrently, so a burst of actions costs one batch of requests.
+    """
+
+    def __init__(self, edges: dict, covers: dict = None) -> None:
+        """
+        Args:
+            edges (dict): Action name to resource templates, e.g. {"own": ["activity", "machine:{machine_id}"]}.
+            covers (dict): Resource kind to the kinds its refresh already includes.
+        """
+        self.edges = edges
+        self.covers = covers or {}
+        self.refreshers = {}
+        self.pending = set()
+
+    def register(self, kind: str, refresher) -> None:
+        self.refreshers[kind] = refresher
+
+    def resources(self, action: str, **params) -> list:
+        """
+        Returns the resources an action invalidates, skipping items whose id is unknown.
+        """
+        params = {name: value for name, value in params.items() if value is not None}
+        resources = []
+        for template in self.edges.get(action, []):
+            try:
+                resources.append(template.format(**params))
+            except KeyError:
+                continue
+        return resources
+
+    def invalidate(self, action: str, **params) -> bool:
+        """
+        Marks the resources of an action pending.
+
+        Returns:
+            bool: True if this started a new batch, i.e. a flush should be scheduled.
+        """
+        new_batch = not self.pending
+        self.pending.update(self.resources(action, **params))
+        return new_batch and bool(self.pending)
+
+    def take_batch(self) -> list:
+        """
+        Returns the pending resources, without those covered by another pending refresh.
+        """
+        batch, self.pending = self.pending, set()
+        kinds = {resource.partition(":")[0] for resource in batch}
+        covered = {kind for pending_kind in kinds for kind in self.covers.get(pending_kind, ())}
+        return sorted(resource for resource in batch if resource.partition(":")[0] not in covered)
+
+    async def flush(self) -> dict:
+        """
+        Refreshes every pending resource concurrently.
+
+        Returns:
+            dict: Resource name to refresh time in ms, or the exception it raised.
+        """
+        batch = self.take_batch()
+        results = await asyncio.gather(*(self.refresh(resource) for resource in batch), return_exceptions=True)
+        return dict(zip(batch, results))
+
+    async def refresh(self, resource: str) -> float:
+        kind, _, item = resource.partition(":")
+        refresher = self.refreshers.get(kind)
+        if refresher is None:
+            raise KeyError(f"No refresher registered for {kind}")
+        start = time.perf_counter()
+        await (refresher(item) if item else refresher())
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics.observe("htbtui_invalidation_refresh_ms", elapsed, resource=kind)
+        return elapsed
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import os
+import socket
+import time
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Rolling window of latency samples for one probe target.
+    """
+
+    def __init__(self, window: int = 50) -> None:
+        self.samples = deque(maxlen=window)
+        self.failures = deque(maxlen=window)
+
+    def add(self, latency_ms: float) -> None:
+        self.samples.append(latency_ms)
+        self.failures.append(False)
+
+    def add_failure(self) -> None:
+        self.failures.append(True)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the nearest-rank percentile of the samples, or None without samples.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    @property
+    def loss(self) -> float:
+        """
+        Returns the share of failed probes in the window, between 0 and 1.
+        """
+        if not self.failures:
+            return 0.0
+        return sum(self.failures) / len(self.failures)
+
+
+class LatencyProbe:
+    """
+    Measures handshake latency to VPN servers concurrently.
+
+    TCP probes time the three-way handshake of a plain connect. UDP probes send an
+    OpenVPN P_CONTROL_HARD_RESET_CLIENT_V2 and time the first
+    P_CONTROL_HARD_RESET_SERVER_V2 coming back; servers that require tls-auth
+    silently drop it, which shows up as loss.
+
+    Name resolution happens before the timer starts, every probe is bounded by
+    `timeout` and at most `concurrency` probes are in flight at a time.
+    """
+
+    # OpenVPN opcodes, in the top five bits of the first byte of a packet
+    P_CONTROL_HARD_RESET_CLIENT_V2 = 7
+    P_CONTROL_HARD_RESET_SERVER_V2 = 8
+
+    def __init__(self, timeout: float = 2.0, concurrency: int = 8, window: int = 50) -> None:
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.window = window
+        self.stats = {}
+
+    async def resolve(self, host: str, port: int, protocol: str) -> tuple:
+        loop = asyncio.get_running_loop()
+        kind = socket.SOCK_DGRAM if protocol == "udp" else socket.SOCK_STREAM
+        addresses = await asyncio.wait_for(loop.getaddrinfo(host, port, family=socket.AF_INET, type=kind), self.timeout)
+        return addresses[0][4]
+
+    async def probe_tcp(self, address: tuple) -> float:
+        """
+        Returns the TCP connect time to the address in milliseconds.
+        """
+        start = time.perf_counter()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(*address), self.timeout)
+        latency = (time.perf_counter() - start) * 1000
+        writer.close()
+        return latency
+
+    @classmethod
+    def hard_reset_packet(cls) -> bytes:
+        # opcode / key id 0, session id, empty ack array, packet id 0
+        return bytes([cls.P_CONTROL_HARD_RESET_CLIENT_V2 << 3]) + os.urandom(8) + b"\x00" + b"\x00\x00\x00\x00"
+
+    @classmethod
+    def is_hard_reset_reply(cls, data: bytes) -> bool:
+        """
+        Returns True if a datagram is an OpenVPN P_CONTROL_HARD_RESET_SERVER_V2,
+        i.e. the opcode and a server session id are there.
+        """
+        return len(data) >= 9 and data[0] >> 3 == cls.P_CONTROL_HARD_RESET_SERVER_V2
+
+    async def probe_udp(self, address: tuple) -> float:
+        """
+        Returns the time to the first reply to an OpenVPN hard reset in milliseconds.
+        """
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+
+        class ReplyProtocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                if not reply.done() and LatencyProbe.is_hard_reset_reply(data):
+                    reply.set_result(time.perf_counter())
+
+            def error_received(self, exc):
+                if not reply.done():
+                    reply.set_exception(exc)
+
+        transport, _ = await loop.create_datagram_endpoint(ReplyProtocol, remote_addr=address)
+        try:
+            packet = self.hard_reset_packet()
+            start = time.perf_counter()
+            transport.sendto(packet)
+            return (await asyncio.wait_for(reply, self.timeout) - start) * 1000
+        finally:
+            transport.close()
+
+    async def probe(self, host: str, port: int, protocol: str = "tcp") -> float:
+        """
+        Probes a single target once and records the result.
+
+        Args:
+            host (str): The server hostname.
+            port (int): The server port.
+            protocol (str): "tcp" or "udp".
+
+        Returns:
+            float: The latency in milliseconds, or None if the probe failed.
+        """
+        stats = self.stats.setdefault((host, port, protocol), LatencyStats(self.window))
+        try:
+            address = await self.resolve(host, port, protocol)
+            if protocol == "udp":
+                latency = await self.probe_udp(address)
+            else:
+                latency = await self.probe_tcp(address)
+        except (OSError, asyncio.TimeoutError):
+            stats.add_failure()
+            return None
+
+        stats.add(latency)
+        return latency
+
+    async def run(self, targets: list, protocol: str = "tcp", rounds: int = 3) -> list:
+        """
+        Probes every target `rounds` times with bounded concurrency.
+
+        Args:
+            targets (list): (host, port) tuples.
+            protocol (str): "tcp" or "udp".
+            rounds (int): Number of probes per target.
+
+        Returns:
+            list: The ranking for the probed targets, see `ranked`.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(host, port):
+            async with semaphore:
+                await self.probe(host, port, protocol)
+
+        await asyncio.gather(*(bounded(host, port) for _ in range(rounds) for host, port in targets))
+        return self.ranked([(host, port, protocol) for host, port in targets])
+
+    def ranked(self, keys: list = None) -> list:
+        """
+        Ranks targets by median latency, unreachable targets last.
+
+        Args:
+            keys (list): (host, port, protocol) tuples to rank, all known targets by default.
+
+        Returns:
+            list: Dicts with host, port, protocol, p50, p90, loss and samples.
+        """
+        keys = self.stats.keys() if keys is None else dict.fromkeys(keys)
+        ranking = []
+        for host, port, protocol in keys:
+            stats = self.stats[(host, port, protocol)]
+            ranking.append({
+                "host": host,
+                "port": port,
+                "protocol": protocol,
+                "p50": stats.percentile(50),
+                "p90": stats.percentile(90),
+                "loss": stats.loss,
+                "samples": len(stats.samples)
+            })
+
+        return sorted(ranking, key=lambda r: (r["p50"] is None, r["p50"] or 0, r["loss"]))
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from .metrics import metrics
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag and reports handlers that block the loop.
+
+    A ticker on the loop records how late each tick fires in the
+    htbtui_loop_lag_ms histogram. A daemon thread watches the ticker's heartbeat
+    and, as soon as the loop has been stuck for longer than the threshold,
+    captures the loop thread's stack, i.e. the code that is blocking it. The
+    report is handed to the callback once the loop is running again.
+    """
+
+    interval = 0.1
+    idle_interval = 1.0
+    stack_limit = 12
+
+    def __init__(self, callback, threshold_ms: float = None) -> None:
+        """
+        Args:
+            callback: Called on the loop with (blocked_ms, stack) after each stall.
+            threshold_ms (float): Stall threshold, $HTBTUI_LAG_THRESHOLD_MS or 250 by default.
+        """
+        self.callback = callback
+        self.threshold = (threshold_ms or float(os.environ.get("HTBTUI_LAG_THRESHOLD_MS", 250))) / 1000
+        self.loop = None
+        self.loop_thread_id = None
+        self.heartbeat = time.monotonic()
+        self.ticker = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Starts the ticker on the running loop and the watcher thread.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.stopped.clear()
+        self.ticker = self.loop.create_task(self.tick())
+        self.thread = threading.Thread(target=self.watch, name="htbtui-loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.ticker is not None:
+            self.ticker.cancel()
+            self.ticker = None
+
+    def set_idle(self, idle: bool) -> None:
+        """
+        Ticks less often while the app is idle, stalls are still caught but reported later.
+        """
+        self.interval = type(self).idle_interval if idle else type(self).interval
+
+    async def tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.heartbeat = now
+            metrics.observe("htbtui_loop_lag_ms", max(0.0, now - expected) * 1000)
+
+    def watch(self) -> None:
+        reported = None
+        while not self.stopped.wait(self.interval / 2):
+            heartbeat = self.heartbeat
+            blocked = time.monotonic() - heartbeat
+            if blocked < self.threshold + self.interval or reported == heartbeat:
+                continue
+
+            # only one report per stall, the stack shows where the loop is stuck right now
+            reported = heartbeat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_limit)) if frame is not None else ""
+            # the metrics registry is not thread safe, so it is only touched on the loop, in report
+            try:
+                self.loop.call_soon_threadsafe(self.report, heartbeat, stack)
+            except RuntimeError:
+                # the loop has been closed
+                return
+
+    def report(self, heartbeat: float, stack: str) -> None:
+        metrics.inc("htbtui_loop_stalls_total")
+        self.callback((time.monotonic() - heartbeat) * 1000, stack)
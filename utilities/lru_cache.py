@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small least-recently-used cache with an optional time to live.
+
+    Hits and misses are counted so the cache can be inspected from the console.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, count=False) is not None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, default=None, count: bool = True):
+        """
+        Returns the cached value and marks it as recently used.
+
+        Args:
+            key: The cache key.
+            default: Returned when the key is missing or expired.
+            count (bool): Whether the lookup counts towards hits and misses.
+        """
+        entry = self.entries.get(key)
+        if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            del self.entries[key]
+            entry = None
+
+        if entry is None:
+            if count:
+                self.misses += 1
+            return default
+
+        if count:
+            self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value) -> None:
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Drops the least recently used entries over `maxsize`.
+        """
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self.entries.clear()
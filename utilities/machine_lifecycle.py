@@ -0,0 +1,110 @@
+from enums import MachineState
+
+
+class MachineLifecycle:
+    """
+    Tracks the active machine through idle → spawning → running(ip) → stopping.
+
+    Mutating actions (spawn, stop, reset) move the lifecycle into a pending
+    transition via `begin`, and every poll of the active machine endpoint is fed
+    back through `observe` until the pending action has settled.
+    """
+
+    actions = {
+        "spawn": MachineState.SPAWNING,
+        "reset": MachineState.SPAWNING,
+        "stop": MachineState.STOPPING,
+    }
+
+    def __init__(self) -> None:
+        self.state: MachineState = MachineState.IDLE
+        self.machine_id: int = None
+        self.ip: str = None
+        self.pending_action: str = None
+        # a reset keeps the machine and its IP, so it has only settled once a
+        # poll has seen the machine go down after the reset was sent
+        self.reset_went_down: bool = False
+
+    def begin(self, action: str, machine_id: int) -> MachineState:
+        """
+        Starts a transition for a mutating action that has just been sent to HTB.
+
+        Args:
+            action (str): One of "spawn", "stop" or "reset".
+            machine_id (int): The ID of the machine the action targets.
+
+        Returns:
+            MachineState: The state the lifecycle moved into.
+        """
+        if action not in self.actions:
+            raise ValueError(f"Unknown machine action: {action}")
+
+        self.pending_action = action
+        self.machine_id = machine_id
+        self.state = self.actions[action]
+        self.ip = None
+        self.reset_went_down = False
+
+        return self.state
+
+    def observe(self, machine_data: dict) -> tuple[bool, bool]:
+        """
+        Folds a polled active machine payload into the lifecycle.
+
+        Args:
+            machine_data (dict): The active machine data as built by ActiveMachine.
+
+        Returns:
+            tuple[bool, bool]: Whether the state changed, and whether an IP was newly assigned.
+        """
+        previous_state = self.state
+        previous_ip = self.ip
+        machine_id = machine_data.get("id")
+        ip = machine_data.get("ip") if machine_id is not None else None
+
+        if self.pending_action == "reset" and (machine_id is None or not ip):
+            self.reset_went_down = True
+
+        if machine_id is None:
+            # a freshly spawned or reset machine can take a poll or two to show up
+            state = MachineState.SPAWNING if self.pending_action in ("spawn", "reset") else MachineState.IDLE
+        elif self.pending_action == "stop":
+            state = MachineState.STOPPING
+        elif self.pending_action == "reset" and not self.reset_went_down:
+            # still the machine from before the reset
+            state = MachineState.SPAWNING
+        elif ip:
+            state = MachineState.RUNNING
+        else:
+            state = MachineState.SPAWNING
+
+        if machine_id is not None:
+            self.machine_id = machine_id
+        self.state = state
+        self.ip = ip if state is MachineState.RUNNING else None
+
+        if self.is_settled():
+            self.pending_action = None
+
+        ip_assigned = self.ip is not None and self.ip != previous_ip
+        return state is not previous_state, ip_assigned
+
+    def is_settled(self) -> bool:
+        """
+        Returns True once the pending action has reached its target state.
+        """
+        match self.pending_action:
+            case None:
+                return True
+            case "spawn":
+                return self.state is MachineState.RUNNING
+            case "reset":
+                return self.reset_went_down and self.state is MachineState.RUNNING
+            case "stop":
+                return self.state is MachineState.IDLE
+
+    def expire(self) -> None:
+        """
+        Gives up on the pending action, e.g. after the poll burst timed out.
+        """
+        self.pending_action = None
@@ -0,0 +1,37 @@
+import os
+
+
+class MemoryBudget:
+    """
+    Caps on what HTBtui retains over a long session.
+
+    Every cap can be overridden with an environment variable, e.g. on a small VM:
+
+        HTBTUI_LOG_MAX_LINES=500 HTBTUI_CACHE_MAX_ENTRIES=32 python3 htbtui.py
+    """
+
+    defaults = {
+        # lines kept in the output log and the console
+        "log_max_lines": 2000,
+        "console_max_lines": 1000,
+        # upper bound for every LRU cache, caches with a smaller size keep theirs
+        "cache_max_entries": 128,
+        # items shown per container when an API payload is written to the log
+        "log_payload_max_items": 30,
+        # tracemalloc snapshots kept for diffing
+        "max_snapshots": 4,
+    }
+
+    def __init__(self) -> None:
+        for name, default in self.defaults.items():
+            value = os.environ.get(f"HTBTUI_{name.upper()}")
+            setattr(self, name, int(value) if value else default)
+
+    def cache_size(self, size: int) -> int:
+        """
+        Returns the size a cache should have, given the size it asks for.
+        """
+        return max(1, min(size, self.cache_max_entries))
+
+
+memory_budget = MemoryBudget()
@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from .memory_budget import memory_budget
+
+
+class MemoryDiagnostics:
+    """
+    tracemalloc snapshots of the running app, grouped by module.
+
+    Tracing is off until `start` is called, since tracemalloc slows down every
+    allocation. Snapshots are labelled and only the most recent few are kept,
+    as each one holds a copy of every live trace.
+    """
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def __init__(self) -> None:
+        self.snapshots = OrderedDict()
+        self.counter = 0
+
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.snapshots.clear()
+
+    def snapshot(self) -> str:
+        """
+        Takes a snapshot of the traced allocations.
+
+        Returns:
+            str: The label of the snapshot, e.g. "s1".
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        self.counter += 1
+        label = f"s{self.counter}"
+        self.snapshots[label] = (time.time(), snapshot)
+        while len(self.snapshots) > memory_budget.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return label
+
+    def module_name(self, filename: str) -> str:
+        """
+        Maps a source file to the module, package or stdlib area it belongs to.
+        """
+        path = os.path.abspath(filename)
+        if path.startswith(self.project_root + os.sep):
+            return os.path.splitext(os.path.relpath(path, self.project_root))[0].replace(os.sep, ".")
+        parts = path.split(os.sep)
+        if "site-packages" in parts:
+            return parts[parts.index("site-packages") + 1].removesuffix(".py")
+        return "stdlib." + os.path.splitext(os.path.basename(path))[0]
+
+    def group(self, stats: list, size_attr: str, count_attr: str) -> list:
+        modules = {}
+        for stat in stats:
+            module = self.module_name(stat.traceback[0].filename)
+            size, count = modules.get(module, (0, 0))
+            modules[module] = (size + getattr(stat, size_attr), count + getattr(stat, count_attr))
+        return sorted(((module, size, count) for module, (size, count) in modules.items()), key=lambda row: abs(row[1]), reverse=True)
+
+    def top(self, label: str = None, limit: int = 15) -> list:
+        """
+        Returns the modules holding the most memory in a snapshot.
+
+        Args:
+            label (str): The snapshot, the most recent one by default.
+            limit (int): The number of modules to return.
+
+        Returns:
+            list: (module, size in bytes, allocation count) tuples.
+        """
+        _, snapshot = self.snapshots[label or next(reversed(self.snapshots))]
+        return self.group(snapshot.statistics("filename"), "size", "count")[:limit]
+
+    def diff(self, old_label: str = None, new_label: str = None, limit: int = 15) -> list:
+        """
+        Compares two snapshots by module, the last two by default.
+
+        Returns:
+            list: (module, size difference in bytes, allocation count difference) tuples.
+        """
+        labels = list(self.snapshots)
+        old_label = old_label or labels[-2]
+        new_label = new_label or labels[-1]
+        _, old = self.snapshots[old_label]
+        _, new = self.snapshots[new_label]
+        return self.group(new.compare_to(old, "filename"), "size_diff", "count_diff")[:limit]
+
+    @staticmethod
+    def deep_sizeof(obj, seen: set = None) -> int:
+        """
+        Approximates the memory retained by plain data (dicts, lists, strings...).
+        """
+        seen = set() if seen is None else seen
+        pending = [obj]
+        size = 0
+        while pending:
+            item = pending.pop()
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            size += sys.getsizeof(item)
+            if isinstance(item, dict):
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                pending.extend(item)
+        return size
+
+    def widget_sizes(self, widgets, limit: int = 15) -> list:
+        """
+        Approximates the data each widget keeps in its own attributes.
+
+        Args:
+            widgets: The widgets to inspect.
+            limit (int): The number of entries to return.
+
+        Returns:
+            list: (widget, attribute, size in bytes) tuples, largest first.
+        """
+        seen = set()
+        sizes = []
+        for widget in widgets:
+            name = widget.id or type(widget).__name__
+            for attribute, value in vars(widget).items():
+                if attribute.startswith("_") or attribute == "lines" or not isinstance(value, (dict, list)):
+                    continue
+                sizes.append((name, attribute, self.deep_sizeof(value, seen)))
+            lines = getattr(widget, "lines", None)
+            if isinstance(lines, list) and lines:
+                sizes.append((name, f"lines ({len(lines)})", sum(sys.getsizeof(line) + sum(sys.getsizeof(segment.text) for segment in line) for line in lines)))
+        return sorted(sizes, key=lambda row: row[2], reverse=True)[:limit]
+
+    @staticmethod
+    def rss() -> int:
+        """
+        Returns the resident set size of the process in bytes, or 0 if unknown.
+        """
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+
+memory_diagnostics = MemoryDiagnostics()
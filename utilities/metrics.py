@@ -0,0 +1,154 @@
+import bisect
+import functools
+import os
+import time
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, compatible with the Prometheus exposition format.
+    """
+
+    default_buckets = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, buckets: tuple = default_buckets) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else None
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters, gauges and histograms.
+
+    Metrics are identified by a name and a set of labels, e.g.
+    `metrics.inc("htbtui_api_requests_total", endpoint="/api/v4/machine/active", status=200)`.
+    """
+
+    def __init__(self) -> None:
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.caches = {}
+        self.started = time.time()
+
+    @staticmethod
+    def key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self.key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self.key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def register_cache(self, name: str, cache) -> None:
+        """
+        Registers an object with `hits` and `misses` attributes, e.g. an LRUCache.
+        """
+        self.caches[name] = cache
+
+    def timed(self, name: str, **labels):
+        """
+        Decorates a function to record its duration in milliseconds in a histogram.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - start) * 1000, **labels)
+            return wrapper
+        return decorator
+
+    def to_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        """
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+            for name in sorted({name for name, _ in metrics}):
+                lines.append(f"# TYPE {name} {kind}")
+                for (metric, labels), value in metrics.items():
+                    if metric == name:
+                        lines.append(f"{name}{labels_text(labels)} {value}")
+
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), histogram in self.histograms.items():
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{labels_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{labels_text(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{labels_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{labels_text(labels)} {histogram.count}")
+
+        if self.caches:
+            for suffix in ("hits", "misses"):
+                lines.append(f"# TYPE htbtui_cache_{suffix}_total counter")
+                for cache_name, cache in self.caches.items():
+                    lines.append(f'htbtui_cache_{suffix}_total{{cache="{cache_name}"}} {getattr(cache, suffix)}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> str:
+        """
+        Writes a Prometheus textfile snapshot atomically, for the node_exporter
+        textfile collector or any other local scraper.
+
+        Returns:
+            str: The path written to.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+
+metrics = MetricsRegistry()
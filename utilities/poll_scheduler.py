@@ -0,0 +1,161 @@
+import inspect
+import time
+
+
+class PollJob:
+    """
+    A periodic callback registered with the PollScheduler.
+
+    Has the same pause/resume interface as a Textual Timer, so widgets can hold
+    on to it the way they held on to the result of set_interval.
+    """
+
+    def __init__(self, scheduler: "PollScheduler", owner, callback, interval: float, idle_interval: float = None, name: str = None) -> None:
+        self.scheduler = scheduler
+        self.owner = owner
+        self.callback = callback
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.paused = False
+        # coroutine callbacks run in a worker of the owner, so a slow request
+        # never holds up the owner's message handling
+        self.is_async = inspect.iscoroutinefunction(inspect.unwrap(callback))
+        self.worker = None
+        self.last_run = time.monotonic()
+        self.next_due = self.last_run + interval
+
+    def current_interval(self, idle: bool) -> float:
+        """
+        Returns the interval for the current mode, or None if the job sleeps while idle.
+        """
+        return self.idle_interval if idle else self.interval
+
+    def is_active(self, idle: bool) -> bool:
+        return not self.paused and self.current_interval(idle) is not None
+
+    def pause(self) -> None:
+        self.paused = True
+        self.scheduler.schedule()
+
+    def resume(self) -> None:
+        self.paused = False
+        self.last_run = time.monotonic()
+        self.next_due = self.last_run + self.interval
+        self.scheduler.schedule()
+
+    def stop(self) -> None:
+        self.scheduler.remove(self)
+
+    def run(self) -> bool:
+        """
+        Runs the callback on the owner: sync callbacks via call_later, coroutine
+        callbacks in a worker, skipping the tick if the last run is still going.
+
+        Returns:
+            bool: False if the owner has been removed from the DOM.
+        """
+        if not self.is_async:
+            return self.owner.call_later(self.callback)
+        if not self.owner.is_running:
+            return False
+        if self.worker is None or self.worker.is_finished:
+            self.worker = self.owner.run_worker(self.callback(), name=self.name, group="poll_scheduler")
+        return True
+
+
+class PollScheduler:
+    """
+    Runs every periodic job of the app from a single timer.
+
+    Instead of one Textual timer per poller, the scheduler keeps one timer armed
+    for the earliest due job, so the app wakes up once for everything that is
+    due at the same time. In idle mode jobs switch to their idle interval, or
+    sleep entirely if they have none, and on leaving idle mode anything that has
+    become overdue runs straight away.
+    """
+
+    # jobs due within this window are run in the same wake-up
+    coalesce_window = 0.25
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.jobs = []
+        self.idle = False
+        self.timer = None
+        self.started = False
+
+    def add(self, owner, callback, interval: float, idle_interval: float = None, name: str = None) -> PollJob:
+        """
+        Registers a periodic job.
+
+        Args:
+            owner: The widget (or app) the callback is run on, via call_later or, for a coroutine function, in a worker.
+            callback: The function or coroutine function to run.
+            interval (float): Seconds between runs.
+            idle_interval (float): Seconds between runs in idle mode, None to sleep while idle.
+            name (str): Shown in diagnostics, the callback name by default.
+
+        Returns:
+            PollJob: The job, which can be paused, resumed and stopped.
+        """
+        job = PollJob(self, owner, callback, interval, idle_interval, name)
+        self.jobs.append(job)
+        self.schedule()
+        return job
+
+    def remove(self, job: PollJob) -> None:
+        if job in self.jobs:
+            self.jobs.remove(job)
+            self.schedule()
+
+    def start(self) -> None:
+        self.started = True
+        self.schedule()
+
+    def stop(self) -> None:
+        self.started = False
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
+
+    def set_idle(self, idle: bool) -> None:
+        """
+        Switches every job between its normal and its idle interval.
+        """
+        if idle == self.idle:
+            return
+        self.idle = idle
+        for job in self.jobs:
+            interval = job.current_interval(idle)
+            if interval is not None:
+                # leaving idle mode makes anything overdue run right away
+                job.next_due = job.last_run + interval
+        self.schedule()
+
+    def schedule(self) -> None:
+        """
+        Arms the timer for the earliest due job.
+        """
+        if not self.started:
+            return
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
+
+        due = [job.next_due for job in self.jobs if job.is_active(self.idle)]
+        if due:
+            self.timer = self.app.set_timer(max(0.0, min(due) - time.monotonic()), self.run_due, name="poll scheduler")
+
+    def run_due(self) -> None:
+        self.timer = None
+        now = time.monotonic()
+        for job in list(self.jobs):
+            if not job.is_active(self.idle) or job.next_due > now + self.coalesce_window:
+                continue
+            job.last_run = now
+            job.next_due = now + job.current_interval(self.idle)
+            if not job.run():
+                # the owner has been removed from the DOM
+                self.jobs.remove(job)
+        self.schedule()
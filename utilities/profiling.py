@@ -0,0 +1,172 @@
+import cProfile
+import functools
+import inspect
+import os
+import time
+
+from .app_dirs import data_dir
+
+
+class Profiler:
+    """
+    Opt-in cProfile hooks for app startup, workers and render methods.
+
+    Set $HTBTUI_PROFILE to profile startup and every method decorated with
+    `profiled`; each name accumulates into its own profile that is written as a
+    .prof file (pstats format, e.g. for snakeviz, tuna or `python -m pstats`) to
+    the profiles directory on `dump`. A whole-session profile can also be started
+    and stopped at runtime with `start`/`stop`, e.g. from the console.
+
+    With $HTBTUI_PROFILE unset `profiled` returns the function unchanged, so the
+    decorated methods carry no overhead at all.
+    """
+
+    env_var = "HTBTUI_PROFILE"
+
+    def __init__(self) -> None:
+        self.enabled = bool(os.environ.get(self.env_var))
+        self.profiles = {}
+        self.running = {}
+        # cProfile uses a single per-thread hook, so only one profile can be enabled at a time
+        self.active = None
+
+    def profile_dir(self) -> str:
+        path = os.path.join(data_dir(), "profiles")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def get_profile(self, name: str) -> cProfile.Profile:
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+        return profile
+
+    def enable(self, profile: cProfile.Profile) -> bool:
+        """
+        Enables the profile unless another one is already collecting, in which case
+        the time is attributed to that one.
+
+        Returns:
+            bool: True if the profile was enabled and has to be disabled by the caller.
+        """
+        if self.active is not None:
+            return False
+        self.active = profile
+        profile.enable()
+        return True
+
+    def disable(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self.active = None
+
+    def profiled(self, name: str):
+        """
+        Decorates a function or coroutine function to collect its profile under `name`.
+
+        Coroutines are only profiled while they are running, not while they are
+        suspended, so time spent in other tasks is not attributed to them.
+        """
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    return await ProfiledCoroutine(self, self.get_profile(name), func(*args, **kwargs))
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                profile = self.get_profile(name)
+                if not self.enable(profile):
+                    return func(*args, **kwargs)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.disable(profile)
+            return wrapper
+        return decorator
+
+    def start(self, name: str) -> bool:
+        """
+        Starts a profile that covers everything running on the event loop thread.
+
+        Args:
+            name (str): The profile name, used for the output file.
+
+        Returns:
+            bool: False if a profile is already running.
+        """
+        if self.running or self.active is not None:
+            return False
+        profile = cProfile.Profile()
+        self.running[name] = profile
+        self.enable(profile)
+        return True
+
+    def stop(self, name: str) -> str:
+        """
+        Stops a profile started with `start` and writes it out.
+
+        Returns:
+            str: The path of the .prof file, or None if the profile was not running.
+        """
+        profile = self.running.pop(name, None)
+        if profile is None:
+            return None
+        self.disable(profile)
+        return self.write(name, profile)
+
+    def dump(self) -> list:
+        """
+        Writes the accumulated profiles of the decorated methods.
+
+        Returns:
+            list: The paths written to.
+        """
+        paths = [self.write(name, profile) for name, profile in self.profiles.items()]
+        return [path for path in paths if path]
+
+    def write(self, name: str, profile: cProfile.Profile) -> str:
+        profile.create_stats()
+        if not profile.stats:
+            # pstats refuses to load an empty profile
+            return None
+        path = os.path.join(self.profile_dir(), f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.prof")
+        profile.dump_stats(path)
+        return path
+
+
+class ProfiledCoroutine:
+    """
+    Awaitable that enables a profile around each step of the wrapped coroutine.
+    """
+
+    def __init__(self, profiler: Profiler, profile: cProfile.Profile, coro) -> None:
+        self.profiler = profiler
+        self.profile = profile
+        self.coro = coro
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            enabled = self.profiler.enable(self.profile)
+            try:
+                if error is not None:
+                    future = self.coro.throw(error)
+                else:
+                    future = self.coro.send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                if enabled:
+                    self.profiler.disable(self.profile)
+
+            try:
+                value, error = (yield future), None
+            except BaseException as e:
+                value, error = None, e
+
+
+profiler = Profiler()
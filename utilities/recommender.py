@@ -0,0 +1,180 @@
+import os
+import time
+
+import numpy as np
+
+from .catalogue import MachineCatalogue
+
+
+class Recommender:
+    """
+    Ranks the machines I have not rooted yet by a weighted sum of features.
+
+    Every feature is scaled to 0..1 and kept as a column of a machines x
+    features matrix, so a score is one dot product per machine:
+
+        rating      the star rating
+        difficulty  how close the community difficulty is to the one I am
+                    ready for, by default a step above my rooted machines
+        popularity  user owns, log scaled
+        age         how recent the release is
+        gaps        how little of the machine's OS and difficulty I have rooted
+
+    The gaps and the target difficulty depend on my owns. When a root own
+    changes one machine, the counts of its OS and difficulty groups are
+    adjusted and the gaps of just those groups are recomputed, then the
+    target and the difficulty column are recomputed for every machine, which
+    is one vector operation, and the machines are rescored.
+
+    The weights can be overridden with an environment variable, e.g.
+
+        HTBTUI_RECOMMEND_WEIGHTS="rating=2,age=0" python3 htbtui.py
+
+    and the target difficulty (1 to 10) with HTBTUI_RECOMMEND_DIFFICULTY.
+    """
+
+    features = ["rating", "difficulty", "popularity", "age", "gaps"]
+    default_weights = {"rating": 1.0, "difficulty": 1.0, "popularity": 0.5, "age": 0.25, "gaps": 1.0}
+    weights_env_var = "HTBTUI_RECOMMEND_WEIGHTS"
+    difficulty_env_var = "HTBTUI_RECOMMEND_DIFFICULTY"
+    # community difficulty assumed when I have not rooted anything yet
+    starting_difficulty = 3.0
+    difficulty_step = 1.0
+
+    def __init__(self, weights: dict = None) -> None:
+        self.weights = self.load_weights(weights)
+        self.catalogue = MachineCatalogue()
+        self.build(self.catalogue)
+
+    def load_weights(self, weights: dict = None) -> np.ndarray:
+        """
+        Returns the weight vector, from the defaults, the environment and `weights`, in that order.
+        """
+        merged = dict(self.default_weights)
+        for item in os.environ.get(self.weights_env_var, "").split(","):
+            name, _, value = item.partition("=")
+            if name.strip() in merged and value.strip():
+                merged[name.strip()] = float(value)
+        merged.update(weights or {})
+        return np.array([merged[feature] for feature in self.features], dtype=np.float64)
+
+    def set_weights(self, weights: dict) -> None:
+        """
+        Changes some weights and rescores every machine.
+        """
+        current = dict(zip(self.features, self.weights))
+        current.update(weights)
+        self.weights = np.array([current[feature] for feature in self.features], dtype=np.float64)
+        self.scores = self.matrix @ self.weights
+
+    def build(self, catalogue: MachineCatalogue, now: float = None) -> None:
+        """
+        Computes the features and scores of a catalogue.
+        """
+        self.catalogue = catalogue
+        self.index = {int(machine_id): i for i, machine_id in enumerate(catalogue.ids)}
+        count = len(catalogue)
+        self.matrix = np.zeros((count, len(self.features)), dtype=np.float64)
+        if not count:
+            self.scores = np.zeros(0)
+            self.community = np.zeros(0)
+            self.target = self.starting_difficulty
+            return
+
+        self.matrix[:, 0] = np.clip(catalogue.rating / 5, 0, 1)
+
+        self.community = catalogue.community_difficulty()
+        self.update_difficulty_fit()
+
+        popularity = np.log1p(catalogue.user_owns)
+        self.matrix[:, 2] = popularity / popularity.max() if popularity.max() > 0 else 0
+
+        now = now or time.time()
+        age = now - catalogue.release
+        oldest = np.nanmax(age) if not np.isnan(age).all() else 0
+        self.matrix[:, 3] = np.nan_to_num(1 - age / oldest, nan=0.5) if oldest > 0 else 0.5
+
+        # machines and rooted machines per OS and per difficulty, -1 (unknown difficulty) kept in the last slot
+        self.os_totals = np.bincount(catalogue.os, minlength=len(catalogue.os_names))
+        self.os_rooted = np.bincount(catalogue.os, weights=catalogue.root_owned, minlength=len(catalogue.os_names))
+        difficulty = catalogue.difficulty.astype(np.int64) % (len(catalogue.difficulties) + 1)
+        self.difficulty_codes = difficulty
+        self.difficulty_totals = np.bincount(difficulty, minlength=len(catalogue.difficulties) + 1)
+        self.difficulty_rooted = np.bincount(difficulty, weights=catalogue.root_owned, minlength=len(catalogue.difficulties) + 1)
+        rows = np.ones(count, dtype=bool)
+        self.update_gaps(rows)
+
+    def update_difficulty_fit(self) -> None:
+        """
+        Recomputes the target difficulty from my rooted machines and the difficulty feature of every machine.
+        """
+        self.target = self.target_difficulty(self.community)
+        self.matrix[:, 1] = np.nan_to_num(1 - np.abs(self.community - self.target) / 9, nan=0.5)
+
+    def target_difficulty(self, community: np.ndarray) -> float:
+        override = os.environ.get(self.difficulty_env_var)
+        if override:
+            return float(override)
+        rooted = community[self.catalogue.root_owned & ~np.isnan(community)]
+        if not len(rooted):
+            return self.starting_difficulty
+        return float(min(10, np.median(rooted) + self.difficulty_step))
+
+    def update_gaps(self, rows: np.ndarray) -> None:
+        """
+        Recomputes the gaps feature and the score of the selected rows.
+        """
+        os_codes = self.catalogue.os[rows]
+        difficulty_codes = self.difficulty_codes[rows]
+        os_gap = 1 - self.os_rooted[os_codes] / self.os_totals[os_codes]
+        difficulty_gap = 1 - self.difficulty_rooted[difficulty_codes] / self.difficulty_totals[difficulty_codes]
+        self.matrix[rows, 4] = (os_gap + difficulty_gap) / 2
+        if rows.all():
+            self.scores = self.matrix @ self.weights
+        else:
+            self.scores[rows] = self.matrix[rows] @ self.weights
+
+    def set_owned(self, machine_id: int, user_owned: bool, root_owned: bool) -> bool:
+        """
+        Applies an own change to one machine.
+
+        Returns:
+            bool: True if the machine is in the catalogue.
+        """
+        i = self.index.get(int(machine_id))
+        if i is None:
+            return False
+        catalogue = self.catalogue
+        catalogue.user_owned[i] = bool(user_owned)
+        delta = int(bool(root_owned)) - int(catalogue.root_owned[i])
+        catalogue.root_owned[i] = bool(root_owned)
+        if delta:
+            os_code, difficulty_code = catalogue.os[i], self.difficulty_codes[i]
+            self.os_rooted[os_code] += delta
+            self.difficulty_rooted[difficulty_code] += delta
+            self.update_gaps((catalogue.os == os_code) | (self.difficulty_codes == difficulty_code))
+            # the target follows my rooted machines, so every machine's fit can change
+            self.update_difficulty_fit()
+            self.scores = self.matrix @ self.weights
+        return True
+
+    def top(self, count: int = 25) -> list:
+        """
+        Returns the best scored machines I have not rooted.
+
+        Returns:
+            list: (machine id, score, strongest feature) tuples, best first.
+        """
+        candidates = np.flatnonzero(~self.catalogue.root_owned)
+        if not len(candidates):
+            return []
+        if len(candidates) > count:
+            best = np.argpartition(-self.scores[candidates], count - 1)[:count]
+            candidates = candidates[best]
+        candidates = candidates[np.argsort(-self.scores[candidates], kind="stable")]
+        contributions = self.matrix[candidates] * self.weights
+        strongest = contributions.argmax(axis=1)
+        return [
+            (int(self.catalogue.ids[i]), float(self.scores[i]), self.features[feature])
+            for i, feature in zip(candidates, strongest)
+        ]
@@ -0,0 +1,40 @@
+def release_key(machine: dict, index: int):
+    """
+    Returns the key a machine is diffed by: its id, or its week for seasonal
+    machines that are still unknown and have none.
+    """
+    return machine.get("id") or f"week:{index}"
+
+
+def is_playable(machine: dict) -> bool:
+    """
+    Returns True for a machine that is released and not hidden, as shown by SeasonalMachines.make_machine_list.
+    Current machines carry neither flag and are always playable.
+    """
+    return bool(machine.get("is_released", True)) and not machine.get("unknown", False)
+
+
+def diff_releases(known: list, fresh: list) -> list:
+    """
+    Finds the machines that became playable between two versions of a machine list.
+
+    Args:
+        known (list): The machines shown now.
+        fresh (list): The machines just fetched, in week order for seasonal lists.
+
+    Returns:
+        list: (machine, reason) tuples, reason being "new" for machines that were
+            not listed before and "released" for ones that were listed but not yet
+            playable.
+    """
+    known_by_key = {release_key(machine, index): machine for index, machine in enumerate(known)}
+    releases = []
+    for index, machine in enumerate(fresh):
+        if not is_playable(machine):
+            continue
+        previous = known_by_key.get(release_key(machine, index))
+        if previous is None:
+            releases.append((machine, "new"))
+        elif not is_playable(previous):
+            releases.append((machine, "released"))
+    return releases
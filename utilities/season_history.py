@@ -0,0 +1,78 @@
+import json
+import os
+
+from .app_dirs import data_dir
+
+
+class SeasonHistory:
+    """
+    Permanent on-disk cache of my rank in every season.
+
+    A completed season never changes, so its rank is fetched once and kept
+    for good, including seasons I did not play (stored as None). Only the
+    active season has to be fetched again. The cache belongs to one user and
+    is dropped if the token changes to another account.
+    """
+
+    file_name = "season_history.json"
+    version = 1
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.path.join(data_dir(), self.file_name)
+        self.user_id = None
+        self.seasons = []
+        self.ranks = {}
+
+    def load(self) -> None:
+        """
+        Loads the cache from disk, ignoring missing or unreadable files.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.user_id = data.get("user_id")
+                self.seasons = data.get("seasons", [])
+                self.ranks = {int(season_id): rank for season_id, rank in data.get("ranks", {}).items()}
+        except (OSError, ValueError, AttributeError):
+            self.seasons = []
+            self.ranks = {}
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.version, "user_id": self.user_id, "seasons": self.seasons, "ranks": self.ranks}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def set_user(self, user_id: int) -> None:
+        if user_id != self.user_id:
+            self.user_id = user_id
+            self.seasons = []
+            self.ranks = {}
+
+    def active_season(self) -> dict:
+        return next((season for season in self.seasons if season["active"]), None)
+
+    def set_seasons(self, seasons: list) -> None:
+        """
+        Replaces the season list, forgetting the rank of any season that is not
+        completed and of any season that was active in the old list, since that
+        rank was taken mid-season.
+        """
+        was_active = {season["id"] for season in self.seasons if season["active"]}
+        self.seasons = [{"id": season["id"], "name": season["name"], "active": bool(season["active"])} for season in seasons]
+        for season in self.seasons:
+            if season["active"] or season["id"] in was_active:
+                self.ranks.pop(season["id"], None)
+
+    def missing(self) -> list:
+        """
+        Returns the season ids whose rank has to be fetched: the active season and uncached completed ones.
+        """
+        return [season["id"] for season in self.seasons if season["active"] or season["id"] not in self.ranks]
+
+    def put(self, season_id: int, rank: dict) -> None:
+        self.ranks[season_id] = rank
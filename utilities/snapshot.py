@@ -0,0 +1,60 @@
+import json
+import os
+
+from .app_dirs import data_dir
+
+
+class Snapshot:
+    """
+    Compact on-disk copy of the last rendered dashboard state.
+
+    Widgets `put` their data after every successful fetch and read it back with
+    `get` when they mount, so the first frame shows the last known dashboard while
+    the live data loads. Nothing is written until `save` is called.
+    """
+
+    file_name = "snapshot.json"
+    version = 1
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.path.join(data_dir(), self.file_name)
+        self.data = {}
+        self.dirty = False
+
+    def load(self) -> dict:
+        """
+        Loads the snapshot from disk, ignoring missing or unreadable files.
+
+        Returns:
+            dict: The snapshot data.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.data = data.get("widgets", {})
+        except (OSError, ValueError, AttributeError):
+            self.data = {}
+        return self.data
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def put(self, key: str, value) -> None:
+        self.data[key] = value
+        self.dirty = True
+
+    def save(self) -> None:
+        """
+        Writes the snapshot to disk if anything changed since the last save.
+        """
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.version, "widgets": self.data}, f, separators=(",", ":"), default=str)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError:
+            pass
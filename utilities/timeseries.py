@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import time
+
+from .app_dirs import data_dir
+
+
+class TimeSeriesStore:
+    """
+    Local history of numeric series such as ranking or season points, in SQLite.
+
+    Samples are only ever appended; a sample equal to the previous one of its
+    series is skipped unless `heartbeat` seconds have passed, so refreshing an
+    unchanged profile costs nothing. As samples age they are downsampled to
+    the last value per hour and then per day, which keeps months of history
+    to a few thousand rows per series. Rows are keyed by (series, ts), so a
+    range query is a single index range scan whatever the size of the store.
+    """
+
+    file_name = "history.sqlite3"
+    heartbeat = 3600
+    # (age in seconds, bucket size in seconds): samples older than the age are
+    # rolled up to the last value of each bucket
+    tiers = [(7 * 86400, 3600), (90 * 86400, 86400)]
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.path.join(data_dir(), self.file_name)
+        self.connection = None
+
+    def open(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                " series TEXT NOT NULL, ts INTEGER NOT NULL, resolution INTEGER NOT NULL DEFAULT 0, value REAL NOT NULL,"
+                " PRIMARY KEY (series, ts)) WITHOUT ROWID"
+            )
+        return self.connection
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def append(self, samples: dict, ts: float = None) -> int:
+        """
+        Appends one sample per series, skipping missing and unchanged values.
+
+        Args:
+            samples (dict): Series name to value.
+            ts (float): The sample time, now by default.
+
+        Returns:
+            int: The number of samples written.
+        """
+        ts = int(ts or time.time())
+        connection = self.open()
+        rows = []
+        for series, value in samples.items():
+            if value is None:
+                continue
+            last = self.last(series)
+            if last is not None and last[1] == float(value) and ts - last[0] < self.heartbeat:
+                continue
+            rows.append((series, ts, float(value)))
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO samples (series, ts, value) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def last(self, series: str) -> tuple:
+        """
+        Returns the latest (ts, value) of a series, or None.
+        """
+        return self.open().execute(
+            "SELECT ts, value FROM samples WHERE series = ? ORDER BY ts DESC LIMIT 1", (series,)
+        ).fetchone()
+
+    def range(self, series: str, start: float, end: float = None, bucket: int = None) -> list:
+        """
+        Returns the samples of a series in a time range.
+
+        Args:
+            series (str): The series name.
+            start (float): The start of the range, inclusive.
+            end (float): The end of the range, inclusive, now by default.
+            bucket (int): If set, only the last sample of every `bucket` seconds is returned.
+
+        Returns:
+            list: (ts, value) tuples, oldest first.
+        """
+        end = int(end or time.time())
+        if bucket:
+            # SQLite returns the value of the row holding MAX(ts) in each group
+            query = (
+                "SELECT MAX(ts), value FROM samples WHERE series = ? AND ts BETWEEN ? AND ?"
+                " GROUP BY ts / ? ORDER BY 1"
+            )
+            return self.open().execute(query, (series, int(start), end, int(bucket))).fetchall()
+        return self.open().execute(
+            "SELECT ts, value FROM samples WHERE series = ? AND ts BETWEEN ? AND ? ORDER BY ts", (series, int(start), end)
+        ).fetchall()
+
+    def downsample(self, now: float = None) -> int:
+        """
+        Rolls aged samples up to the last value per bucket, following `tiers`.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        now = int(now or time.time())
+        connection = self.open()
+        removed = 0
+        with connection:
+            for age, size in self.tiers:
+                # only whole buckets are rolled up, so no bucket is ever split
+                cutoff = (now - age) // size * size
+                buckets = connection.execute(
+                    "SELECT series, ts / ? * ?, MAX(ts), COUNT(*) FROM samples WHERE resolution < ? AND ts < ?"
+                    " GROUP BY series, ts / ?",
+                    (size, size, size, cutoff, size)
+                ).fetchall()
+                for series, bucket, last_ts, count in buckets:
+                    value = connection.execute("SELECT value FROM samples WHERE series = ? AND ts = ?", (series, last_ts)).fetchone()[0]
+                    connection.execute(
+                        "DELETE FROM samples WHERE series = ? AND ts >= ? AND ts < ? AND resolution < ?",
+                        (series, bucket, bucket + size, size)
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO samples (series, ts, resolution, value) VALUES (?, ?, ?, ?)",
+                        (series, bucket, size, value)
+                    )
+                    removed += count - 1
+        return removed
@@ -0,0 +1,130 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from .app_dirs import data_dir
+
+
+current_trace = contextvars.ContextVar("htbtui_trace_id", default=None)
+
+
+class Tracer:
+    """
+    Lightweight request-to-render tracing in the Chrome trace event format.
+
+    Set $HTBTUI_TRACE to 1 (written to <data dir>/trace.json) or to a file path to
+    enable it. A trace is started where a poll begins, its id is carried across
+    the message bus in the `trace_id` field of the messages, and every span of a
+    trace is put on its own track, so each refresh reads as one causal chain in
+    chrome://tracing or ui.perfetto.dev.
+
+    When disabled `trace` yields None and `span` returns a shared null context,
+    so instrumented code does no extra work.
+    """
+
+    env_var = "HTBTUI_TRACE"
+    max_events = 50000
+
+    def __init__(self) -> None:
+        value = os.environ.get(self.env_var, "")
+        self.enabled = bool(value)
+        self.path = value if value and value.lower() not in ("1", "true", "yes") else None
+        self.events = deque(maxlen=self.max_events)
+        self.trace_ids = itertools.count(1)
+        self.pid = os.getpid()
+        self.null_context = contextlib.nullcontext()
+
+    def get_path(self) -> str:
+        return self.path or os.path.join(data_dir(), "trace.json")
+
+    @contextlib.contextmanager
+    def trace(self, name: str):
+        """
+        Starts a new trace for the current task.
+
+        Args:
+            name (str): The name of the root span.
+
+        Yields:
+            str: The trace id, or None when tracing is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        trace_id = str(next(self.trace_ids))
+        token = current_trace.set(trace_id)
+        self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": int(trace_id), "args": {"name": f"trace {trace_id}: {name}"}})
+        try:
+            with self.span(name, trace_id):
+                yield trace_id
+        finally:
+            current_trace.reset(token)
+
+    def span(self, name: str, trace_id: str = None, **args):
+        """
+        Returns a context manager recording a span.
+
+        Args:
+            name (str): The span name.
+            trace_id (str): The trace the span belongs to, the current task's trace by default.
+            **args: Extra values shown with the span.
+        """
+        if not self.enabled:
+            return self.null_context
+        return self.record_span(name, trace_id or current_trace.get(), args)
+
+    @contextlib.contextmanager
+    def record_span(self, name: str, trace_id: str, args: dict):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.complete(name, start, trace_id, **args)
+
+    def complete(self, name: str, start: float, trace_id: str = None, **args) -> None:
+        """
+        Records a span from `start` until now.
+
+        Args:
+            name (str): The span name.
+            start (float): The start time from time.monotonic (the clock Textual stamps messages with).
+            trace_id (str): The trace the span belongs to.
+            **args: Extra values shown with the span.
+        """
+        if not self.enabled:
+            return
+        end = time.monotonic()
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": max(0.0, end - start) * 1e6,
+            "pid": self.pid,
+            "tid": int(trace_id) if trace_id else threading.get_ident(),
+            "args": {"trace_id": trace_id, **args}
+        })
+
+    def flush(self) -> str:
+        """
+        Writes all recorded events to the trace file atomically.
+
+        Returns:
+            str: The path written to, or None when tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        path = self.get_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f, separators=(",", ":"), default=str)
+        os.replace(tmp_path, path)
+        return path
+
+
+tracer = Tracer()
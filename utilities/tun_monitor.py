@@ -0,0 +1,170 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows, where is_supported() is False anyway
+    fcntl = None
+
+
+class TunMonitor:
+    """
+    Watches the local tun interfaces for link and IPv4 address changes.
+
+    Changes are picked up from rtnetlink link/address notifications when they are
+    available, otherwise the caller is expected to call `check` on a timer. Either
+    way the state itself is read from sysfs and the interface address, so no
+    network traffic is involved.
+
+    Only a tun interface with an address in the HTB VPN ranges counts, so another
+    VPN on the same host is reported as no connection and the caller can fall
+    back to asking the API. The ranges can be overridden with a comma separated
+    list of networks, e.g.
+
+        HTBTUI_VPN_NETWORKS="10.10.14.0/23,10.10.16.0/22" python3 htbtui.py
+    """
+
+    sysfs_path = "/sys/class/net"
+    interface_prefix = "tun"
+    networks_env_var = "HTBTUI_VPN_NETWORKS"
+    # every HTB lab VPN pool (10.10.14.0/23, 10.10.16.0/22, ...) lies in here
+    default_networks = "10.10.0.0/16"
+
+    # linux/if.h, linux/sockios.h and linux/rtnetlink.h
+    IFF_UP = 0x1
+    SIOCGIFADDR = 0x8915
+    RTMGRP_LINK = 0x1
+    RTMGRP_IPV4_IFADDR = 0x10
+
+    def __init__(self, callback) -> None:
+        """
+        Args:
+            callback: Called with the new state dict whenever the local VPN state changes.
+        """
+        self.callback = callback
+        self.vpn_networks = self.load_networks()
+        self.state = None
+        self.netlink = None
+
+    def load_networks(self) -> list:
+        """
+        Returns the HTB VPN networks, from the environment or the defaults. Invalid entries are skipped.
+        """
+        networks = []
+        for item in (os.environ.get(self.networks_env_var) or self.default_networks).split(","):
+            try:
+                networks.append(ipaddress.ip_network(item.strip(), strict=False))
+            except ValueError:
+                continue
+        return networks or [ipaddress.ip_network(self.default_networks)]
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """
+        Returns True if the local interfaces can be inspected on this system.
+        """
+        return fcntl is not None and os.path.isdir(cls.sysfs_path)
+
+    def read_state(self) -> dict:
+        """
+        Reads the state of the first tun interface with an HTB VPN address.
+
+        Returns:
+            dict: The interface name, whether it is up and its IPv4 address, e.g.
+                {"interface": "tun0", "up": True, "ip4": "10.10.14.2"}
+        """
+        try:
+            interfaces = sorted(name for name in os.listdir(self.sysfs_path) if name.startswith(self.interface_prefix))
+        except OSError:
+            interfaces = []
+
+        for interface in interfaces:
+            if self.read_flags(interface) & self.IFF_UP != self.IFF_UP:
+                continue
+            ip4 = self.read_ip4(interface)
+            if self.is_vpn_address(ip4):
+                return {"interface": interface, "up": True, "ip4": ip4}
+
+        return {"interface": None, "up": False, "ip4": None}
+
+    def is_vpn_address(self, ip4: str) -> bool:
+        if not ip4:
+            return False
+        address = ipaddress.ip_address(ip4)
+        return any(address in network for network in self.vpn_networks)
+
+    def read_flags(self, interface: str) -> int:
+        try:
+            with open(os.path.join(self.sysfs_path, interface, "flags")) as f:
+                return int(f.read().strip(), 16)
+        except (OSError, ValueError):
+            return 0
+
+    def read_ip4(self, interface: str) -> str:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                ifreq = struct.pack("256s", interface.encode()[:15])
+                address = fcntl.ioctl(sock.fileno(), self.SIOCGIFADDR, ifreq)[20:24]
+                return socket.inet_ntoa(address)
+        except OSError:
+            # the interface is up but has not been given an address yet
+            return None
+
+    def check(self) -> dict:
+        """
+        Re-reads the local state and calls the callback if it changed.
+
+        Returns:
+            dict: The current state.
+        """
+        state = self.read_state()
+        if state != self.state:
+            self.state = state
+            self.callback(state)
+        return state
+
+    def start(self) -> bool:
+        """
+        Subscribes to rtnetlink notifications on the running event loop.
+
+        Returns:
+            bool: True if notifications are active, False if the caller has to poll `check`.
+        """
+        self.check()
+        try:
+            self.netlink = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            self.netlink.bind((0, self.RTMGRP_LINK | self.RTMGRP_IPV4_IFADDR))
+            self.netlink.setblocking(False)
+            asyncio.get_running_loop().add_reader(self.netlink.fileno(), self.on_netlink_event)
+            return True
+        except (AttributeError, OSError, RuntimeError):
+            self.stop()
+            return False
+
+    def stop(self) -> None:
+        """
+        Unsubscribes from rtnetlink notifications.
+        """
+        if self.netlink is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self.netlink.fileno())
+        except RuntimeError:
+            pass
+        self.netlink.close()
+        self.netlink = None
+
+    def on_netlink_event(self) -> None:
+        # the payload is not parsed, any link or address event just triggers a re-read
+        try:
+            while self.netlink.recv(65536):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError:
+            return
+        self.check()
@@ -3,11 +3,14 @@
 # Import necessary modules or packages here
 from .active_machine import ActiveMachine
 from .current_machines import CurrentMachines
+from .dashboard_header import DashboardHeader
 from .machine_control import MachineDetails
 from .player_activity import PlayerActivity
 from .player_stats import PlayerStats
 from .output_log import OutputLog
+from .recommended_machines import RecommendedMachines
 from .retired_machines import RetiredMachines
+from .season_leaderboard import SeasonLeaderboard
 from .seasonal_machines import SeasonalMachines
 from .vpn_connection import VPNConnection
 
@@ -1,11 +1,14 @@
-import httpx
+import asyncio
+import copy
+import time
+
 import pyperclip
 
 from textual.widgets import Static
 
-from messages import DebugMessage, DataReceived
-from enums import DebugLevel
-from utilities import APIToken
+from messages import DebugMessage, DataReceived, MachineStateChanged, MachineIPAssigned
+from enums import DebugLevel, MachineState
+from utilities import APIToken, MachineLifecycle, htb_api, profiler, tracer
 
 
 class ActiveMachine(Static):
@@ -27,6 +30,12 @@ class ActiveMachine(Static):
         super().__init__(*args, **kwargs)                
         self.loading = True
         self.refresh_interval = 10
+        self.idle_refresh_interval = 60
+        self.burst_interval = 2
+        self.burst_timeout = 120
+        self.lifecycle = MachineLifecycle()
+        # set while the active machine is running with an IP, see wait_until_running
+        self.running = asyncio.Event()
         self.active_season_machine_id: int = None
         self.active_machine_data = {
             "id": None,
@@ -57,36 +66,145 @@ class ActiveMachine(Static):
     async def on_mount(self) -> None:
         """Mount the widget."""
         self.loading = True
+        self.restore_snapshot()
 
         self.run_worker(self.update_active_machine())
-        self.refresh_active_machine = self.set_interval(self.refresh_interval, self.update_active_machine)
+        self.refresh_active_machine = self.app.scheduler.add(self, self.update_active_machine, self.refresh_interval, idle_interval=self.idle_refresh_interval)
+
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known active machine from the app snapshot, marked as stale.
+        The lifecycle is left alone until live data arrives.
+        """
+        snapshot = self.app.snapshot.get("active_machine")
+        if not snapshot:
+            return
+        self.active_machine_data.update(snapshot)
+        self.loading = False
+        self.add_class("stale")
+        self.update(self.make_active_machine())
 
-    def _on_click(self) -> None:
+    async def _on_click(self) -> None:
         """
-        Event handler for when the widget is clicked.
+        Event handler for when the widget is clicked. The clipboard write shells out
+        to xclip/xsel, so it runs in a worker thread.
         """
         try:
-            pyperclip.copy(self.active_machine_data["ip"])
+            await asyncio.to_thread(pyperclip.copy, self.active_machine_data["ip"])
             self.notify("IP copied to clipboard")
             self.post_message(DebugMessage({"Copied IP": self.active_machine_data["ip"]}, DebugLevel.LOW))
         except Exception as e:
             self.post_message(DebugMessage({"Error": e}, DebugLevel.LOW))
 
-    async def update_active_machine(self) -> None:
+    @profiler.profiled("ActiveMachine.update_active_machine")
+    async def update_active_machine(self, targeted: bool = False) -> None:
         """
         Updates the active machine widget with the latest active machine data from HTB.
+
+        Args:
+            targeted (bool): Skip the machine profile request unless the active machine changed.
+        """
+        with tracer.trace("ActiveMachine.update_active_machine") as trace_id:
+            try:
+                with tracer.span("ActiveMachine.get_active_machine"):
+                    data = await self.get_active_machine(targeted)
+                self.loading = False
+                self.post_message(DataReceived(data, "active_machine", trace_id))
+                if isinstance(data, dict):
+                    self.remove_class("stale")
+                    self.observe_lifecycle(data, trace_id)
+                    self.app.snapshot.put("active_machine", self.active_machine_data)
+                elif self.has_class("stale"):
+                    return
+                self.update(self.make_active_machine())
+                if trace_id:
+                    self.call_after_refresh(tracer.complete, "ActiveMachine.repaint", time.monotonic(), trace_id)
+            except Exception as e:
+                self.update(f"Error: {e}")
+
+    async def revalidate(self) -> None:
+        """
+        Polls the active machine once, unless a burst after an action is already polling it.
+        """
+        if self.lifecycle.pending_action is None:
+            await self.update_active_machine(targeted=True)
+
+    def observe_lifecycle(self, data: dict, trace_id: str = None) -> None:
+        """
+        Feeds polled data into the lifecycle and emits events for any transition.
+
+        Args:
+            data (dict): The active machine data.
+            trace_id (str): The trace of the poll that produced the data, if tracing.
+        """
+        state_changed, ip_assigned = self.lifecycle.observe(data)
+        self.update_running()
+        if state_changed:
+            self.post_message(MachineStateChanged(self.lifecycle.state, copy.deepcopy(data), trace_id))
+        if ip_assigned:
+            self.post_message(MachineIPAssigned(self.lifecycle.ip, copy.deepcopy(data), trace_id))
+
+    def update_running(self) -> None:
+        if self.lifecycle.state is MachineState.RUNNING and self.lifecycle.pending_action is None:
+            self.running.set()
+        else:
+            self.running.clear()
+
+    async def wait_until_running(self, timeout: float = None) -> dict:
+        """
+        Waits until the active machine is running and has an IP.
+
+        Args:
+            timeout (float): Seconds to wait, forever if None.
+
+        Returns:
+            dict: The active machine data.
+
+        Raises:
+            asyncio.TimeoutError: If the machine is not up in time.
+        """
+        await asyncio.wait_for(self.running.wait(), timeout)
+        return self.active_machine_data
+
+    def begin_transition(self, action: str, machine_id: int) -> None:
+        """
+        Moves the lifecycle into a pending transition after a spawn, stop or reset
+        and starts a burst of targeted polls until it settles.
+
+        Args:
+            action (str): One of "spawn", "stop" or "reset".
+            machine_id (int): The ID of the machine the action targets.
+        """
+        state = self.lifecycle.begin(action, machine_id)
+        self.update_running()
+        self.post_message(MachineStateChanged(state, copy.deepcopy(self.active_machine_data)))
+        self.update(self.make_active_machine())
+        self.run_worker(self.poll_burst(), exclusive=True, group="lifecycle_burst")
+
+    async def poll_burst(self) -> None:
+        """
+        Polls the active machine at a short interval until the pending action settles
+        or the burst times out. The regular refresh interval is paused meanwhile.
         """
+        self.refresh_active_machine.pause()
         try:
-            data = await self.get_active_machine()            
-            self.loading = False
-            self.post_message(DataReceived(data, "active_machine"))
+            deadline = time.monotonic() + self.burst_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.burst_interval)
+                await self.update_active_machine(targeted=True)
+                if self.lifecycle.pending_action is None:
+                    return
+
+            self.post_message(DebugMessage({"Active Machine": f"{self.lifecycle.pending_action} did not settle in {self.burst_timeout}s"}, DebugLevel.LOW))
+            self.lifecycle.expire()
+            self.observe_lifecycle(self.active_machine_data)
             self.update(self.make_active_machine())
-        except Exception as e:
-            self.update(f"Error: {e}")
+        finally:
+            self.refresh_active_machine.resume()
 
-    async def get_active_machine(self):
+    async def get_active_machine(self, targeted: bool = False):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 if self.active_season_machine_id is None:
                     response = await client.get(self.base_url + self.endpoint["active_season_machine"], headers=self.headers)
 
@@ -127,6 +245,7 @@ class ActiveMachine(Static):
                         return self.active_machine_data
 
                     # assign data to self.active_machine_data
+                    previous_id = self.active_machine_data["id"]
                     self.active_machine_data["status"] = "Active"
                     self.active_machine_data["id"] = data["info"]["id"]
                     if self.active_machine_data["id"] == self.active_season_machine_id:
@@ -134,9 +253,11 @@ class ActiveMachine(Static):
                     else:
                         self.active_machine_data["season_active"] = False
                     self.active_machine_data["name"] = data["info"]["name"]
-                    if "ip" in data["info"]:
-                        self.active_machine_data["ip"] = data["info"]["ip"]
-                    
+                    self.active_machine_data["ip"] = data["info"].get("ip")
+
+                    # the profile only changes with the machine, so targeted polls skip it
+                    if targeted and previous_id == self.active_machine_data["id"]:
+                        return self.active_machine_data
 
                     # get additional machine data
                     response = await client.get(self.base_url + self.endpoint["active_machine_profile"] + str(self.active_machine_data["id"]), headers=self.headers)
@@ -171,6 +292,12 @@ class ActiveMachine(Static):
             return f"Error: {e}"
 
     def make_active_machine(self):
+        if self.lifecycle.state is MachineState.STOPPING:
+            return f"{self.active_machine_data['name'] or ''} :: [#ffb83e]stopping"
+
+        if self.lifecycle.state is MachineState.SPAWNING and self.active_machine_data["ip"] is None:
+            return f"{self.active_machine_data['name'] or ''} :: [#9fef00]spawning"
+
         if self.active_machine_data["status"] != "Active":
             return f"[b]{self.active_machine_data['status']}"
         
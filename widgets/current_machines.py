@@ -1,10 +1,9 @@
-import httpx
-
 from textual.widgets import DataTable
+from textual.widgets.data_table import RowKey
 
-from utilities import APIToken
+from utilities import APIToken, diff_releases, htb_api, metrics, profiler
 from enums import DebugLevel
-from messages import DebugMessage
+from messages import DebugMessage, MachineListUpdated
 
 class CurrentMachines(DataTable):
     """DataTable widget that shows the current machines."""
@@ -29,6 +28,7 @@ class CurrentMachines(DataTable):
         self.loading = True
         self.id = "current_machines"
         self.machine_data = {}
+        self.loaded = False
         self.show_header = True
         self.cursor_type = "row"
 
@@ -37,32 +37,109 @@ class CurrentMachines(DataTable):
         self.add_column(label="ID")
         self.add_column(label="Name")
         self.add_column(label="OS")
-        self.add_column(label="User")
-        self.add_column(label="Root")
+        self.add_column(label="User", key="user")
+        self.add_column(label="Root", key="root")
         self.add_column(label="Points")
         self.add_column(label="Rating")
 
 
     async def on_mount(self) -> None:
         """Mount the widget."""
+        self.restore_snapshot()
+
+    def load(self) -> None:
+        """
+        Starts loading the machines the first time the tab is needed.
+        """
+        if self.loaded:
+            return
+        self.loaded = True
         self.run_worker(self.update_machine_list())
 
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known machine list from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("current_machines")
+        if not snapshot:
+            return
+        self.machine_data = {int(id): data for id, data in snapshot.items()}
+        self.loading = False
+        self.add_class("stale")
+        self.make_machine_list()
+
     async def reload_machines(self) -> None:
         """Reload the machines."""
         self.loading = True
         self.run_worker(self.update_machine_list())
 
+    @profiler.profiled("CurrentMachines.update_machine_list")
     async def update_machine_list(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
         """       
         try:
-            await self.get_machine_list()
+            data = await self.get_machine_list()
+            if not isinstance(data, dict):
+                # keep whatever is on screen, e.g. the snapshot
+                self.loading = False
+                return data
             self.loading = False
+            self.remove_class("stale")
             self.make_machine_list()
+            self.app.snapshot.put("current_machines", self.machine_data)
         except Exception as e:
             return f"Error: {e}"
 
+    @staticmethod
+    def parse_machine(machine: dict) -> dict:
+        """
+        Picks the fields the table and the details panel use from an API machine.
+        """
+        return {
+            "name": machine["name"],
+            "id": machine["id"],
+            "os": machine["os"],
+            "difficulty": machine["difficultyText"],
+            "user_owned": machine["authUserInUserOwns"],
+            "root_owned": machine["authUserInRootOwns"],
+            "points": machine["points"],
+            "rating": machine["star"],
+            "release": machine["release"],
+            "active": machine["active"],
+            "labels": machine["labels"],
+            "feedbackForChart": machine["feedbackForChart"],
+            "is_competitive": machine["is_competitive"],
+            "user_owns_count": machine["user_owns_count"],
+            "root_owns_count": machine["root_owns_count"],
+        }
+
+    async def check_releases(self) -> list:
+        """
+        Revalidates the machine list and redraws it only if machines were added.
+
+        Returns:
+            list: (machine, reason) tuples for the new machines, see diff_releases.
+        """
+        if not self.loaded or not self.machine_data:
+            # nothing shown yet, the first load brings everything in
+            return []
+        response = await htb_api.get_if_changed(self.base_url + self.endpoint, headers=self.headers)
+        if response is None:
+            return []
+        if response.status_code != 200:
+            self.post_message(DebugMessage({"Current Machines Release Check": f"Error: {response.status_code} - {response.text}"}, DebugLevel.LOW))
+            return []
+
+        data = await htb_api.json(response)
+        machine_data = {machine["id"]: self.parse_machine(machine) for machine in data["data"]}
+        releases = diff_releases(list(self.machine_data.values()), list(machine_data.values()))
+        if releases:
+            self.machine_data = machine_data
+            self.make_machine_list()
+            self.app.snapshot.put("current_machines", self.machine_data)
+        return releases
+
     async def get_machine_list(self):
         """
         Retrieves the list of machines from the server.
@@ -78,12 +155,12 @@ class CurrentMachines(DataTable):
         Raises:
             str: An error message if an exception occurs during the retrieval process.
         """
-        self.machine_data = {}
+        machine_data = {}
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint, headers=self.headers)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await htb_api.json(response)
 
                     self.post_message(DebugMessage({"Current Machines": data}, DebugLevel.MEDIUM))
 
@@ -138,23 +215,9 @@ class CurrentMachines(DataTable):
                         }
                     """
                     for machine in data["data"]:
-                        self.machine_data[machine["id"]] = {
-                                "name": machine["name"],
-                                "id": machine["id"],
-                                "os": machine["os"],
-                                "difficulty": machine["difficultyText"],
-                                "user_owned": machine["authUserInUserOwns"],
-                                "root_owned": machine["authUserInRootOwns"],
-                                "points": machine["points"],
-                                "rating": machine["star"],
-                                "release": machine["release"],
-                                "active": machine["active"],
-                                "labels": machine["labels"],
-                                "feedbackForChart": machine["feedbackForChart"],
-                                "is_competitive": machine["is_competitive"],
-                                "user_owns_count": machine["user_owns_count"],
-                                "root_owns_count": machine["root_owns_count"],
-                            }
+                        machine_data[machine["id"]] = self.parse_machine(machine)
+
+                    self.machine_data = machine_data
                                                             
                         
                     print(f"Machine Data: {self.machine_data}")
@@ -164,6 +227,27 @@ class CurrentMachines(DataTable):
         except Exception as e:
             return f"Error: {e}"
 
+    def apply_owns(self, machine_id: int, user_owned: bool, root_owned: bool) -> None:
+        """
+        Updates the owns of one machine in place, e.g. after an accepted flag.
+
+        Args:
+            machine_id (int): The ID of the machine.
+            user_owned (bool): Whether the user flag is owned.
+            root_owned (bool): Whether the root flag is owned.
+        """
+        machine = self.machine_data.get(machine_id)
+        if machine is None:
+            return
+        machine["user_owned"] = user_owned
+        machine["root_owned"] = root_owned
+        row_key = RowKey(machine_id)
+        if row_key in self.rows:
+            self.update_cell(row_key, "user", "✅" if user_owned else "❌")
+            self.update_cell(row_key, "root", "✅" if root_owned else "❌")
+
+    @profiler.profiled("CurrentMachines.make_machine_list")
+    @metrics.timed("htbtui_render_duration_ms", handler="CurrentMachines.make_machine_list")
     def make_machine_list(self):
         """ 
         iterate over the machine list and add a row for each machine
@@ -181,6 +265,8 @@ class CurrentMachines(DataTable):
             }
         }
         """
+        cursor_row = self.cursor_row
+        self.clear()
             
         for id, data in self.machine_data.items():
             self.add_row(                
@@ -192,4 +278,6 @@ class CurrentMachines(DataTable):
                 str(data['points']),
                 str(data['rating']),
                 key=id)
-            
\ No newline at end of file
+
+        self.move_cursor(row=cursor_row)
+        self.post_message(MachineListUpdated(self.id))
\ No newline at end of file
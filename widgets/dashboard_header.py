@@ -0,0 +1,29 @@
+from textual.app import ComposeResult
+from textual.events import Mount
+from textual.widgets import Header
+from textual.widgets._header import HeaderClock, HeaderIcon, HeaderTitle
+
+
+class ScheduledHeaderClock(HeaderClock):
+    """
+    The header clock, ticked by the app's poll scheduler instead of its own timer,
+    so it shares wake-ups with the pollers and stops while the app is idle.
+    """
+
+    def _on_mount(self, event: Mount) -> None:
+        # skip HeaderClock's own one second interval
+        event.prevent_default()
+        self.app.scheduler.add(self, self.refresh, 1, name="header clock")
+
+
+class DashboardHeader(Header):
+    """Header with a clock driven by the poll scheduler."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs["show_clock"] = True
+        super().__init__(*args, **kwargs)
+
+    def compose(self) -> ComposeResult:
+        yield HeaderIcon()
+        yield HeaderTitle()
+        yield ScheduledHeaderClock()
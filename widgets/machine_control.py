@@ -1,19 +1,28 @@
-import httpx
+import asyncio
+import time
 from datetime import datetime
+from functools import lru_cache
 from textual import on
 from textual.app import ComposeResult
 from textual.widgets import Static, Button, Sparkline, Label, Rule, Input
 from textual.containers import Container
-from textual.reactive import Reactive
 
 from rich.table import Table
 
-from utilities import APIToken
-from enums import DebugLevel
-from messages import DebugMessage, LogMessage
+from utilities import APIToken, FlagQueue, LRUCache, htb_api, memory_budget, metrics, profiler, tracer
+from enums import DebugLevel, MachineState
+from messages import DebugMessage, LogMessage, MachineActionRequested, FlagSubmitted
 from messages.log_message import LogMessage
 
 
+@lru_cache(maxsize=1024)
+def format_release_date(release: str) -> str:
+    """
+    Converts an HTB release timestamp to a human readable date.
+    """
+    return datetime.strptime(release, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%B %d, %Y")
+
+
 class MachineDetails(Static):
     """Static widget that shows the current machines."""
 
@@ -21,6 +30,9 @@ class MachineDetails(Static):
     base_url = "https://labs.hackthebox.com"
     endpoint = "/api/v4/search/fetch?query=" # + keyword + "&tags=" + filter
     endpoints = {
+        "GET": {
+            "machine_profile": "/api/v4/machine/profile/", # + machine_id
+        },
         "POST": {
             "spawn_machine": "/api/v4/vm/spawn", # POST DATA {"machine_id": id}
             "terminate_machine": "/api/v4/vm/terminate", # POST DATA {"machine_id": id}
@@ -43,11 +55,14 @@ class MachineDetails(Static):
             "Hard": "#fe0000",
             "Insane": "#ffccff"
         }
-    
-    active_machine_data = Reactive({})
+    detail_fields = ("os", "difficulty", "user_owned", "root_owned", "points", "rating", "user_owns_count", "root_owns_count", "release")
+    panel_cache_size = 64
+    profile_cache_size = 128
+    profile_prefetch_limit = 3
+    flag_retry_interval = 5
 
     """
-    Example data :
+    Example active_machine_data :
     {
         "id": None,
         "status": None, 
@@ -78,6 +93,18 @@ class MachineDetails(Static):
         super().__init__(*args, **kwargs)        
         self.selected_machine_id: int = 0
         self.selected_machine_data = {}  
+        self.active_machine_data = {}
+        self.machine_state = MachineState.IDLE
+        self.panel_cache = LRUCache(memory_budget.cache_size(self.panel_cache_size))
+        self.profile_cache = LRUCache(memory_budget.cache_size(self.profile_cache_size))
+        self.profile_requests = {}
+        # the machines around the cursor at the last prefetch
+        self.profile_window = set()
+        self.profile_semaphore = asyncio.Semaphore(self.profile_prefetch_limit)
+        metrics.register_cache("machine_panels", self.panel_cache)
+        metrics.register_cache("machine_profiles", self.profile_cache)
+        self.flag_queue = FlagQueue()
+        self.flag_lock = asyncio.Lock()
         self.border_title = "Machine Info" 
         
         # self.loading = True
@@ -102,6 +129,16 @@ class MachineDetails(Static):
             yield Button("Stop Machine", id="stop_machine_button", variant="error")
             yield Button("Reset Machine", id="reset_machine_button", variant="default")
 
+    def on_mount(self) -> None:
+        """Mount the widget."""
+        self.flag_queue.load()
+        self.flag_retry = self.app.scheduler.add(self, self.process_flag_queue, self.flag_retry_interval, idle_interval=self.flag_retry_interval)
+        if self.flag_queue.pending:
+            self.app.post_message(LogMessage(f"[+] Resuming {len(self.flag_queue.pending)} queued flag submission(s)"))
+            self.run_worker(self.process_flag_queue(), group="flag_queue")
+        else:
+            self.flag_retry.pause()
+
     def set_context(self, machine_id: int, machine_data: dict) -> None:
         """
         Selects a machine from the list of current machines.
@@ -133,18 +170,46 @@ class MachineDetails(Static):
         """
         Returns True if there is an active machine, otherwise False.
         """
-        return self.active_machine_data
-    
-    def watch_active_machine_data(self, old_value, new_value) -> None:
+        return bool(self.active_machine_data)
+
+    def is_arena_machine(self) -> bool:
         """
-        Watches the active machine data for changes.
+        Returns True if the active machine is the seasonal arena machine.
         """
-        self.app.post_message(LogMessage(f"[+] Active machine data changed from: {old_value} to: {new_value}"))
         if self.has_active_machine():
-            id = new_value["id"]
-            self.set_context(id, new_value)
+            return bool(self.active_machine_data.get("season_active"))
+        return bool(self.selected_machine_data.get("is_competitive"))
+
+    def apply_machine_state(self, state: MachineState, machine_data: dict, trace_id: str = None) -> None:
+        """
+        Updates the context and controls from an active machine lifecycle transition.
+
+        Args:
+            state (MachineState): The new lifecycle state.
+            machine_data (dict): The active machine data at the time of the transition.
+            trace_id (str): The trace of the poll that observed the transition, if tracing.
+        """
+        self.app.post_message(LogMessage(f"[+] Active machine state changed from: {self.machine_state.value} to: {state.value}"))
+        had_active_machine = self.has_active_machine()
+        self.machine_state = state
+
+        if state is MachineState.IDLE or machine_data.get("id") is None:
+            self.active_machine_data = {}
+            if had_active_machine:
+                self.clear_context()
+            else:
+                self.handle_display_controls()
+            return
+
+        self.active_machine_data = machine_data
+        # only rebuild the details when the machine itself changed
+        if machine_data["id"] != self.selected_machine_id and machine_data.get("difficulty") is not None:
+            with tracer.span("MachineDetails.set_context", trace_id):
+                self.set_context(machine_data["id"], machine_data)
         else:
-            self.clear_context()
+            self.handle_display_controls()
+        if trace_id:
+            self.call_after_refresh(tracer.complete, "MachineDetails.repaint", time.monotonic(), trace_id)
 
     def enable_controls(self) -> None:
         """
@@ -166,7 +231,12 @@ class MachineDetails(Static):
 
     def handle_display_controls(self) -> None:
         
-        self.enable_controls()
+        if self.machine_state in (MachineState.SPAWNING, MachineState.STOPPING):
+            self.disable_controls()
+            self.border_subtitle = self.machine_state.value
+        else:
+            self.enable_controls()
+            self.border_subtitle = ""
 
         if self.has_active_machine():
             self.add_class("active")
@@ -178,23 +248,57 @@ class MachineDetails(Static):
             self.remove_class("active")
             self.remove_class("inactive")
 
-    def make_feedback_sparkline(self) -> None:
+    def make_feedback_sparkline(self) -> list:
         """
-        Makes the feedback sparkline.
+        Makes the feedback sparkline data.
+
+        Returns:
+            list: The easy, medium and hard slices of the user rated difficulty.
         """
         feedback = self.selected_machine_data["feedbackForChart"]
         feedback_data = []
         for _, value in feedback.items():
             feedback_data.append(value)
         
-        self.query_one("#feedback_sparkline_easy").data = feedback_data[slice(3)]
-        self.query_one("#feedback_sparkline_medium").data = feedback_data[slice(3, 6)]
-        self.query_one("#feedback_sparkline_hard").data = feedback_data[slice(7, 10)]
+        return [feedback_data[slice(3)], feedback_data[slice(3, 6)], feedback_data[slice(7, 10)]]
+
+    def show_feedback_sparkline(self, feedback: list) -> None:
+        """
+        Shows the feedback sparklines, leaving unchanged ones alone.
+        """
+        for sparkline_id, data in zip(("#feedback_sparkline_easy", "#feedback_sparkline_medium", "#feedback_sparkline_hard"), feedback):
+            sparkline = self.query_one(sparkline_id)
+            if sparkline.data != data:
+                sparkline.data = data
 
+    @profiler.profiled("MachineDetails.make_machine_details")
+    @metrics.timed("htbtui_render_duration_ms", handler="MachineDetails.make_machine_details")
+    def make_machine_details(self) -> Table:
+        """
+        Makes the machine details, reusing the rendered panel while the data is unchanged.
+        """
+        machine_id = int(self.selected_machine_data.get("id") or self.selected_machine_id)
+        profile = self.profile_cache.get(machine_id, count=False)
+        fingerprint = (
+            tuple(self.selected_machine_data.get(field) for field in self.detail_fields),
+            tuple(self.selected_machine_data["feedbackForChart"].values()),
+            profile is not None
+        )
+
+        cached = self.panel_cache.get(machine_id)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, self.build_machine_details(profile), self.make_feedback_sparkline())
+            self.panel_cache.put(machine_id, cached)
+
+        self.show_feedback_sparkline(cached[2])
+        return cached[1]
 
-    def make_machine_details(self) -> None:
+    def build_machine_details(self, profile: dict = None) -> Table:
         """
-        Makes the machine details.
+        Builds the machine details table.
+
+        Args:
+            profile (dict): The machine profile, if it has been fetched.
         """
         table = Table.grid(expand=True)
         table.add_column(justify="justify")
@@ -239,13 +343,70 @@ class MachineDetails(Static):
         table.add_row("Root Owns", str(self.selected_machine_data["root_owns_count"]))
 
         # convert release date string to human readable format
-        release_date = datetime.strptime(self.selected_machine_data["release"], "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%B %d, %Y")
+        release_date = format_release_date(self.selected_machine_data["release"])
         table.add_row("Release", release_date)
 
-        self.make_feedback_sparkline()
+        if profile is not None:
+            makers = [maker["name"] for maker in (profile.get("maker"), profile.get("maker2")) if maker]
+            if makers:
+                table.add_row("Maker", ", ".join(makers))
+            play_info = profile.get("playInfo") or {}
+            if play_info.get("active_player_count") is not None:
+                table.add_row("Playing", str(play_info["active_player_count"]))
 
         return table
 
+    def prefetch_profiles(self, machine_ids: list) -> None:
+        """
+        Fetches the profiles of machines that are likely to be shown next.
+
+        Args:
+            machine_ids (list): The machine IDs, closest to the cursor first.
+        """
+        self.profile_window = set(machine_ids)
+        for machine_id in machine_ids:
+            if machine_id in self.profile_cache or machine_id in self.profile_requests:
+                continue
+            self.profile_requests[machine_id] = self.run_worker(self.fetch_profile(machine_id, prefetch=True), group="profile_prefetch")
+
+    @profiler.profiled("MachineDetails.fetch_profile")
+    async def fetch_profile(self, machine_id: int, prefetch: bool = False) -> None:
+        """
+        Fetches a machine profile into the cache and refreshes the panel if it is shown.
+
+        Args:
+            machine_id (int): The ID of the machine.
+            prefetch (bool): Drop the request if the cursor has moved away while it was queued.
+        """
+        try:
+            async with self.profile_semaphore:
+                if prefetch and machine_id not in self.profile_window:
+                    # scrolled away while waiting for a slot
+                    return
+                data = await self.get_machine_profile(machine_id)
+        finally:
+            self.profile_requests.pop(machine_id, None)
+
+        if not isinstance(data, dict):
+            self.app.post_message(DebugMessage({"Machine Profile Error": data}, DebugLevel.LOW))
+            return
+
+        self.profile_cache.put(machine_id, data)
+        if self.selected_machine_data and int(self.selected_machine_data.get("id") or self.selected_machine_id) == machine_id:
+            self.query_one("#machine_details").update(self.make_machine_details())
+
+    async def get_machine_profile(self, machine_id: int):
+        try:
+            async with htb_api.session() as client:
+                response = await client.get(self.base_url + self.endpoints["GET"]["machine_profile"] + str(machine_id), headers=self.headers)
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
+                data = response.json()
+
+                return data["info"]
+        except Exception as e:
+            return f"Error: {e}"
+
     @on(Button.Pressed, selector="#spawn_machine_button")
     async def spawn_button_pressed(self) -> None:
         """
@@ -253,7 +414,8 @@ class MachineDetails(Static):
         """
         self.disable_controls()
         id : int = self.selected_machine_id
-        await self.start_machine(id)
+        if not await self.start_machine(id):
+            self.handle_display_controls()
 
     async def start_machine(self, machine_id: int) -> bool:
         """
@@ -271,11 +433,32 @@ class MachineDetails(Static):
         else:
             self.app.post_message(LogMessage(f"[+] Starting machine with id: {machine_id}"))
             data = await self.spawn_machine(machine_id)
-        if data:
-            self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))
-            if "message" in data:            
-                self.app.post_message(LogMessage(f"[+] Machine started: {machine_id}"))
-                self.notify(data["message"])
+        return self.handle_action_response("spawn", machine_id, data)
+
+    def handle_action_response(self, action: str, machine_id: int, data) -> bool:
+        """
+        Reports the response of a spawn, stop or reset request and, when it was
+        accepted, hands the transition over to the active machine lifecycle.
+
+        Args:
+            action (str): One of "spawn", "stop" or "reset".
+            machine_id (int): The ID of the machine the action targets.
+            data: The decoded response, or an error string.
+
+        Returns:
+            bool: True if the action was accepted, otherwise False.
+        """
+        self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))
+        if not isinstance(data, dict):
+            self.app.post_message(LogMessage(f"[!] {data}"))
+            self.notify(str(data), severity="error")
+            return False
+
+        if "message" in data:
+            self.app.post_message(LogMessage(f"[+] {action}: {data['message']}"))
+            self.notify(data["message"])
+        self.post_message(MachineActionRequested(action, machine_id))
+        return True
                 
     @on(Button.Pressed, selector="#stop_machine_button")
     async def stop_button_pressed(self) -> None:
@@ -283,7 +466,8 @@ class MachineDetails(Static):
         Event handler for when the stop machine button is pressed.
         """
         self.disable_controls()
-        await self.stop_machine()            
+        if not await self.stop_machine():
+            self.handle_display_controls()
 
     async def stop_machine(self) -> bool:
         """
@@ -292,18 +476,14 @@ class MachineDetails(Static):
         Returns:
             bool: True if the machine was stopped, otherwise False.
         """
-        if self.active_machine_data["season_active"]:
+        machine_id = self.active_machine_data.get("id", self.selected_machine_id)
+        if self.is_arena_machine():
             self.app.post_message(LogMessage(f"[-] Stopping arena machine"))
             data = await self.stop_arena_machine()
         else:
-            machine_id = self.active_machine_data["id"]
             self.app.post_message(LogMessage(f"[-] Stopping machine with id: {machine_id}"))
             data = await self.terminate_machine(machine_id)
-        if data:
-            self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))
-            if "message" in data:
-                self.app.post_message(LogMessage(f"[+] Machine stopped"))
-                self.notify("Machine stopped")
+        return self.handle_action_response("stop", machine_id, data)
 
     @on(Button.Pressed, selector="#reset_machine_button")
     async def reset_button_pressed(self) -> None:
@@ -311,29 +491,24 @@ class MachineDetails(Static):
         Event handler for when the reset machine button is pressed.
         """
         self.disable_controls()
-        self.app.post_message(LogMessage(f"[-] Restting machine with id: {self.selected_machine_id}"))
-        await self.reset_machine()
-        self.enable_controls()
+        if not await self.reset_machine():
+            self.handle_display_controls()
 
-    async def reset_machine(self) -> None:
+    async def reset_machine(self) -> bool:
         """
         Resets the active machine.
 
         Returns:
-            None
+            bool: True if the reset was accepted, otherwise False.
         """
-        if self.active_machine_data["season_active"]:
+        machine_id = self.selected_machine_id
+        if self.is_arena_machine():
             self.app.post_message(LogMessage(f"[-] Resetting arena machine"))
             data = await self.reset_arena_machine()
         else:
-            machine_id = self.selected_machine_id
             self.app.post_message(LogMessage(f"[-] Resetting machine with id: {machine_id}"))
             data = await self.respawn_machine(machine_id)
-        if data:
-            self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))  
-            if "message" in data:
-                self.app.post_message(DebugMessage({f"[!] {data['message']}"}, DebugLevel.LOW))
-                self.notify(data["message"])
+        return self.handle_action_response("reset", machine_id, data)
 
     @on(Input.Submitted, selector="#submit_flag_input")
     async def handle_input(self, event: Input.Submitted) -> None:
@@ -347,7 +522,10 @@ class MachineDetails(Static):
 
     async def submit_flag(self, flag: str, machine_id: int = None) -> None:
         """
-        Submits a flag for the active machine.
+        Queues a flag for the selected machine and submits it.
+
+        The flag is checked locally first. Submissions that fail for a transient
+        reason stay queued, on disk, and are retried with backoff.
 
         Args:
             flag (str): The flag to submit.
@@ -356,22 +534,93 @@ class MachineDetails(Static):
         Returns:
             None
         """
-        if self.active_machine_data["season_active"]:
+        entry, reason = self.flag_queue.add(machine_id, flag, self.is_arena_machine())
+        if entry is None:
+            self.app.post_message(LogMessage(f"[!] {reason}"))
+            self.notify(reason, severity="error")
+            return
+
+        if entry["arena"]:
             self.app.post_message(LogMessage(f"[+] Submitting flag for arena machine"))
-            data = await self.send_arena_flag(flag)
         else:
             self.app.post_message(LogMessage(f"[+] Submitting flag for machine with id: {machine_id}"))
-            data = await self.send_flag(flag, machine_id)
-        if data:
-            self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))
-            if "message" in data:
-                self.app.post_message(LogMessage(f"[!] {data['message']}"))
-                self.notify(data["message"])
+        await self.process_flag_queue()
+
+    async def process_flag_queue(self) -> None:
+        """
+        Sends every queued flag that is due and reports the results.
+        """
+        async with self.flag_lock:
+            for entry in self.flag_queue.due():
+                if entry["arena"]:
+                    status_code, data = await self.send_arena_flag(entry["flag"])
+                else:
+                    status_code, data = await self.send_flag(entry["flag"], entry["machine_id"])
+                self.app.post_message(DebugMessage({f"[!] {data}"}, DebugLevel.LOW))
+                outcome = self.flag_queue.complete(entry, status_code, data)
+                self.report_flag_result(entry, outcome, data)
+
+        if self.flag_queue.pending:
+            if self.flag_retry.paused:
+                self.flag_retry.resume()
+        elif not self.flag_retry.paused:
+            self.flag_retry.pause()
+
+    def report_flag_result(self, entry: dict, outcome: str, data) -> None:
+        """
+        Logs the outcome of a submission attempt and reconciles accepted flags.
+
+        Args:
+            entry (dict): The queued entry.
+            outcome (str): "accepted", "rejected" or "retry".
+            data: The decoded response, or an error string.
+        """
+        message = data.get("message", outcome) if isinstance(data, dict) else str(data)
+        if outcome == "retry":
+            retry_in = entry["next_attempt"] - time.time()
+            self.app.post_message(LogMessage(f"[!] {message}, flag for machine {entry['machine_id']} queued, retrying in {retry_in:.0f}s"))
+            if entry["attempts"] == 1:
+                self.notify(f"{message}\nThe flag is queued and will be retried.", severity="warning")
+        elif outcome == "rejected":
+            self.app.post_message(LogMessage(f"[!] {message}"))
+            self.notify(message, severity="error")
+        else:
+            self.app.post_message(LogMessage(f"[+] {message}"))
+            self.notify(message)
+            self.post_message(FlagSubmitted(entry["machine_id"], data))
+
+    def apply_owns(self, machine_id: int, user_owned: bool, root_owned: bool) -> None:
+        """
+        Updates the owns of the shown machine, e.g. after an accepted flag.
+        """
+        for machine_data in (self.selected_machine_data, self.active_machine_data):
+            if machine_data and int(machine_data.get("id") or 0) == machine_id:
+                machine_data["user_owned"] = user_owned
+                machine_data["root_owned"] = root_owned
+        if self.selected_machine_data and int(self.selected_machine_data.get("id") or self.selected_machine_id) == machine_id:
+            self.query_one("#machine_details").update(self.make_machine_details())
+
+    async def refresh_profile(self, machine_id: int):
+        """
+        Drops the cached profile of a machine and fetches it again.
+
+        Args:
+            machine_id (int): The ID of the machine.
+
+        Returns:
+            dict: The fresh profile, or None if the request failed.
+        """
+        self.profile_cache.pop(machine_id)
+        self.panel_cache.pop(machine_id)
+        await self.fetch_profile(machine_id)
+        return self.profile_cache.get(machine_id)
 
     async def spawn_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["spawn_machine"], headers=self.headers, data={"machine_id": machine_id})
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data
@@ -381,8 +630,10 @@ class MachineDetails(Static):
     
     async def terminate_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["terminate_machine"], headers=self.headers, data={"machine_id": machine_id})
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
@@ -391,8 +642,10 @@ class MachineDetails(Static):
         
     async def respawn_machine(self, machine_id: int):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["reset_machine"], headers=self.headers, data={"machine_id": machine_id})
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
@@ -401,8 +654,10 @@ class MachineDetails(Static):
         
     async def start_arena_machine(self):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["start_arena_machine"], headers=self.headers)
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
@@ -411,8 +666,10 @@ class MachineDetails(Static):
         
     async def stop_arena_machine(self):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["stop_arena_machine"], headers=self.headers)
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
@@ -421,30 +678,40 @@ class MachineDetails(Static):
         
     async def reset_arena_machine(self):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["reset_arena_machine"], headers=self.headers)
+                if response.status_code != 200:
+                    return f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
                 return data                
         except Exception as e:
             return f"Error: {e}"
         
-    async def send_flag(self, flag: str, machine_id: int):
+    async def send_flag(self, flag: str, machine_id: int) -> tuple:
+        """
+        Returns:
+            tuple: The status code, None if the request failed, and the decoded response or an error string.
+        """
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["submit_flag"], headers=self.headers, data={"id": machine_id, "flag": flag})
+                if response.status_code != 200:
+                    return response.status_code, f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
-                return data                
+                return response.status_code, data
         except Exception as e:
-            return f"Error: {e}"
+            return None, f"Error: {e}"
         
-    async def send_arena_flag(self, flag: str):
+    async def send_arena_flag(self, flag: str) -> tuple:
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.post(self.base_url + self.endpoints["POST"]["submit_arena_flag"], headers=self.headers, data={"flag": flag})
+                if response.status_code != 200:
+                    return response.status_code, f"Error: {response.status_code} - {response.text}"
                 data = response.json()
                 
-                return data                
+                return response.status_code, data
         except Exception as e:
-            return f"Error: {e}"
\ No newline at end of file
+            return None, f"Error: {e}"
@@ -1,7 +1,15 @@
+import asyncio
+from collections import deque
+
 from textual import on
 from textual.widgets import RichLog
 
+from rich.highlighter import ReprHighlighter
+from rich.pretty import pretty_repr
+from rich.text import Text
+
 from messages import DebugMessage, DataReceived, LogMessage
+from utilities import memory_budget
 
 
 class OutputLog(RichLog):
@@ -13,7 +21,52 @@ class OutputLog(RichLog):
         """
         Initializes the widget.
         """
+        kwargs.setdefault("max_lines", memory_budget.log_max_lines)
         super().__init__(*args, **kwargs)
+        self.pending = deque()
+        self.draining = False
+        self.highlighter = ReprHighlighter()
+
+    def append(self, content) -> None:
+        """
+        Queues content to be written to the log.
+
+        API payloads can be large, so dicts and lists are pretty-printed in a
+        worker thread instead of on the event loop. Everything goes through the
+        same queue to keep the log in order.
+
+        Args:
+            content: A string, renderable, dict or list.
+        """
+        self.pending.append(content)
+        if not self.draining:
+            self.draining = True
+            self.run_worker(self.drain_pending(), group="output_log")
+
+    async def drain_pending(self) -> None:
+        """
+        Writes queued content to the log in order.
+        """
+        try:
+            while self.pending:
+                content = self.pending.popleft()
+                if isinstance(content, (dict, list)):
+                    content = await asyncio.to_thread(self.format_payload, content, max(40, self.size.width - 2))
+                self.write(content)
+        finally:
+            self.draining = False
+
+    def format_payload(self, payload, width: int) -> Text:
+        """
+        Pretty-prints and highlights a payload, as RichLog would for a dict or list.
+        Containers are truncated to the memory budget, a full machine list would
+        otherwise keep thousands of lines in the log.
+
+        Args:
+            payload: The dict or list to format.
+            width (int): The width to wrap the output at.
+        """
+        return self.highlighter(Text(pretty_repr(payload, max_width=width, max_length=memory_budget.log_payload_max_items, max_string=500)))
 
     # def _on_click(self) -> None:
     #     """
@@ -30,7 +83,7 @@ class OutputLog(RichLog):
             message (DebugMessage): The debug message to log.
         """
         if message.debug_level.value <= self.debug_level.value:
-            self.write(message.debug_data)
+            self.append(message.debug_data)
 
     @on(DataReceived)
     def log_data_received(self, message: DataReceived) -> None:
@@ -40,7 +93,7 @@ class OutputLog(RichLog):
         Args:
             message (DataReceived): The data received message to log.
         """
-        self.write(message.data)
+        self.append(message.data)
 
     @on(LogMessage)
     def log_messages(self, message: LogMessage) -> None:
@@ -50,4 +103,4 @@ class OutputLog(RichLog):
         Args:
             message (LogMessage): The log message to log.
         """
-        self.write(message.message)
+        self.append(message.message)
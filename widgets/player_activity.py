@@ -1,14 +1,24 @@
-import httpx
-
 from textual.app import ComposeResult
 from textual.containers import Container
 from textual.widgets import DataTable, Static
 
-from utilities import APIToken
+from utilities import APIToken, htb_api, profiler
 from enums import DebugLevel
 from messages import DebugMessage
 
 
+class ActivityDate(str):
+    """
+    The relative date cell of an activity row ("2 minutes ago"), which also
+    carries the activity key of its row so the rows can be ordered by it.
+    """
+
+    def __new__(cls, text: str, key: str) -> "ActivityDate":
+        cell = super().__new__(cls, text)
+        cell.key = key
+        return cell
+
+
 class PlayerActivity(Static):
     """Static widget that shows the player stats."""
 
@@ -18,6 +28,8 @@ class PlayerActivity(Static):
         "info": "/api/v4/user/info",
         "profile_activity": "/api/v4/profile/activity/" # + user_id 
     }
+    refresh_interval = 300
+    max_rows = 100
     headers = {
             "Authorization": f"Bearer {APIToken(token_name).get_token()}",
             "Accept": "application/json, text/plain, */*",
@@ -31,6 +43,7 @@ class PlayerActivity(Static):
             "id" : None,
         }
         self.activity_data = []
+        self.activity_keys = set()
 
 
     def compose(self) -> ComposeResult:
@@ -40,7 +53,7 @@ class PlayerActivity(Static):
         dt.add_column(label="Activity")
         dt.add_column(label="Target")
         dt.add_column(label="Points")
-        dt.add_column(label="Date")
+        dt.add_column(label="Date", key="date")
 
         with Container(id="player_activity_container"):
             yield dt
@@ -48,16 +61,53 @@ class PlayerActivity(Static):
     async def on_mount(self) -> None:
         """Mount the widget."""
         self.loading = True
+        self.restore_snapshot()
         self.run_worker(self.update_activity())
+        # new activity only comes from playing, so this sleeps while the app is idle
+        self.refresh_activity_timer = self.app.scheduler.add(self, self.refresh_activity, self.refresh_interval)
 
+    def refresh_activity(self) -> None:
+        """
+        Fetches the activity again and merges in anything new, e.g. after an own.
+        """
+        self.run_worker(self.update_activity(), exclusive=True, group="activity_refresh")
+
+    @staticmethod
+    def activity_key(activity: dict) -> str:
+        """
+        Returns a stable key for an activity entry.
+        """
+        return f"{activity.get('object_type')}:{activity.get('id')}:{activity.get('type')}:{activity.get('date')}"
+
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known activity from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("player_activity")
+        if not snapshot:
+            return
+        self.activity_data = snapshot
+        self.activity_keys = {self.activity_key(activity) for activity in self.activity_data}
+        self.make_activity_list()
+        self.loading = False
+        self.add_class("stale")
+
+    @profiler.profiled("PlayerActivity.update_activity")
     async def update_activity(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
         """       
         try:
-            await self.get_activity_list()
-            self.make_activity_list()
-            self.loading = False            
+            data = await self.get_activity_list()
+            self.loading = False
+            if isinstance(data, str):
+                # keep whatever is on screen, e.g. the snapshot
+                self.post_message(DebugMessage({"Error": data}, DebugLevel.MEDIUM))
+                return
+            self.remove_class("stale")
+            new_count = self.merge_activity(data)
+            self.update_activity_rows(new_count)
+            self.app.snapshot.put("player_activity", self.activity_data)
         except Exception as e:
             self.post_message(DebugMessage({"Error": e}, DebugLevel.MEDIUM))
 
@@ -69,7 +119,7 @@ class PlayerActivity(Static):
             str: The user ID.
         """
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint["info"], headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -89,32 +139,101 @@ class PlayerActivity(Static):
                 If successful, returns the activity data as a list.
                 If an error occurs, returns an error message.
             """
-            self.activity_data = []
             try:
-                await self.get_user_id()
-                async with httpx.AsyncClient() as client:
+                if self.user_data["id"] is None:
+                    await self.get_user_id()
+                async with htb_api.session() as client:
                     response = await client.get(self.base_url + self.endpoint["profile_activity"] + str(self.user_data["id"]), headers=self.headers)
                     if response.status_code == 200:
-                        data = response.json()
+                        data = await htb_api.json(response)
                         
                         self.post_message(DebugMessage({"Player Activity": data}, DebugLevel.MEDIUM))
 
-                        self.activity_data = data["profile"]["activity"]
-
-                        return self.make_activity_list()
+                        return data["profile"]["activity"]
                         
                     else:
                         return f"Error: {response.status_code} - {response.text}"
             except Exception as e:
                 return f"Error: {e}"
 
-    def make_activity_list(self): 
+    def merge_activity(self, activity_list: list) -> int:
+        """
+        Merges the entries newer than the last seen one into the activity data,
+        refreshes the relative date of the entries already there and trims the
+        data to `max_rows`.
+
+        Args:
+            activity_list (list): The activity as returned by HTB, newest first.
+
+        Returns:
+            int: The number of new entries.
+        """
+        new_activity = []
+        for activity in activity_list:
+            key = self.activity_key(activity)
+            if key in self.activity_keys:
+                break
+            new_activity.append(activity)
+
+        date_diffs = {self.activity_key(activity): activity["date_diff"] for activity in activity_list}
+        for activity in self.activity_data:
+            activity["date_diff"] = date_diffs.get(self.activity_key(activity), activity["date_diff"])
+
+        if not new_activity:
+            return 0
+
+        self.activity_data = (new_activity + self.activity_data)[:self.max_rows]
+        self.activity_keys = {self.activity_key(activity) for activity in self.activity_data}
+        self.post_message(DebugMessage({"Player Activity": f"{len(new_activity)} new entries"}, DebugLevel.LOW))
+        return len(new_activity)
+
+    def activity_cells(self, activity: dict) -> tuple:
+        return (
+            f"[b]{activity['flag_title']}" if "flag_title" in activity else f"[b]{activity['type']}",
+            f"[b]{activity['name']}[/b]",
+            f"[#9fef00]+{activity['points']}pts",
+            ActivityDate(f"{activity['date_diff']}", self.activity_key(activity)),
+        )
+
+    def make_activity_list(self) -> None:
+        """
+        Fills the table with the whole activity data.
+        """
         dt = self.query_one(DataTable)
+        dt.clear()
 
         for activity in self.activity_data:
-            dt.add_row(
-                f"[b]{activity['flag_title']}" if "flag_title" in activity else f"[b]{activity['type']}",
-                f"[b]{activity['name']}[/b]",
-                f"[#9fef00]+{activity['points']}pts",
-                f"{activity['date_diff']}",
-            )
\ No newline at end of file
+            key = self.activity_key(activity)
+            if key not in dt.rows:
+                dt.add_row(*self.activity_cells(activity), key=key)
+
+    def update_activity_rows(self, new_count: int) -> None:
+        """
+        Brings the table in line with the activity data after a merge: adds the rows
+        of the newest `new_count` entries at the top, removes the rows trimmed from
+        the data and updates the relative date of the rows that are kept.
+        """
+        dt = self.query_one(DataTable)
+        for row_key in list(dt.rows):
+            if row_key.value not in self.activity_keys:
+                dt.remove_row(row_key)
+
+        for activity in self.activity_data[new_count:]:
+            key = self.activity_key(activity)
+            if key in dt.rows and dt.get_cell(key, "date") != activity["date_diff"]:
+                dt.update_cell(key, "date", ActivityDate(f"{activity['date_diff']}", key))
+
+        if not new_count:
+            return
+
+        for activity in self.activity_data[:new_count]:
+            key = self.activity_key(activity)
+            if key not in dt.rows:
+                dt.add_row(*self.activity_cells(activity), key=key)
+
+        # rows can only be appended, so move the new ones to the top, ordered by
+        # the position of their activity key in the data
+        order = {}
+        for index, activity in enumerate(self.activity_data):
+            order.setdefault(self.activity_key(activity), index)
+        dt.sort("date", key=lambda cell: order.get(cell.key, len(order)))
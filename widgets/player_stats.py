@@ -1,11 +1,12 @@
-import httpx
+import sqlite3
+import time
 
 from rich.table import Table
 from textual.app import ComposeResult
 from textual.containers import Container
-from textual.widgets import Static, ProgressBar, Label
+from textual.widgets import Static, ProgressBar, Label, Sparkline
 
-from utilities import APIToken
+from utilities import APIToken, htb_api, metrics, profiler
 from enums import Ranks, DebugLevel
 from messages import DebugMessage
 
@@ -27,6 +28,9 @@ class PlayerStats(Static):
             "Accept": "application/json, text/plain, */*",
             "User-Agent": "HTBClient/1.0.0"
         }
+    # sparklines show the last history_days, one point per history_bucket seconds
+    history_days = 30
+    history_bucket = 6 * 3600
     
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)        
@@ -65,32 +69,154 @@ class PlayerStats(Static):
             yield ProgressBar(id="player_rank_progress", show_percentage=True, show_eta=False, total=100)
             yield Label(id="player_rank_progress_label")
             yield Static(id="player_stats_table")
+            with Container(id="player_history"):
+                yield Label(id="points_history_label")
+                yield Sparkline(id="points_sparkline")
+                yield Label(id="ranking_history_label")
+                yield Sparkline(id="ranking_sparkline")
+                yield Label(id="season_history_label")
+                yield Sparkline(id="season_sparkline")
 
 
     async def on_mount(self) -> None:
         """Mount the widget."""
         self.loading = True
+        self.restore_snapshot()
         self.run_worker(self.update_profile())
 
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known profile from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("player_stats")
+        if not snapshot:
+            return
+        try:
+            self.user_data.update(snapshot["user_data"])
+            self.current_season.update(snapshot["current_season"])
+            self.season_data.update(snapshot["season_data"])
+            self.render_profile(self.make_profile())
+            self.show_history()
+            self.add_class("stale")
+        except Exception as e:
+            self.post_message(DebugMessage({"Player Stats Snapshot Error": e}, DebugLevel.LOW))
 
+    @profiler.profiled("PlayerStats.update_profile")
     async def update_profile(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
         """       
         try:
             table: Table = await self.get_profile()
-            cntr = self.query_one("#player_stats_container")
-            cntr.border_title = f"{self.user_data['name']}::{self.user_data['id']}"
-            cntr.styles.border_title_color = "#9fef00"
-            self.query_one("#player_rank_label").update(self.id_to_rank(self.user_data["rank"]))
-            self.query_one("#player_stats_table").update(table)
-            self.query_one("#player_rank_progress", ProgressBar).advance(self.user_data["rank_progress"])
-            self.query_one("#player_rank_progress_label").update(self.id_to_rank(self.user_data['rank']+1))
-            self.loading = False
-            
+            if isinstance(table, str) and self.has_class("stale"):
+                # keep the snapshot on screen rather than an error
+                self.post_message(DebugMessage({"Player Stats Error": table}, DebugLevel.LOW))
+                return
+            self.render_profile(table)
+            self.remove_class("stale")
+            self.save_snapshot()
+            self.record_history()
+
         except Exception as e:
             self.query_one("#player_stats_table").update(f"Error: {e}")
 
+    async def refresh_season_rank(self) -> None:
+        """
+        Fetches only the season rank again and re-renders the profile.
+        """
+        data = await self.get_season_data()
+        if not isinstance(data, dict):
+            self.post_message(DebugMessage({"Season Rank Error": data}, DebugLevel.LOW))
+            return
+        self.render_profile(self.make_profile())
+        self.save_snapshot()
+        self.record_history()
+
+    def save_snapshot(self) -> None:
+        self.app.snapshot.put("player_stats", {
+            "user_data": self.user_data,
+            "current_season": self.current_season,
+            "season_data": self.season_data
+        })
+
+    def history_series(self) -> dict:
+        """
+        Returns the current value of every series kept in the local history.
+
+        Returns:
+            dict: Series name, e.g. "user:1:points" or "season:5:rank", to value.
+        """
+        user = f"user:{self.user_data['id']}"
+        season = f"season:{self.current_season['id']}"
+        series = {
+            f"{user}:ranking": self.user_data.get("ranking"),
+            f"{user}:points": self.user_data["points"],
+            f"{user}:rank_progress": self.user_data["rank_progress"],
+            f"{user}:user_owns": self.user_data["user_owns"],
+            f"{user}:system_owns": self.user_data["system_owns"],
+        }
+        if self.current_season["id"] is not None:
+            series.update({
+                f"{season}:rank": self.season_data["rank"],
+                f"{season}:points": self.season_data["total_season_points"],
+                f"{season}:flags": self.season_data["flags_to_next_rank"]["obtained"],
+            })
+        return series
+
+    def record_history(self) -> None:
+        """
+        Appends the profile and season rank to the local history and redraws the sparklines.
+        """
+        if self.user_data["id"] is None:
+            return
+        try:
+            self.app.history.append(self.history_series())
+            self.show_history()
+        except sqlite3.Error as e:
+            self.post_message(DebugMessage({"Player History Error": str(e)}, DebugLevel.LOW))
+
+    def show_history(self) -> None:
+        """
+        Draws the points, ranking and season points sparklines from the local history.
+        """
+        if self.user_data["id"] is None:
+            return
+        start = time.time() - self.history_days * 86400
+        user = f"user:{self.user_data['id']}"
+        season = f"season:{self.current_season['id']}"
+        for name, series, label, invert in (
+            ("points", f"{user}:points", "Points", False),
+            ("ranking", f"{user}:ranking", "Rank", True),
+            ("season", f"{season}:points", "Season Points", False),
+        ):
+            samples = [value for _, value in self.app.history.range(series, start, bucket=self.history_bucket)]
+            change = samples[-1] - samples[0] if samples else 0
+            if invert:
+                # a lower ranking is better, so draw it upside down
+                samples = [-value for value in samples]
+                change = -change
+            arrow = "▲" if change > 0 else "▼" if change < 0 else ""
+            self.query_one(f"#{name}_history_label", Label).update(f"{label} ({self.history_days}d) {arrow}{abs(change):g}")
+            sparkline = self.query_one(f"#{name}_sparkline", Sparkline)
+            if sparkline.data != samples:
+                sparkline.data = samples
+
+    def render_profile(self, table: Table) -> None:
+        """
+        Renders the profile table, rank label and rank progress.
+
+        Args:
+            table (Table): The profile table made by make_profile.
+        """
+        cntr = self.query_one("#player_stats_container")
+        cntr.border_title = f"{self.user_data['name']}::{self.user_data['id']}"
+        cntr.styles.border_title_color = "#9fef00"
+        self.query_one("#player_rank_label").update(self.id_to_rank(self.user_data["rank"]))
+        self.query_one("#player_stats_table").update(table)
+        self.query_one("#player_rank_progress", ProgressBar).update(progress=self.user_data["rank_progress"])
+        self.query_one("#player_rank_progress_label").update(self.id_to_rank(self.user_data['rank']+1))
+        self.loading = False
+
     async def get_user_id(self) -> str:
         """
         Retrieves the user ID from the API endpoint.
@@ -99,7 +225,7 @@ class PlayerStats(Static):
             str: The user ID.
         """
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint["info"], headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -120,7 +246,7 @@ class PlayerStats(Static):
         """
         try:
             await self.get_user_id()
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint["profile"] + str(self.user_data["id"]), headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -150,7 +276,7 @@ class PlayerStats(Static):
         
     async def get_current_season(self):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint["season"], headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -179,7 +305,7 @@ class PlayerStats(Static):
             if self.current_season["id"] is None:
                 await self.get_current_season()
 
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint["season_rank"] + str(self.current_season["id"]), headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -207,6 +333,8 @@ class PlayerStats(Static):
             if i == (id-1):
                 return rank.value
 
+    @profiler.profiled("PlayerStats.make_profile")
+    @metrics.timed("htbtui_render_duration_ms", handler="PlayerStats.make_profile")
     def make_profile(self):
 
         table = Table.grid(
@@ -0,0 +1,97 @@
+from textual.widgets import DataTable
+
+from utilities import MachineCatalogue, Recommender, metrics, profiler
+from .current_machines import CurrentMachines
+from .retired_machines import RetiredMachines
+
+class RecommendedMachines(DataTable):
+    """DataTable widget that ranks the current and retired machines I have not rooted yet."""
+
+    machine_difficulty_map = {
+            "Easy": "#90cd3f",
+            "Medium": "#ffb83e",
+            "Hard": "#fe0000",
+            "Insane": "#ffccff"
+        }
+    max_rows = 25
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.machine_data = {}
+        self.recommender = Recommender()
+        self.id = "recommended_machines"
+        self.loaded = False
+        self.show_header = True
+        self.cursor_type = "row"
+
+        self.add_column(label="ID")
+        self.add_column(label="Name")
+        self.add_column(label="OS")
+        self.add_column(label="User", key="user")
+        self.add_column(label="Root", key="root")
+        self.add_column(label="Rating")
+        self.add_column(label="Score")
+        self.add_column(label="Why")
+
+    def load(self) -> None:
+        """
+        Loads the machine lists the recommendations are made from, the first time the tab is needed.
+        The recommendations are updated again whenever one of the lists is rebuilt.
+        """
+        if not self.loaded:
+            self.loaded = True
+            for table in self.source_tables():
+                table.load()
+            self.update_recommendations()
+
+    def source_tables(self) -> tuple:
+        return self.screen.query_one(CurrentMachines), self.screen.query_one(RetiredMachines)
+
+    def update_recommendations(self) -> None:
+        """
+        Rescores the catalogue of the current and retired machines.
+        """
+        tables = self.source_tables()
+        self.machine_data = {id: data for table in tables for id, data in table.machine_data.items()}
+        self.build_recommendations()
+        self.make_machine_list()
+
+    @metrics.timed("htbtui_render_duration_ms", handler="RecommendedMachines.build_recommendations")
+    def build_recommendations(self) -> None:
+        self.recommender.build(MachineCatalogue(self.machine_data))
+
+    def apply_owns(self, machine_id: int, user_owned: bool, root_owned: bool) -> None:
+        """
+        Rescores the machines an own changes, e.g. after an accepted flag.
+
+        Args:
+            machine_id (int): The ID of the machine.
+            user_owned (bool): Whether the user flag is owned.
+            root_owned (bool): Whether the root flag is owned.
+        """
+        if self.recommender.set_owned(machine_id, user_owned, root_owned):
+            self.make_machine_list()
+
+    @profiler.profiled("RecommendedMachines.make_machine_list")
+    @metrics.timed("htbtui_render_duration_ms", handler="RecommendedMachines.make_machine_list")
+    def make_machine_list(self) -> None:
+        """
+        Shows the best scored machines, the strongest reason for each in the Why column.
+        """
+        cursor_row = self.cursor_row
+        self.clear()
+
+        for id, score, reason in self.recommender.top(self.max_rows):
+            data = self.machine_data[id]
+            self.add_row(
+                str(id),
+                f"[{self.machine_difficulty_map.get(data['difficulty'], 'white')}]{data['name']}",
+                data['os'],
+                "✅" if data['user_owned'] else "❌",
+                "✅" if data['root_owned'] else "❌",
+                str(data['rating']),
+                f"{score:.2f}",
+                reason,
+                key=f"{id}")
+
+        self.move_cursor(row=cursor_row)
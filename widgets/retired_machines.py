@@ -1,10 +1,9 @@
-import httpx
-
 from textual.widgets import DataTable
+from textual.widgets.data_table import RowKey
 
-from utilities import APIToken
+from utilities import APIToken, htb_api, metrics, profiler
 from enums import DebugLevel
-from messages import DebugMessage
+from messages import DebugMessage, MachineListUpdated
 
 class RetiredMachines(DataTable):
     """DataTable widget that shows retired machines."""
@@ -29,6 +28,7 @@ class RetiredMachines(DataTable):
         self.machine_data = {}
         self.loading = True
         self.id = "retired_machines"
+        self.loaded = False
         self.show_header = True
         self.cursor_type = "row"
 
@@ -38,25 +38,53 @@ class RetiredMachines(DataTable):
         self.add_column(label="Name")
         self.add_column(label="OS")
         # self.add_column(label="Difficulty")
-        self.add_column(label="User")
-        self.add_column(label="Root")
+        self.add_column(label="User", key="user")
+        self.add_column(label="Root", key="root")
         self.add_column(label="Points")
         self.add_column(label="Rating")
 
 
     async def on_mount(self) -> None:
         """Mount the widget."""
+        self.restore_snapshot()
+
+    def load(self) -> None:
+        """
+        Starts loading the machines the first time the tab is needed.
+        """
+        if self.loaded:
+            return
+        self.loaded = True
         self.run_worker(self.update_machine_list())
 
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known machine list from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("retired_machines")
+        if not snapshot:
+            return
+        self.machine_data = {int(id): data for id, data in snapshot.items()}
+        self.loading = False
+        self.add_class("stale")
+        self.make_machine_list()
+
 
+    @profiler.profiled("RetiredMachines.update_machine_list")
     async def update_machine_list(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
         """       
         try:
-            await self.get_machine_list()
+            data = await self.get_machine_list()
+            if not isinstance(data, dict):
+                # keep whatever is on screen, e.g. the snapshot
+                self.loading = False
+                return data
             self.loading = False
+            self.remove_class("stale")
             self.make_machine_list()
+            self.app.snapshot.put("retired_machines", self.machine_data)
         except Exception as e:
             return f"Error: {e}"
 
@@ -75,17 +103,17 @@ class RetiredMachines(DataTable):
         Raises:
             str: An error message if an exception occurs during the retrieval process.
         """
-        self.machine_list = []
+        machine_data = {}
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint, headers=self.headers)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await htb_api.json(response)
 
                     self.post_message(DebugMessage({"Current Machines": data}, DebugLevel.MEDIUM))
 
                     for machine in data["data"]:
-                        self.machine_data[machine["id"]] = {
+                        machine_data[machine["id"]] = {
                                 "name": machine["name"],
                                 "os": machine["os"],
                                 "difficulty": machine["difficultyText"],
@@ -102,12 +130,35 @@ class RetiredMachines(DataTable):
                                 "root_owns_count": machine["root_owns_count"],
                             }
 
+                    self.machine_data = machine_data
+
                     return self.machine_data
                 else:
                     return f"Error: {response.status_code} - {response.text}"
         except Exception as e:
             return f"Error: {e}"
 
+    def apply_owns(self, machine_id: int, user_owned: bool, root_owned: bool) -> None:
+        """
+        Updates the owns of one machine in place, e.g. after an accepted flag.
+
+        Args:
+            machine_id (int): The ID of the machine.
+            user_owned (bool): Whether the user flag is owned.
+            root_owned (bool): Whether the root flag is owned.
+        """
+        machine = self.machine_data.get(machine_id)
+        if machine is None:
+            return
+        machine["user_owned"] = user_owned
+        machine["root_owned"] = root_owned
+        row_key = RowKey(machine_id)
+        if row_key in self.rows:
+            self.update_cell(row_key, "user", "✅" if user_owned else "❌")
+            self.update_cell(row_key, "root", "✅" if root_owned else "❌")
+
+    @profiler.profiled("RetiredMachines.make_machine_list")
+    @metrics.timed("htbtui_render_duration_ms", handler="RetiredMachines.make_machine_list")
     def make_machine_list(self):
         """ 
         iterate over the machine list and add a row for each machine
@@ -125,6 +176,8 @@ class RetiredMachines(DataTable):
             }
         }
         """
+        cursor_row = self.cursor_row
+        self.clear()
             
         for id, data in self.machine_data.items():
             self.add_row(                
@@ -135,4 +188,7 @@ class RetiredMachines(DataTable):
                 "✅" if data['root_owned'] else "❌",
                 str(data['points']),
                 str(data['rating']),
-                key=f"{id}")
\ No newline at end of file
+                key=id)
+
+        self.move_cursor(row=cursor_row)
+        self.post_message(MachineListUpdated(self.id))
\ No newline at end of file
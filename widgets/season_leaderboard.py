@@ -0,0 +1,233 @@
+import asyncio
+import time
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from utilities import APIToken, LRUCache, htb_api, memory_budget, metrics
+from enums import DebugLevel
+from messages import DebugMessage
+from .player_stats import PlayerStats
+
+class SeasonLeaderboard(ScrollView, can_focus=True):
+    """
+    ScrollView that pages through the season leaderboard.
+
+    Only the rows in the viewport are rendered, one line at a time, and only
+    the pages under and around the viewport are fetched. Fetched pages are
+    kept in a bounded LRU cache, so scrolling back is free and scrolling
+    through thousands of ranks never holds more than a few pages.
+    """
+
+    token_name = "HTB_TOKEN"
+    base_url = "https://labs.hackthebox.com"
+    endpoint = "/api/v4/season/players/leaderboard" # ?season=<id>&page=<n>&per_page=<size>
+    headers = {
+            "Authorization": f"Bearer {APIToken(token_name).get_token()}",
+            "Accept": "application/json, text/plain, */*",
+            "User-Agent": "HTBClient/1.0.0"
+        }
+    BINDINGS = [("m", "jump_to_me", "My Rank")]
+
+    page_size = 50
+    page_cache_size = 20
+    # pages fetched beyond each edge of the viewport
+    prefetch_pages = 1
+    max_concurrent_pages = 2
+    error_retry_delay = 30
+    load_retry_delay = 2
+    row_format = "{rank:>8}  {name:<24.24}  {league:<12.12}  {points:>8}  {flags:>6}"
+    header_style = Style(bold=True, bgcolor="#1a2332")
+    me_style = Style(color="#9fef00", bold=True)
+    pending_style = Style(color="#5b72a4", dim=True)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.id = "season_leaderboard"
+        self.loaded = False
+        self.season_id = None
+        self.total = 0
+        self.my_rank = None
+        # the first jump to my rank waits until the tab is shown and has a size
+        self.jump_pending = False
+        self.pages = LRUCache(memory_budget.cache_size(self.page_cache_size))
+        self.page_requests = {}
+        self.page_errors = {}
+        self.page_semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        metrics.register_cache("leaderboard_pages", self.pages)
+
+    @property
+    def row_width(self) -> int:
+        return len(self.row_format.format(rank="", name="", league="", points="", flags=""))
+
+    def load(self) -> None:
+        """
+        Sizes the leaderboard from my season rank. Scrolling to it and fetching
+        pages wait until the leaderboard is shown, as it is usually loaded
+        ahead of time while its tab is hidden.
+        """
+        if self.loaded:
+            return
+        player_stats = self.screen.query_one(PlayerStats)
+        season_data = player_stats.season_data
+        if player_stats.current_season["id"] is None or not season_data["total_ranks"]:
+            # the season rank is not known yet
+            self.set_timer(self.load_retry_delay, self.load)
+            return
+        self.loaded = True
+        self.season_id = player_stats.current_season["id"]
+        self.total = int(season_data["total_ranks"])
+        self.my_rank = season_data["rank"]
+        # one line for the header
+        self.virtual_size = Size(self.row_width, self.total + 1)
+        self.jump_pending = True
+        self.call_after_refresh(self.jump_when_shown)
+
+    def on_show(self) -> None:
+        self.call_after_refresh(self.jump_when_shown)
+
+    def jump_when_shown(self) -> None:
+        """
+        Makes the first jump to my rank once the leaderboard is loaded and has a size.
+        """
+        if not self.jump_pending or not self.size.height:
+            return
+        self.jump_pending = False
+        self.action_jump_to_me()
+
+    def action_jump_to_me(self) -> None:
+        """
+        Scrolls so that my rank is in the middle of the viewport.
+        """
+        if not self.my_rank:
+            return
+        self.scroll_to(y=max(0, int(self.my_rank) - 1 - self.rows_visible() // 2), animate=False)
+        self.prefetch_visible()
+
+    def rows_visible(self) -> int:
+        return max(0, self.size.height - 1)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.prefetch_visible()
+
+    def on_resize(self) -> None:
+        if self.jump_pending:
+            self.jump_when_shown()
+        else:
+            self.prefetch_visible()
+
+    def visible_pages(self) -> range:
+        """
+        Returns the pages under the viewport, widened by prefetch_pages on each side.
+        Nothing is under a hidden viewport.
+        """
+        if not self.total or not self.size.height:
+            return range(0)
+        first = int(self.scroll_offset.y) // self.page_size
+        last = min(self.total - 1, int(self.scroll_offset.y) + self.rows_visible()) // self.page_size
+        last_page = (self.total - 1) // self.page_size
+        return range(max(0, first - self.prefetch_pages) + 1, min(last_page, last + self.prefetch_pages) + 2)
+
+    def prefetch_visible(self) -> None:
+        if not self.loaded:
+            return
+        for page in self.visible_pages():
+            self.request_page(page)
+
+    def request_page(self, page: int) -> None:
+        """
+        Starts fetching a page unless it is cached, in flight or recently failed.
+        """
+        if page in self.page_requests or self.pages.get(page) is not None:
+            return
+        failed_at = self.page_errors.get(page)
+        if failed_at is not None and time.monotonic() - failed_at < self.error_retry_delay:
+            return
+        self.page_requests[page] = self.run_worker(self.fetch_page(page), group="leaderboard_pages")
+
+    async def fetch_page(self, page: int) -> None:
+        """
+        Fetches one page of the leaderboard and redraws its rows.
+
+        Args:
+            page (int): The page, starting at 1.
+        """
+        try:
+            async with self.page_semaphore:
+                if page not in self.visible_pages():
+                    # scrolled away while waiting for a slot
+                    return
+                entries = await self.get_page(page)
+            if isinstance(entries, str):
+                self.page_errors[page] = time.monotonic()
+                self.post_message(DebugMessage({"Leaderboard Error": entries}, DebugLevel.LOW))
+            else:
+                self.page_errors.pop(page, None)
+                self.pages.put(page, entries)
+            self.refresh_lines((page - 1) * self.page_size + 1, self.page_size)
+        finally:
+            self.page_requests.pop(page, None)
+
+    async def get_page(self, page: int):
+        """
+        Retrieves one page of the season leaderboard.
+
+        Returns:
+            list: The entries, each with rank, name, league, points and flags, or an error string.
+        """
+        url = f"{self.base_url}{self.endpoint}?season={self.season_id}&page={page}&per_page={self.page_size}"
+        try:
+            response = await htb_api.get(url, headers=self.headers)
+            if response.status_code != 200:
+                return f"Error: {response.status_code} - {response.text}"
+            data = (await htb_api.json(response))["data"]
+            if isinstance(data, dict):
+                data = data.get("rankings") or data.get("data") or []
+            first_rank = (page - 1) * self.page_size + 1
+            return [self.parse_entry(entry, first_rank + offset) for offset, entry in enumerate(data)]
+        except Exception as e:
+            return f"Error: {e}"
+
+    @staticmethod
+    def parse_entry(entry: dict, rank: int) -> dict:
+        user = entry.get("user") or {}
+        return {
+            "rank": entry.get("rank") or rank,
+            "name": entry.get("name") or user.get("name") or "",
+            "league": entry.get("league") or entry.get("tier") or "",
+            "points": entry.get("points", entry.get("total_season_points", "")),
+            "flags": entry.get("flags", entry.get("total_flags", "")),
+        }
+
+    def render_line(self, y: int) -> Strip:
+        """
+        Renders one line of the viewport: the header, a row, or a placeholder for a row still loading.
+        """
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        if y == 0:
+            text = self.row_format.format(rank="Rank", name="Player", league="League", points="Points", flags="Flags")
+            return self.make_strip(text, self.rich_style + self.header_style, scroll_x, width)
+
+        index = scroll_y + y - 1
+        if index >= self.total:
+            return Strip.blank(width, self.rich_style)
+        page = index // self.page_size + 1
+        entries = self.pages.get(page, count=False)
+        offset = index % self.page_size
+        if entries is None or offset >= len(entries):
+            status = "unavailable" if page in self.page_errors else "..."
+            text = self.row_format.format(rank=index + 1, name=status, league="", points="", flags="")
+            return self.make_strip(text, self.rich_style + self.pending_style, scroll_x, width)
+
+        entry = entries[offset]
+        style = self.rich_style + self.me_style if self.my_rank and int(entry["rank"]) == int(self.my_rank) else self.rich_style
+        return self.make_strip(self.row_format.format(**entry), style, scroll_x, width)
+
+    @staticmethod
+    def make_strip(text: str, style: Style, scroll_x: int, width: int) -> Strip:
+        return Strip([Segment(text, style)]).crop_extend(scroll_x, scroll_x + width, style)
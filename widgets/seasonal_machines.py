@@ -1,9 +1,8 @@
-import httpx
-
 from textual.widgets import DataTable
+from textual.widgets.data_table import RowKey
 from textual.reactive import Reactive
 
-from utilities import APIToken
+from utilities import APIToken, diff_releases, htb_api, metrics, profiler
 from enums import DebugLevel
 from messages import DebugMessage
 
@@ -37,6 +36,7 @@ class SeasonalMachines(DataTable):
         self.id = "seasonal_machines"
         self.machine_data = {}
         self.active_ids = []
+        self.loaded = False
         self.show_header = True
         self.cursor_type = "row"
 
@@ -45,8 +45,8 @@ class SeasonalMachines(DataTable):
         self.add_column(label="ID")
         self.add_column(label="Name")
         self.add_column(label="OS")
-        self.add_column(label="User")
-        self.add_column(label="Root")
+        self.add_column(label="User", key="user")
+        self.add_column(label="Root", key="root")
         self.add_column(label="Status")
         self.add_column(label="Week")
 
@@ -56,8 +56,43 @@ class SeasonalMachines(DataTable):
 
     async def on_mount(self) -> None:
         """Mount the widget."""
-        self.run_worker(self.update_machine_list()) 
-        self.run_worker(self.get_seasons_list())       
+        self.restore_snapshot()
+
+    def load(self) -> None:
+        """
+        Starts loading the machines the first time the tab is needed.
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        self.run_worker(self.update_machine_list())
+        self.run_worker(self.get_seasons_list())
+
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known seasonal machines from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("seasonal_machines")
+        if not snapshot or not snapshot["machine_data"]:
+            return
+        self.machine_data = snapshot["machine_data"]
+        self.active_ids = snapshot["active_ids"]
+        self.active_season_id = snapshot["active_season_id"]
+        self.active_season_name = snapshot["active_season_name"]
+        self.loading = False
+        self.add_class("stale")
+        self.make_machine_list()
+
+    def save_snapshot(self) -> None:
+        """
+        Stores the seasonal machines in the app snapshot.
+        """
+        self.app.snapshot.put("seasonal_machines", {
+            "machine_data": self.machine_data,
+            "active_ids": self.active_ids,
+            "active_season_id": self.active_season_id,
+            "active_season_name": self.active_season_name
+        })
 
     async def reload_machines(self) -> None:
         """Reload the machines."""
@@ -77,7 +112,7 @@ class SeasonalMachines(DataTable):
             str: An error message if an exception occurs during the retrieval process.
         """
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoints["seasons_list"], headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -88,21 +123,29 @@ class SeasonalMachines(DataTable):
                             self.active_season_name = season["name"]
                             break
 
+                    self.save_snapshot()
+
                     return data["data"]
                 else:
                     return f"Error: {response.status_code} - {response.text}"
         except Exception as e:
             return f"Error: {e}"
 
+    @profiler.profiled("SeasonalMachines.update_machine_list")
     async def update_machine_list(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
         """       
         try:
-            await self.get_machine_list()
+            data = await self.get_machine_list()
             self.post_message(DebugMessage({"Seasonal Machines": self.machine_data}, DebugLevel.LOW))
             self.loading = False
+            if not isinstance(data, list):
+                # keep whatever is on screen, e.g. the snapshot
+                return data
+            self.remove_class("stale")
             self.make_machine_list()
+            self.save_snapshot()
         except Exception as e:
             self.post_message(DebugMessage({"Seasonal Machines Error": f"Error: {e}"}, DebugLevel.LOW))
             return f"Error: {e}"
@@ -122,18 +165,14 @@ class SeasonalMachines(DataTable):
         Raises:
             str: An error message if an exception occurs during the retrieval process.
         """
-        self.machine_data = {}
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoints["seasonal_machines"], headers=self.headers)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await htb_api.json(response)
                     
                     self.machine_data = data["data"]
-
-                    for machine in self.machine_data:
-                        if machine["is_released"]:
-                            self.active_ids.append(machine["id"])
+                    self.active_ids = [machine["id"] for machine in self.machine_data if machine["is_released"]]
 
                     return self.machine_data
                 else:
@@ -141,6 +180,52 @@ class SeasonalMachines(DataTable):
         except Exception as e:
             return f"Error: {e}"
 
+    async def check_releases(self) -> list:
+        """
+        Revalidates the seasonal machines and redraws them only if a week was released.
+
+        Returns:
+            list: (machine, reason) tuples for the released machines, see diff_releases.
+        """
+        if not self.loaded or not self.machine_data:
+            return []
+        response = await htb_api.get_if_changed(self.base_url + self.endpoints["seasonal_machines"], headers=self.headers)
+        if response is None:
+            return []
+        if response.status_code != 200:
+            self.post_message(DebugMessage({"Seasonal Machines Release Check": f"Error: {response.status_code} - {response.text}"}, DebugLevel.LOW))
+            return []
+
+        data = await htb_api.json(response)
+        releases = diff_releases(self.machine_data, data["data"])
+        if releases:
+            self.machine_data = data["data"]
+            self.active_ids = [machine["id"] for machine in self.machine_data if machine["is_released"]]
+            self.make_machine_list()
+            self.save_snapshot()
+        return releases
+
+    def apply_owns(self, machine_id: int, user_owned: bool, root_owned: bool) -> None:
+        """
+        Updates the owns of one machine in place, e.g. after an accepted flag.
+
+        Args:
+            machine_id (int): The ID of the machine.
+            user_owned (bool): Whether the user flag is owned.
+            root_owned (bool): Whether the root flag is owned.
+        """
+        machine = next((data for data in self.machine_data if not data["unknown"] and data["id"] == machine_id), None)
+        if machine is None:
+            return
+        machine["is_owned_user"] = user_owned
+        machine["is_owned_root"] = root_owned
+        row_key = RowKey(machine_id)
+        if machine["is_released"] and row_key in self.rows:
+            self.update_cell(row_key, "user", "✅" if user_owned else "❌")
+            self.update_cell(row_key, "root", "✅" if root_owned else "❌")
+
+    @profiler.profiled("SeasonalMachines.make_machine_list")
+    @metrics.timed("htbtui_render_duration_ms", handler="SeasonalMachines.make_machine_list")
     def make_machine_list(self):
         """ 
         iterate over the machine list and add a row for each machine
@@ -158,6 +243,8 @@ class SeasonalMachines(DataTable):
             }
         }
         """
+        cursor_row = self.cursor_row
+        self.clear()
             
         for i, data in enumerate(self.machine_data):
             if not data["unknown"] and data["is_released"]:
@@ -189,4 +276,5 @@ class SeasonalMachines(DataTable):
                     "✖️",
                     "~",
                     f"Week {i+1}")
-            
\ No newline at end of file
+
+        self.move_cursor(row=cursor_row)
\ No newline at end of file
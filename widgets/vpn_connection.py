@@ -1,4 +1,5 @@
-import httpx
+import asyncio
+
 import pyperclip
 
 from rich.table import Table
@@ -7,7 +8,7 @@ from textual.widgets import Static
 
 from messages import DebugMessage
 from enums import DebugLevel
-from utilities import APIToken
+from utilities import APIToken, TunMonitor, htb_api, profiler
 
 class VPNConnection(Static):
     """Static widget that shows the current VPN connection status."""
@@ -25,6 +26,11 @@ class VPNConnection(Static):
         super().__init__()                
         self.loading = True
         self.refresh_interval = 10
+        self.local_refresh_interval = 2
+        self.idle_refresh_interval = 60
+        self.tun_monitor = None
+        self.local_state = None
+        self.api_poll = None
         self.connection_data = {
             "status": None,
             "location_type_friendly": None,
@@ -46,21 +52,82 @@ class VPNConnection(Static):
     async def on_mount(self) -> None:
         """Mount the widget."""
         self.loading = True
+        self.restore_snapshot()
+
+        if not TunMonitor.is_supported():
+            # no local interface information, fall back to polling the API
+            self.run_worker(self.update_connection())
+            self.refresh_connection = self.app.scheduler.add(self, self.update_connection, self.refresh_interval, idle_interval=self.idle_refresh_interval)
+            return
 
-        self.run_worker(self.update_connection())
-        self.refresh_connection = self.set_interval(self.refresh_interval, self.update_connection)   
+        self.tun_monitor = TunMonitor(self.handle_local_state)
+        if not self.tun_monitor.start():
+            self.refresh_connection = self.app.scheduler.add(self, self.tun_monitor.check, self.local_refresh_interval, idle_interval=self.refresh_interval)
 
-    def _on_click(self) -> None:
+    def restore_snapshot(self) -> None:
+        """
+        Paints the last known connection from the app snapshot, marked as stale.
+        """
+        snapshot = self.app.snapshot.get("vpn_connection")
+        if not snapshot:
+            return
+        self.connection_data.update(snapshot)
+        self.loading = False
+        self.add_class("stale")
+        self.update(self.make_connection())
+
+    def on_unmount(self) -> None:
+        """Unmount the widget."""
+        if self.tun_monitor is not None:
+            self.tun_monitor.stop()
+
+    def handle_local_state(self, state: dict) -> None:
         """
-        Event handler for when the widget is clicked.
+        Updates the widget from a change of the local HTB tun interface and fetches
+        the server metadata from HTB, or the whole status if there is no such interface.
+
+        Args:
+            state (dict): The local interface state as read by TunMonitor.
+        """
+        self.local_state = state
+        self.post_message(DebugMessage({"VPN Local State": state}, DebugLevel.HIGH))
+
+        if state["up"] and state["ip4"]:
+            if self.api_poll is not None:
+                self.api_poll.pause()
+            self.connection_data["status"] = "Active"
+            self.connection_data["connection"]["ip4"] = state["ip4"]
+            self.loading = False
+            self.remove_class("stale")
+            self.update(self.make_connection())
+        else:
+            # no local HTB interface, which may still mean a connection the
+            # host cannot see (e.g. Pwnbox), so the API is polled until one shows up
+            if self.api_poll is None:
+                self.api_poll = self.app.scheduler.add(self, self.update_connection, self.refresh_interval, idle_interval=self.idle_refresh_interval)
+            else:
+                self.api_poll.resume()
+        self.run_worker(self.update_connection(), exclusive=True, group="vpn_metadata")
+
+    def is_locally_connected(self) -> bool:
+        """
+        Returns True if the local tun interface is up and has an address.
+        """
+        return bool(self.local_state and self.local_state["up"] and self.local_state["ip4"])
+
+    async def _on_click(self) -> None:
+        """
+        Event handler for when the widget is clicked. The clipboard write shells out
+        to xclip/xsel, so it runs in a worker thread.
         """
         try:
-            pyperclip.copy(self.connection_data["connection"]["ip4"])
+            await asyncio.to_thread(pyperclip.copy, self.connection_data["connection"]["ip4"])
             self.notify("IP copied to clipboard")
             self.post_message(DebugMessage({"Copied IP": self.connection_data["connection"]["ip4"]}, DebugLevel.LOW))
         except Exception as e:
             self.post_message(DebugMessage({"Error": e}, DebugLevel.LOW))
 
+    @profiler.profiled("VPNConnection.update_connection")
     async def update_connection(self) -> None:
         """
         Updates the machine list widget with the latest machine list data from HTB.
@@ -68,13 +135,15 @@ class VPNConnection(Static):
         try:
             table: Table = await self.get_connection_status()
             self.loading = False
+            self.remove_class("stale")
             self.update(table)
+            self.app.snapshot.put("vpn_connection", self.connection_data)
         except Exception as e:
             self.update(f"Error: {e}")
 
     async def get_connection_status(self):
         try:
-            async with httpx.AsyncClient() as client:
+            async with htb_api.session() as client:
                 response = await client.get(self.base_url + self.endpoint, headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
@@ -90,13 +159,18 @@ class VPNConnection(Static):
                         self.connection_data["server"]["port"] = data[0]["server"]["port"]
                         self.connection_data["server"]["friendly_name"] = data[0]["server"]["friendly_name"]
                         self.connection_data["connection"]["through_pwnbox"] = data[0]["connection"]["through_pwnbox"]
-                        self.connection_data["connection"]["ip4"] = data[0]["connection"]["ip4"]
+                        if not self.is_locally_connected():
+                            self.connection_data["connection"]["ip4"] = data[0]["connection"]["ip4"]
                         self.connection_data["connection"]["ip6"] = data[0]["connection"]["ip6"]
                         self.connection_data["connection"]["down"] = data[0]["connection"]["down"]
                         self.connection_data["connection"]["up"] = data[0]["connection"]["up"]
 
                         return self.make_connection()
 
+                    elif self.is_locally_connected():
+                        # HTB has not registered the connection yet, the local state wins
+                        return self.make_connection()
+
                     else:
                         self.connection_data["status"] = "No active connection"
 
@@ -113,4 +187,5 @@ class VPNConnection(Static):
         if self.connection_data["status"] != "Active":
             return f"[red bold]{self.connection_data['status']}"
 
-        return f"{self.connection_data['location_type_friendly']} :: [#9fef00]{self.connection_data['connection']['ip4']}"
\ No newline at end of file
+        location = self.connection_data["location_type_friendly"] or (self.local_state or {}).get("interface")
+        return f"{location} :: [#9fef00]{self.connection_data['connection']['ip4']}"
\ No newline at end of file